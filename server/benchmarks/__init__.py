@@ -0,0 +1,312 @@
+"""
+Latency and throughput benchmarks of answering questions, run against recorded Fuseki responses so that
+only this repository's code is measured and runs are comparable across machines and days.
+
+    python -m benchmarks record recording.json
+    python -m benchmarks run recording.json --output results.json --baseline previous.json
+"""
+
+import itertools
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+import numpy as np
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import (
+    DomainRangePropertyStrategy,
+    DomainRangeStrategy,
+    FilterMassStrategy,
+    MassFunctionStrategy,
+    NaturalLanguageQueryExecutor,
+    SubSuperStrategy,
+    WhatStrategy,
+)
+from nlp2sparql import lexer
+from nlp2sparql.grammar import TEMPLATES
+
+from .dataset import FOUNDATION, firesat_ntriples
+from .replay import RecordingClient, ReplayClient
+
+# one question answered by one strategy, from the tokens the parser hands it
+Workload = namedtuple("Workload", "name strategy options tokens")
+
+WORKLOADS = (
+    Workload(
+        "what",
+        WhatStrategy,
+        {},
+        [("What", "WP"), ("mission", "NN"), ("description", "NN")],
+    ),
+    Workload(
+        "what_similar",
+        WhatStrategy,
+        {},
+        [("What", "WP"), ("mission", "NN"), ("desc", "NN")],
+    ),
+    Workload(
+        "domain_range",
+        DomainRangeStrategy,
+        {},
+        [("What", "WP"), ("domain", "NN"), ("range", "NN"), ("hasProperty2", "NN")],
+    ),
+    Workload(
+        "domain_range_disambiguation",
+        DomainRangeStrategy,
+        {},
+        [("What", "WP"), ("domain", "NN"), ("range", "NN"), ("hasProperty0", "NN")],
+    ),
+    Workload(
+        "domain_range_property",
+        DomainRangePropertyStrategy,
+        {},
+        [("properties", "NNS"), ("domain", "NN"), ("Class7", "NN")],
+    ),
+    Workload(
+        "subsuper",
+        SubSuperStrategy,
+        {},
+        [("subclasses", "VBZ"), (FOUNDATION + "analysis#Class10", "NN")],
+    ),
+    Workload(
+        "subsuper_transitive",
+        SubSuperStrategy,
+        {"transitive": True},
+        [("subclasses", "VBZ"), (FOUNDATION + "analysis#Class10", "NN")],
+    ),
+    Workload(
+        "mass_function",
+        MassFunctionStrategy,
+        {},
+        [("mass", "NN"), ("function", "NN"), ("id", "NN"), ("500010", "CD")],
+    ),
+    Workload(
+        "filter_mass",
+        FilterMassStrategy,
+        {},
+        [("heavier", "JJR"), ("1", "CD"), ("lighter", "JJR"), ("5", "CD")],
+    ),
+    Workload(
+        "filter_mass_count",
+        FilterMassStrategy,
+        {"count": True},
+        [("heavier", "JJR"), ("10", "CD")],
+    ),
+)
+
+# raw questions for the parser alone, which needs no Fuseki
+SENTENCES = (
+    "What is the mission description?",
+    "What is the domain and range of hasProperty2?",
+    "What are the properties of domain Class7?",
+    f"What are the subclasses of {FOUNDATION}analysis#Class10?",
+    "What is the mass and function of assembly id 500010?",
+    "Which subjects are heavier than 1 kg and lighter than 5 kg?",
+)
+
+# inputs for the lexer alone: the sentences, one long question made of them, and inputs that made the
+# url regular expression once used by the parser backtrack exponentially or quadratically
+LEXER_INPUTS = {
+    "lex": SENTENCES,
+    "lex_long": (" ".join(SENTENCES * 100),),
+    "lex_adversarial": (
+        "What is http://x/(" + "a" * 5000 + "!",
+        "What is " + "a." * 5000 + "!",
+        'What is "' + "unterminated " * 1000,
+    ),
+}
+
+
+def _answer(executor: NaturalLanguageQueryExecutor, workload: Workload):
+    # a strategy made without a session answers as the first question of a conversation
+    strategy = executor._create(workload.strategy, **workload.options)
+    return strategy.execute(workload.tokens, {}, executor.client)
+
+
+def summarize(seconds: list) -> dict:
+    """
+    Latency percentiles and mean in milliseconds, and the throughput of answering one after the other.
+    """
+    samples = np.asarray(seconds) * 1000
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "iterations": len(samples),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "mean_ms": float(samples.mean()),
+        "qps": float(len(samples) / samples.sum() * 1000),
+    }
+
+
+def _measure(function, iterations: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        function()
+    seconds = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return summarize(seconds)
+
+
+def record(path: str, ntriples_path: str = None, scale: int = 1):
+    """
+    Answers every workload once against LocalFusekiClient and saves the Fuseki calls made to `path`.
+
+    Args:
+        ntriples_path: dataset to answer from, by default a synthetic FireSat dataset
+        scale: size of the synthetic dataset, see `firesat_ntriples`
+    """
+    generated = None
+    if ntriples_path is None:
+        handle, generated = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w", encoding="utf-8") as dump:
+            dump.write(firesat_ntriples(scale))
+        ntriples_path = generated
+    try:
+        client = RecordingClient(LocalFusekiClient(ntriples_path=ntriples_path))
+        executor = NaturalLanguageQueryExecutor(client)
+        executor.warmup()
+        for workload in WORKLOADS:
+            _answer(executor, workload)
+        client.save(path)
+    finally:
+        if generated is not None:
+            os.remove(generated)
+
+
+def run(recording: str, iterations: int = 200, warmup: int = 10) -> dict:
+    """
+    Measures every workload against a recording made by `record`, and the grammar, the lexer and the
+    NLTK parser on their own.
+
+    Returns:
+        A JSON-able dict of run metadata under "meta" and one summary per benchmark under "results".
+        Benchmarks that cannot run here, ie. parsing without the NLTK data, hold a "skipped" reason.
+    """
+    executor = NaturalLanguageQueryExecutor(ReplayClient.load(recording))
+    executor.warmup()
+    results = {}
+    for workload in WORKLOADS:
+        results[workload.name] = _measure(
+            lambda: _answer(executor, workload), iterations, warmup
+        )
+
+    # one sentence per call, in turn
+    sentences = itertools.cycle(SENTENCES)
+    results["grammar"] = _measure(
+        lambda: TEMPLATES.match(next(sentences)), iterations, warmup
+    )
+    for name, inputs in LEXER_INPUTS.items():
+        texts = itertools.cycle(inputs)
+        results[name] = _measure(lambda: lexer.lex(next(texts)), iterations, warmup)
+    try:
+        executor._parse(SENTENCES[0])
+    except LookupError as e:
+        missing = re.search(r"Resource \S+ not found", str(e))
+        reason = missing.group(0) if missing else type(e).__name__
+        results["parse"] = {"skipped": f"NLTK data is missing: {reason}"}
+    else:
+        results["parse"] = _measure(
+            lambda: executor._parse(next(sentences)), iterations, warmup
+        )
+    return {"meta": _meta(iterations), "results": results}
+
+
+# run in a fresh interpreter, so that nothing is imported or loaded yet
+_COLD_START = """
+import json, time
+start = time.perf_counter()
+import nlp2sparql
+imported = time.perf_counter()
+try:
+    nlp2sparql.resources.load()
+    loaded = time.perf_counter() - imported
+except LookupError:
+    loaded = None
+print(json.dumps({"import": imported - start, "load": loaded}))
+"""
+
+
+def cold_start(runs: int = 10) -> dict:
+    """
+    Measures starting a worker in fresh interpreters: importing nlp2sparql, then loading NLTK and its
+    data with `resources.load`. Both are summaries of one sample per run, like the results of `run`.
+    """
+    server = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    imports, loads = [], []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _COLD_START],
+            cwd=server,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings = json.loads(output.splitlines()[-1])
+        imports.append(timings["import"])
+        if timings["load"] is not None:
+            loads.append(timings["load"])
+    results = {"import_nlp2sparql": summarize(imports)}
+    if loads:
+        results["nltk_load"] = summarize(loads)
+    else:
+        results["nltk_load"] = {"skipped": "NLTK data is missing"}
+    return {"meta": _meta(runs), "results": results}
+
+
+def _meta(iterations: int) -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+        "iterations": iterations,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = 0.2) -> list:
+    """
+    Benchmarks whose p95 latency grew by more than `tolerance` over a baseline run.
+
+    Args:
+        current: output of `run`
+        baseline: output of an earlier `run`
+        tolerance: allowed relative slowdown, ie. 0.2 for 20%
+
+    Returns:
+        A list of messages, empty when nothing regressed
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {})
+        if "p95_ms" not in result or "p95_ms" not in before:
+            continue
+        if result["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']:.3f} ms, was {before['p95_ms']:.3f} ms"
+            )
+    return regressions
+
+
+def save(results: dict, path: str):
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(results, output, indent=2)
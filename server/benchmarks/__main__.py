@@ -0,0 +1,81 @@
+import argparse
+import json
+import sys
+
+from . import cold_start, compare, record, run, save
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks answering questions against recorded Fuseki responses.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recorder = commands.add_parser(
+        "record", help="record the Fuseki calls of every workload"
+    )
+    recorder.add_argument("recording", help="file to write the recording to")
+    recorder.add_argument(
+        "--ntriples", help="dataset to answer from, by default a synthetic one"
+    )
+    recorder.add_argument(
+        "--scale", type=int, default=1, help="size of the synthetic dataset"
+    )
+
+    runner = commands.add_parser(
+        "run", help="measure every workload against a recording"
+    )
+    runner.add_argument("recording", help="file written by the record command")
+    runner.add_argument("--iterations", type=int, default=200)
+    runner.add_argument("--warmup", type=int, default=10)
+
+    cold = commands.add_parser(
+        "coldstart", help="measure importing nlp2sparql and loading NLTK data"
+    )
+    cold.add_argument("--runs", type=int, default=10)
+
+    for command in (runner, cold):
+        command.add_argument("--output", help="file to write the JSON results to")
+        command.add_argument(
+            "--baseline", help="JSON results of an earlier run to compare with"
+        )
+        command.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.2,
+            help="allowed relative p95 slowdown against the baseline",
+        )
+
+    args = parser.parse_args(argv)
+    if args.command == "record":
+        record(args.recording, args.ntriples, args.scale)
+        return 0
+
+    if args.command == "coldstart":
+        results = cold_start(args.runs)
+    else:
+        results = run(args.recording, args.iterations, args.warmup)
+    if args.output:
+        save(results, args.output)
+    for name, result in results["results"].items():
+        if "skipped" in result:
+            print(f"{name:30} skipped: {result['skipped']}")
+        else:
+            print(
+                f"{name:30} p50 {result['p50_ms']:8.3f} ms  p95 {result['p95_ms']:8.3f} ms"
+                f"  p99 {result['p99_ms']:8.3f} ms  {result['qps']:10.1f} q/s"
+            )
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline:
+            regressions = compare(results, json.load(baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
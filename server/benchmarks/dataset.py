@@ -0,0 +1,88 @@
+import random
+
+FOUNDATION = "http://imce.jpl.nasa.gov/foundation/"
+FSE = "http://opencaesar.io/examples/firesat/disciplines/fse/fse#"
+VIM4 = "http://bipm.org/jcgm/vim4#"
+EX = "http://example.org/firesat#"
+
+RDF_TYPE = "<http://www.w3.org/1999/02/22-rdf-syntax-ns#type>"
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL_CLASS = "<http://www.w3.org/2002/07/owl#Class>"
+DESCRIPTION = "<http://purl.org/dc/elements/1.1/description>"
+
+VOCABULARIES = ("analysis", "base", "bundle", "mission", "project")
+
+
+def _literal(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def firesat_ntriples(scale: int = 1, seed: int = 0) -> str:
+    """
+    A synthetic FireSat-shaped dataset in N-Triples, shaped like the questions the strategies answer:
+    described foundation vocabularies, a class hierarchy, labelled properties with domains and ranges
+    (some labels shared between vocabularies, which needs disambiguation) and assemblies with an
+    identifier, a mass and the functions they perform.
+
+    Args:
+        scale: multiplies the number of classes, properties and assemblies
+        seed: seed of the generator, the same arguments always give the same dataset
+    """
+    rng = random.Random(seed)
+    lines = []
+
+    def triple(s, p, o):
+        lines.append(f"{s} {p} {o} .")
+
+    for name in VOCABULARIES:
+        vocabulary = f"<{FOUNDATION}{name}>"
+        triple(vocabulary, DESCRIPTION, _literal(f"The {name} vocabulary"))
+        triple(vocabulary, f"<{RDFS}label>", _literal(name))
+
+    classes = []
+    for i in range(200 * scale):
+        vocabulary = VOCABULARIES[i % len(VOCABULARIES)]
+        uri = f"<{FOUNDATION}{vocabulary}#Class{i}>"
+        classes.append(uri)
+        triple(uri, RDF_TYPE, OWL_CLASS)
+        triple(uri, f"<{RDFS}label>", _literal(f"Class{i}"))
+        # a forest a few levels deep, every class below an earlier one
+        if i >= len(VOCABULARIES):
+            triple(uri, f"<{RDFS}subClassOf>", classes[rng.randrange(i // 2, i)])
+
+    for i in range(400 * scale):
+        # every tenth label also exists in a second vocabulary
+        label = f"hasProperty{i // 2 if i % 10 == 1 else i}"
+        vocabulary = VOCABULARIES[i % len(VOCABULARIES)]
+        uri = f"<{FOUNDATION}{vocabulary}#{label}>"
+        triple(uri, f"<{RDFS}label>", _literal(label))
+        triple(uri, f"<{RDFS}domain>", rng.choice(classes))
+        triple(uri, f"<{RDFS}range>", rng.choice(classes))
+
+    for i in range(500 * scale):
+        assembly = f"<{EX}Assembly{i}Unit>"
+        quantity = f"_:mass{i}"
+        triple(assembly, RDF_TYPE, f"<{FSE}Assembly>")
+        triple(
+            assembly,
+            "<http://imce.jpl.nasa.gov/foundation/base#hasIdentifier>",
+            _literal(str(500000 + i)),
+        )
+        triple(
+            assembly,
+            "<http://imce.jpl.nasa.gov/foundation/analysis#isCharacterizedBy>",
+            quantity,
+        )
+        mass = round(rng.lognormvariate(0, 1.5), 3)
+        triple(
+            quantity,
+            f"<{VIM4}hasDoubleNumber>",
+            f'"{mass}"^^<http://www.w3.org/2001/XMLSchema#double>',
+        )
+        for function in rng.sample(range(50), 3):
+            triple(
+                assembly,
+                "<http://imce.jpl.nasa.gov/foundation/mission#performs>",
+                f"<{EX}PerformFunction{function}BySegment>",
+            )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,413 @@
+"""
+Concurrent load and soak testing of the /ask endpoint, or of the /query and /response pair it
+replaces. Many clients replay
+conversations from the README examples and the end-to-end tests, and the run reports throughput, tail
+latency, errors, answers that differ from a serial run, and the server's memory over time.
+
+    python -m benchmarks.load --serve --latency 0.02 --concurrency 16 --duration 600
+    python -m benchmarks.load --url http://localhost:8080 --pid 1234 --output soak.json
+"""
+
+import argparse
+import ast
+import glob
+import http.client
+import importlib
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import NaturalLanguageQueryExecutor
+
+from . import SENTENCES, _meta, save, summarize
+from .dataset import firesat_ntriples
+from .simulated import SimulatedFuseki
+
+# one question of a conversation, and the answer the corpus expects if it knows it
+Turn = namedtuple("Turn", "question expected")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def corpus_from_tests(paths) -> list:
+    """
+    Conversations from the end-to-end tests: every `tests = {question: answer}` dict is one
+    conversation, asked in order since some turns answer a disambiguation question of the previous one.
+    """
+    conversations = []
+    for path in paths:
+        with open(path, encoding="utf-8") as source:
+            tree = ast.parse(source.read(), path)
+        for node in ast.walk(tree):
+            if not (isinstance(node, ast.Assign) and isinstance(node.value, ast.Dict)):
+                continue
+            if [getattr(t, "id", None) for t in node.targets] != ["tests"]:
+                continue
+            items = list(zip(node.value.keys, node.value.values))
+            if items and all(
+                isinstance(n, ast.Constant) and isinstance(n.value, str)
+                for item in items
+                for n in item
+            ):
+                conversations.append([Turn(k.value, v.value) for k, v in items])
+    return conversations
+
+
+def corpus_from_readme(path: str) -> list:
+    """
+    One conversation per "Ex: ..." example question of the README, with no expected answer.
+    """
+    with open(path, encoding="utf-8") as readme:
+        examples = re.findall(r"^\s*Ex:\s*(.+?)\s*$", readme.read(), re.MULTILINE)
+    return [[Turn(question, None)] for question in examples]
+
+
+def default_corpus(root: str = ROOT) -> list:
+    conversations = corpus_from_tests(
+        sorted(glob.glob(os.path.join(root, "tests", "*_test.py")))
+    )
+    readme = os.path.join(root, "README.md")
+    if os.path.exists(readme):
+        conversations += corpus_from_readme(readme)
+    # questions about the synthetic dataset, answerable by a simulated Fuseki
+    conversations += [[Turn(sentence, None)] for sentence in SENTENCES]
+    return conversations
+
+
+class ChatClient:
+    """
+    Asks questions the way the frontend does, POSTing the question to /ask in a session of its own over
+    one keep-alive connection. A legacy client POSTs it to /query and then GETs the answer from
+    /response, the way the frontend did before /ask.
+    """
+
+    def __init__(self, url: str, timeout: float = 30, legacy: bool = False):
+        self.legacy = legacy
+        # a conversation of its own, as every browser tab has
+        self.session = uuid.uuid4().hex
+        parts = urlsplit(url)
+        self._prefix = parts.path.rstrip("/")
+        self._connection = http.client.HTTPConnection(
+            parts.hostname, parts.port, timeout=timeout
+        )
+
+    def _request(self, method, path, body=None):
+        headers = {"X-Session-ID": self.session}
+        if body is not None:
+            headers["Content-Type"] = "application/json"
+        self._connection.request(method, self._prefix + path, body, headers)
+        response = self._connection.getresponse()
+        return response.status, response.read()
+
+    def ask(self, question: str) -> str:
+        """
+        Returns:
+            The answer, stripped like the end-to-end tests do
+
+        Raises:
+            http.client.HTTPException: on a 4xx or 5xx status
+            OSError: if the server could not be reached
+        """
+        try:
+            body = json.dumps({"data": question})
+            if not self.legacy:
+                status, body = self._request("POST", "/ask", body)
+            else:
+                status, _ = self._request("POST", "/query", body)
+                if status < 400:
+                    status, body = self._request("GET", "/response")
+        except (OSError, http.client.HTTPException):
+            self._connection.close()
+            raise
+        if status >= 400:
+            raise http.client.HTTPException(f"HTTP {status} for {question!r}")
+        return json.loads(body)["response"].strip()
+
+    def close(self):
+        self._connection.close()
+
+
+def rss_bytes(pid="self"):
+    """
+    Resident set size of a process, or None for no process or where /proc is not available.
+    """
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def reference_answers(url: str, corpus: list, legacy: bool = False):
+    """
+    Asks every conversation once, one question at a time, for the answers concurrent clients should
+    get too. Turns that failed have no reference answer.
+
+    Returns:
+        conversations: the corpus with the serial answers as expected answers
+        disagreements: turns whose serial answer differs from the one the corpus expects
+    """
+    client = ChatClient(url, legacy=legacy)
+    conversations, disagreements = [], []
+    try:
+        for conversation in corpus:
+            answered = []
+            for turn in conversation:
+                try:
+                    answer = client.ask(turn.question)
+                except (OSError, http.client.HTTPException):
+                    answer = None
+                if turn.expected is not None and answer != turn.expected.strip():
+                    disagreements.append(turn.question)
+                answered.append(Turn(turn.question, answer))
+            conversations.append(answered)
+    finally:
+        client.close()
+    return conversations, disagreements
+
+
+class _Tally:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.mismatches = 0
+        self._lock = threading.Lock()
+
+    def add(self, seconds, error=False, mismatch=False):
+        with self._lock:
+            self.latencies.append(seconds)
+            self.errors += error
+            self.mismatches += mismatch
+
+    def snapshot(self):
+        with self._lock:
+            return len(self.latencies), self.errors, self.mismatches
+
+
+def soak(
+    url: str,
+    corpus: list,
+    concurrency: int = 8,
+    duration: float = 30,
+    sample_interval: float = 1,
+    pid="self",
+    seed: int = 0,
+    legacy: bool = False,
+) -> dict:
+    """
+    Replays random conversations from `concurrency` clients at once for `duration` seconds.
+
+    Args:
+        url: base URL of the server
+        corpus: conversations, lists of Turn, ie. from `default_corpus`
+        sample_interval: seconds between two samples of the timeline
+        pid: process id of the server, for its memory, "self" when it runs in this process and None
+            to not sample memory
+        legacy: ask through /query and /response, see ChatClient
+
+    Returns:
+        A JSON-able report: a "summary" of the whole run, a "timeline" of cumulative counts and server
+        memory, and the questions whose serial answer differs from the corpus under "disagreements".
+    """
+    conversations, disagreements = reference_answers(url, corpus, legacy)
+    tally = _Tally()
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client(number):
+        chat = ChatClient(url, legacy=legacy)
+        rng = random.Random(seed + number)
+        try:
+            while time.perf_counter() < deadline:
+                for turn in rng.choice(conversations):
+                    asked = time.perf_counter()
+                    try:
+                        answer = chat.ask(turn.question)
+                    except (OSError, http.client.HTTPException):
+                        tally.add(time.perf_counter() - asked, error=True)
+                        continue
+                    mismatch = turn.expected is not None and answer != turn.expected
+                    tally.add(time.perf_counter() - asked, mismatch=mismatch)
+        finally:
+            chat.close()
+
+    timeline = []
+
+    def sample():
+        completed, errors, mismatches = tally.snapshot()
+        rss = rss_bytes(pid)
+        timeline.append(
+            {
+                "elapsed_s": round(time.perf_counter() - start, 3),
+                "completed": completed,
+                "errors": errors,
+                "mismatches": mismatches,
+                "rss_mb": None if rss is None else round(rss / 2**20, 1),
+            }
+        )
+
+    threads = [
+        threading.Thread(target=client, args=(n,), daemon=True)
+        for n in range(concurrency)
+    ]
+    sample()
+    for thread in threads:
+        thread.start()
+    while time.perf_counter() < deadline:
+        time.sleep(min(sample_interval, max(deadline - time.perf_counter(), 0)))
+        sample()
+    # clients finish the question they are asking
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    sample()
+
+    completed, errors, mismatches = tally.snapshot()
+    summary = {"requests": completed, "concurrency": concurrency}
+    if completed:
+        summary.update(summarize(tally.latencies))
+        del summary["qps"], summary["iterations"]
+    summary.update(
+        {
+            "throughput_qps": completed / elapsed,
+            "errors": errors,
+            "error_rate": errors / completed if completed else 0.0,
+            "mismatches": mismatches,
+            "mismatch_rate": mismatches / completed if completed else 0.0,
+        }
+    )
+    return {
+        "meta": _meta(completed),
+        "summary": summary,
+        "timeline": timeline,
+        "disagreements": disagreements,
+    }
+
+
+class _QuietHandler(WSGIRequestHandler):
+    # one access log line per question would drown the report
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def serve(routes, client, host: str = "127.0.0.1", port: int = 0):
+    """
+    Serves the Flask app of a routes module from a background thread of this process, with questions
+    answered from `client` instead of the configured Fuseki.
+
+    Args:
+        routes: the routes module, as imported by the caller
+        client: ie. a SimulatedFuseki
+
+    Returns:
+        server: the running server, to `shutdown()` when done
+        url: its base URL
+    """
+    routes.nlqe = NaturalLanguageQueryExecutor(client)
+    routes.nlqe.warmup()
+    server = make_server(
+        host, port, routes.app, threaded=True, request_handler=_QuietHandler
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.port}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load",
+        description="Concurrent load and soak test of the /ask endpoint.",
+    )
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--url", help="base URL of a running server")
+    target.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve the app in this process, over a simulated Fuseki",
+    )
+    parser.add_argument(
+        "--pid", help="process id of the server at --url, to sample its memory"
+    )
+    parser.add_argument(
+        "--ntriples", help="dataset of the simulated Fuseki, by default a synthetic one"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.02, help="simulated Fuseki round trip, s"
+    )
+    parser.add_argument(
+        "--jitter", type=float, default=0.0, help="random +/- on the latency, s"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--sample-interval", type=float, default=1, help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="ask through /query and /response instead of /ask",
+    )
+    parser.add_argument("--output", help="file to write the JSON report to")
+    args = parser.parse_args(argv)
+
+    server, generated = None, None
+    url, pid = args.url, args.pid
+    if args.serve:
+        ntriples_path = args.ntriples
+        if ntriples_path is None:
+            handle, generated = tempfile.mkstemp(suffix=".nt")
+            with os.fdopen(handle, "w", encoding="utf-8") as dump:
+                dump.write(firesat_ntriples())
+            ntriples_path = generated
+        simulated = SimulatedFuseki(
+            LocalFusekiClient(ntriples_path=ntriples_path),
+            args.latency,
+            args.jitter,
+            args.seed,
+        )
+        server, url = serve(importlib.import_module("routes"), simulated)
+        pid = "self"
+
+    try:
+        report = soak(
+            url,
+            default_corpus(),
+            args.concurrency,
+            args.duration,
+            args.sample_interval,
+            pid,
+            args.seed,
+            args.legacy,
+        )
+    finally:
+        if server is not None:
+            server.shutdown()
+        if generated is not None:
+            os.remove(generated)
+
+    if args.output:
+        save(report, args.output)
+    summary = report["summary"]
+    print(json.dumps(summary, indent=2))
+    if report["timeline"] and report["timeline"][-1]["rss_mb"] is not None:
+        rss = [sample["rss_mb"] for sample in report["timeline"]]
+        print(f"rss_mb: start {rss[0]}, end {rss[-1]}, max {max(rss)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import json
+
+
+def call_key(method: str, args: tuple, kwargs: dict) -> str:
+    """
+    A canonical text key for a client call. Arguments that are not JSON values, ie. a FilterDecorator,
+    are keyed by their class and attributes.
+    """
+
+    def encode(value):
+        if isinstance(value, (set, frozenset)):
+            return sorted(value)
+        return dict(vars(value), __class__=type(value).__name__)
+
+    return json.dumps([method, list(args), kwargs], sort_keys=True, default=encode)
+
+
+class RecordingClient:
+    """
+    Wraps a blocking client and records the result of every query method called through it, so that the
+    same calls can be answered later without Fuseki by a ReplayClient. Streamed results are recorded
+    whole and the wrapped client is read to the end.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = {}
+
+    def __getattr__(self, method):
+        target = getattr(self._client, method)
+        if not method.endswith("_query"):
+            return target
+
+        def record(*args, **kwargs):
+            result = target(*args, **kwargs)
+            if kwargs.get("stream"):
+                result = list(result)
+            # a copy, strategies may change the rows they are given
+            self.calls[call_key(method, args, kwargs)] = json.loads(json.dumps(result))
+            return iter(result) if kwargs.get("stream") else result
+
+        return record
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as recording:
+            json.dump({"version": 1, "calls": self.calls}, recording)
+
+
+class ReplayClient:
+    """
+    A stand-in for FusekiClient answering every query method from a recording, so that benchmarks only
+    measure this repository's code. Like a response body, a recorded result is decoded again on every
+    call, which also keeps strategies from seeing each other's changes. A call that was not recorded
+    raises KeyError.
+    """
+
+    def __init__(self, calls: dict):
+        self.calls = calls
+        self._bodies = {key: json.dumps(result) for key, result in calls.items()}
+
+    @classmethod
+    def load(cls, path: str) -> "ReplayClient":
+        with open(path, encoding="utf-8") as recording:
+            return cls(json.load(recording)["calls"])
+
+    def close(self):
+        pass
+
+    def __getattr__(self, method):
+        if not method.endswith("_query"):
+            raise AttributeError(method)
+
+        def replay(*args, **kwargs):
+            key = call_key(method, args, kwargs)
+            try:
+                body = self._bodies[key]
+            except KeyError:
+                raise KeyError(
+                    f"No recorded response for {key}, record the workload again"
+                ) from None
+            result = json.loads(body)
+            return iter(result) if kwargs.get("stream") else result
+
+        return replay
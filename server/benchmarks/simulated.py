@@ -0,0 +1,27 @@
+import random
+import time
+
+
+class SimulatedFuseki:
+    """
+    Wraps a client, usually a LocalFusekiClient, to answer like a remote Fuseki would: every query method
+    first waits for a simulated round trip of `latency` seconds, give or take `jitter`.
+    """
+
+    def __init__(self, client, latency: float = 0.02, jitter: float = 0.0, seed=None):
+        self._client = client
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def __getattr__(self, method):
+        target = getattr(self._client, method)
+        if not method.endswith("_query"):
+            return target
+
+        def delayed(*args, **kwargs):
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(max(delay, 0))
+            return target(*args, **kwargs)
+
+        return delayed
@@ -1,15 +1,88 @@
-from SPARQLWrapper import SPARQLWrapper, JSON
-import re
+import itertools
+import math
+import time
+
+from .cache import ResultCache
+from .errors import BackendUnavailable, CircuitOpen, FusekiError, QueryTimeout
+from .instruments import observe_call, record_lookup
+from .local import LocalFusekiClient
+from .resilience import (
+    NETWORK_ERRORS,
+    CircuitBreaker,
+    Deadline,
+    RetryPolicy,
+    unavailable,
+)
+from .templates import TEMPLATES
+from .transport import HTTPTransport, PoolTimeout, TransportError
+
+
+class BaseFusekiClient:
+    """
+    The query methods shared by FusekiClient and AsyncFusekiClient. Every method names one of the compiled
+    templates in `fuseki.templates.TEMPLATES` and hands it to `_select` with its parameters, returning
+    whatever `_select` returns: the blocking client answers with the bindings while the asyncio client
+    answers with an awaitable.
+
+    Fuseki failures are raised as BackendUnavailable, or one of its subclasses QueryTimeout and CircuitOpen,
+    so that callers can tell an empty result apart from a backend that did not answer. Queries rejected by
+    Fuseki with a client error still answer an empty result.
+    """
+
+    def __init__(
+        self,
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+        retry: RetryPolicy = None,
+        breaker: CircuitBreaker = None,
+    ):
+        """
+        Args:
+            cache_size: maximum number of query results kept in memory, 0 disables the cache
+            cache_ttl: seconds a cached result stays valid
+            retry: how failed reads are retried, defaults to two retries with jittered backoff
+            breaker: the circuit breaker guarding Fuseki, defaults to opening after five failures
+        """
+        self.cache = ResultCache(maxsize=cache_size, ttl=cache_ttl)
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self._invalidation_callbacks = []
 
+    def on_invalidate(self, callback):
+        """
+        Calls `callback()` whenever every cached result is forgotten, so that state built from query
+        results, such as the indexes of an executor, can be dropped along with them.
+        """
+        self._invalidation_callbacks.append(callback)
 
-class FusekiClient:
-    def __init__(self, connection_string: str):
-        self._sparql = SPARQLWrapper(connection_string)
-        self._sparql.setReturnFormat(JSON)
-        self._predicate_cache = dict()
-        self._query_cache = dict()
+    def invalidate_cache(self, template: str = None, **params):
+        """
+        Forgets the cached result of one template and parameters, or of every query when no template is
+        given. Call this after the dataset has been reloaded.
+        """
+        if template is None:
+            self.cache.invalidate()
+            for callback in self._invalidation_callbacks:
+                callback()
+        else:
+            self.cache.invalidate(TEMPLATES[template].bind(**params).key)
+
+    # streamed results are only cached when they are this small, so streaming stays bounded in memory
+    STREAM_CACHE_ROWS = 1000
+
+    def _select(
+        self, template: str, params: dict, use_cache: bool = True, stream: bool = False
+    ):
+        raise NotImplementedError
 
-    def query(self, subject="?subject", predicate="?predicate", object="?object"):
+    def query(
+        self,
+        subject="?subject",
+        predicate="?predicate",
+        object="?object",
+        use_cache=True,
+        stream=False,
+    ):
         """
         Creates a sparql query using the provided subject, predicate, and object variables. By default,
         these variables will be unknown.
@@ -18,28 +91,63 @@ class FusekiClient:
             subject:
             predicate:
             object:
+            use_cache: set to False to bypass the result cache for this call
+            stream: set to True to get the bindings one at a time as they are decoded
+
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns, or an
+            iterator over them when streaming.
+        """
+        return self._select(
+            "query",
+            dict(subject=subject, predicate=predicate, object=object),
+            use_cache,
+            stream,
+        )
+
+    def subject_predicates_query(self, subject, predicates, use_cache=True):
+        """
+        Narrowed version of query: fetches only the triples of a subject whose predicate is one of the
+        given candidates, sent in a VALUES block.
+
+        Args:
+            subject: a subject uri or prefixed name
+            predicates: a list of predicate uris, with or without angle brackets
+            use_cache: set to False to bypass the result cache for this call
 
         Returns:
             A list of dictionaries containing representing the JSON that the SPARQL query returns.
         """
-        self._sparql.setQuery(
-            f"""
-            PREFIX foundation:<http://imce.jpl.nasa.gov/foundation/>
-            SELECT ?subject ?predicate ?object
-            WHERE {{
-                {subject} {predicate} {object}
-            }}
-            """
+        return self._select(
+            "subject_predicates",
+            dict(subject=subject, predicates=list(predicates)),
+            use_cache,
         )
 
-        result = []
-        try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
-            print(e)
-        return result
+    def labels_query(self, use_cache=True):
+        """
+        Lists the rdfs:label of every class and property in the dataset, with the kind ("class" or
+        "property") of the resource carrying it.
+
+        Args:
+            use_cache: set to False to bypass the result cache for this call
+
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns.
+        """
+        return self._select("labels", dict(), use_cache)
+
+    def predicates_query(self, use_cache=True):
+        """
+        Lists every distinct predicate used in the dataset.
+
+        Args:
+            use_cache: set to False to bypass the result cache for this call
+
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns.
+        """
+        return self._select("predicates", dict(), use_cache)
 
     def assembly_query(
         self,
@@ -48,6 +156,8 @@ class FusekiClient:
         mass="?mass",
         function="?function",
         decorator=None,
+        use_cache=True,
+        stream=False,
     ):
         """
         Creates a sparql query using the provided assembly object, id, mass and function variables. By default,
@@ -58,40 +168,63 @@ class FusekiClient:
             id: id of assembly
             mass: mass of assembly
             function: function of assembly
+            decorator: a FilterDecorator whose `lower`/`upper` bounds restrict the mass
+            use_cache: set to False to bypass the result cache for this call
+            stream: set to True to get the bindings one at a time as they are decoded
 
         Returns:
-            A list of dictionaries containing representing the JSON that the SPARQL query returns.
+            A list of dictionaries containing representing the JSON that the SPARQL query returns, or an
+            iterator over them when streaming.
         """
+        params = dict(assembly=assembly, id=id, mass=mass, function=function)
+        if decorator is None:
+            return self._select("assembly", params, use_cache, stream)
 
-        self._sparql.setQuery(
-            f"""
-            PREFIX fse:			<http://opencaesar.io/examples/firesat/disciplines/fse/fse#>
-            PREFIX base:		<http://imce.jpl.nasa.gov/foundation/base#>
-            PREFIX analysis: 	<http://imce.jpl.nasa.gov/foundation/analysis#>
-            PREFIX vim4: 		<http://bipm.org/jcgm/vim4#>
-            PREFIX mission: 	<http://imce.jpl.nasa.gov/foundation/mission#>
-            
-            SELECT DISTINCT ?assembly ?id ?mass ?function
-            WHERE {{
-                {assembly} a fse:Assembly ;									            # match an assembly
-                        base:hasIdentifier {f"'{id}'" if decorator is None else id} ;	# match its id
-                        analysis:isCharacterizedBy [						            # match its mass
-                            vim4:hasDoubleNumber {mass}
-                        ] ;
-                        mission:performs {function} .						            # match a function it performs
-                {decorator(mass) if decorator is not None else ""}
-            }}
-            """
+        # a decorator bounds the mass, -1 meaning unbounded
+        params["lower"] = -math.inf if decorator.lower == -1 else decorator.lower
+        params["upper"] = math.inf if decorator.upper == -1 else decorator.upper
+        return self._select("assembly_range", params, use_cache, stream)
+
+    def assembly_range_query(self, decorator, limit=None, offset=0, use_cache=True):
+        """
+        Lists the distinct assemblies whose mass lies within the bounds of a decorator, in the order
+        Fuseki finds them, optionally a page at a time.
+
+        Args:
+            decorator: a FilterDecorator whose `lower`/`upper` bounds restrict the mass, -1 meaning unbounded
+            limit: maximum number of assemblies to return, None returns all of them
+            offset: number of assemblies to skip
+            use_cache: set to False to bypass the result cache for this call
+
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns.
+        """
+        return self._select(
+            "assembly_range_distinct",
+            dict(
+                lower=-math.inf if decorator.lower == -1 else decorator.lower,
+                upper=math.inf if decorator.upper == -1 else decorator.upper,
+                page=self._page(limit, offset),
+            ),
+            use_cache,
         )
 
-        result = []
-        try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
-            print(e)
-        return result
+    def assembly_masses_query(self, use_cache=True):
+        """
+        Lists the identifier and mass of every assembly performing a function, the assemblies that
+        `assembly_range_query` filters.
+
+        Args:
+            use_cache: set to False to bypass the result cache for this call
+
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns.
+        """
+        return self._select("assembly_masses", dict(), use_cache)
+
+    @staticmethod
+    def _page(limit, offset):
+        return None if limit is None else (limit, offset)
 
     def domain_range_query(
         self,
@@ -99,6 +232,8 @@ class FusekiClient:
         property="?property",
         property_label="?property_label",
         range="?range",
+        use_cache=True,
+        properties=None,
     ):
         """
         Creates a sparql query using the provided domain, property, property_label, and range variables. By default,
@@ -109,196 +244,337 @@ class FusekiClient:
             property: specified property
             property_label: specified property label
             range: range field of property
+            use_cache: set to False to bypass the result cache for this call
+            properties: property uris already resolved from the label, bound in a VALUES block
 
         Returns:
             A list of dictionaries containing representing the JSON that the SPARQL query returns.
         """
+        return self._select(
+            "domain_range",
+            dict(
+                domain=domain,
+                property=property,
+                property_label=property_label,
+                range=range,
+                properties=properties,
+            ),
+            use_cache,
+        )
+
+    def domain_range_batch_query(
+        self,
+        properties,
+        property_label="?property_label",
+        use_cache=True,
+    ):
+        """
+        Batched version of domain_range_query: looks up the domain and range of several property uris in
+        a single round trip by sending them in a VALUES block.
 
-        self._sparql.setQuery(
-            f"""
-            PREFIX owl:   <http://www.w3.org/2002/07/owl#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT DISTINCT ?domain ?domain_label ?property ?property_label ?range ?range_label
-            WHERE {{
-                {domain} a owl:Class .
-                OPTIONAL {{ {domain} rdfs:label ?domain_label }}
-                
-                {property} rdfs:domain {domain} .
-                {property} rdfs:label "{property_label}" .
-                
-                {property} rdfs:range {range} .
-                OPTIONAL {{ {range} rdfs:label ?range_label }}
-            }}
-
-            ORDER BY ?domain
-            """
+        Args:
+            properties: a list of property uris, with or without angle brackets
+            property_label: specified property label
+            use_cache: set to False to bypass the result cache for this call
+
+        Returns:
+            A dictionary mapping each property uri that has results to its list of JSON bindings.
+        """
+        return self._group_by_property(
+            self._select(
+                "domain_range_batch",
+                dict(properties=list(properties), property_label=property_label),
+                use_cache,
+            )
         )
 
-        result = []
-        try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
-            print(e)
-        return result
+    @staticmethod
+    def _group_by_property(result) -> dict:
+        grouped = {}
+        for r in result:
+            grouped.setdefault(r["property"]["value"], []).append(r)
+        return grouped
 
     def domain_property_query(
         self,
         domain_label="?domain_label",
+        limit=None,
+        offset=0,
+        use_cache=True,
+        domains=None,
     ):
         """
             Creates a sparql query using the provided domain variable.
 
         Args:
             domain_label: domain label field of property
+            limit: maximum number of rows to return, None returns all of them
+            offset: number of rows to skip
+            use_cache: set to False to bypass the result cache for this call
+            domains: domain uris already resolved from the label, bound in a VALUES block
 
         Returns:
             A list of dictionaries containing representing the JSON that the SPARQL query returns.
         """
-
-        self._sparql.setQuery(
-            f"""
-            PREFIX owl:   <http://www.w3.org/2002/07/owl#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT DISTINCT ?domain ?property ?property_label
-            WHERE {{
-                ?domain a owl:Class .
-                ?domain rdfs:label "{domain_label}" .
-
-                ?property rdfs:domain ?domain .
-                ?property rdfs:label ?property_label .
-            }}
-
-            ORDER BY ?domain
-            """
+        return self._select(
+            "domain_property",
+            dict(
+                domain_label=domain_label,
+                domains=domains,
+                page=self._page(limit, offset),
+            ),
+            use_cache,
         )
 
-        result = []
-        try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
-            print(e)
-        return result
-
     def range_property_query(
         self,
         range_label="?range_label",
+        limit=None,
+        offset=0,
+        use_cache=True,
+        ranges=None,
     ):
         """
         Creates a sparql query using the provided range variable.
 
         Args:
             range_label: range label field of property
+            limit: maximum number of rows to return, None returns all of them
+            offset: number of rows to skip
+            use_cache: set to False to bypass the result cache for this call
+            ranges: range uris already resolved from the label, bound in a VALUES block
 
         Returns:
             A list of dictionaries containing representing the JSON that the SPARQL query returns.
         """
-
-        self._sparql.setQuery(
-            f"""
-            PREFIX owl:   <http://www.w3.org/2002/07/owl#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-            SELECT DISTINCT ?range ?property ?property_label
-            WHERE {{
-                ?range a owl:Class .
-                ?range rdfs:label "{range_label}" .
-
-                ?property rdfs:range ?range .
-                ?property rdfs:label ?property_label .
-            }}
-
-            ORDER BY ?range
-            """
+        return self._select(
+            "range_property",
+            dict(
+                range_label=range_label,
+                ranges=ranges,
+                page=self._page(limit, offset),
+            ),
+            use_cache,
         )
 
-        result = []
-        try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
-            print(e)
-        return result
-
     def subclass_query(
         self,
         super="?super",
+        limit=None,
+        offset=0,
+        use_cache=True,
     ):
         """
         Creates a sparql query using the provided subclass variable.
 
         Args:
             super: superclass field uri
+            limit: maximum number of rows to return, None returns all of them
+            offset: number of rows to skip
+            use_cache: set to False to bypass the result cache for this call
 
         Returns:
             A list of dictionaries containing representing the JSON that the SPARQL query returns.
         """
+        return self._select(
+            "subclass", dict(super=super, page=self._page(limit, offset)), use_cache
+        )
 
-        self._sparql.setQuery(
-            f"""
-            PREFIX owl:   <http://www.w3.org/2002/07/owl#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
-
-            SELECT DISTINCT ?sub ?super
-
-            WHERE {{
-                ?sub rdfs:subClassOf <{super}> .
-                FILTER ( ?sub != <{super}> )
-                FILTER ( isIRI(<{super}>) )
-            }}
+    def subclass_edges_query(self, use_cache=True):
+        """
+        Lists every direct rdfs:subClassOf edge between two named classes of the dataset.
 
-            ORDER BY ?sub
-            """
-        )
+        Args:
+            use_cache: set to False to bypass the result cache for this call
 
-        result = []
-        try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
-            print(e)
-        return result
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns.
+        """
+        return self._select("subclass_edges", dict(), use_cache)
 
     def superclass_query(
         self,
         sub="?sub",
+        limit=None,
+        offset=0,
+        use_cache=True,
     ):
         """
         Creates a sparql query using the provided superclass variable.
 
         Args:
             sub: subclass field uri
+            limit: maximum number of rows to return, None returns all of them
+            offset: number of rows to skip
+            use_cache: set to False to bypass the result cache for this call
 
         Returns:
             A list of dictionaries containing representing the JSON that the SPARQL query returns.
         """
+        return self._select(
+            "superclass", dict(sub=sub, page=self._page(limit, offset)), use_cache
+        )
 
-        self._sparql.setQuery(
-            f"""
-            PREFIX owl:   <http://www.w3.org/2002/07/owl#>
-            PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
 
-            SELECT DISTINCT ?sub ?super
+class FusekiClient(BaseFusekiClient):
+    def __init__(
+        self,
+        connection_string: str,
+        pool_size: int = 4,
+        timeout: float = 30.0,
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+        retry: RetryPolicy = None,
+        breaker: CircuitBreaker = None,
+    ):
+        """
+        Args:
+            connection_string: URL of the dataset's SPARQL query endpoint
+            pool_size: maximum number of concurrent keep-alive connections to Fuseki
+            timeout: deadline in seconds for each call, retries included
+            cache_size: maximum number of query results kept in memory, 0 disables the cache
+            cache_ttl: seconds a cached result stays valid
+            retry: how failed reads are retried, defaults to two retries with jittered backoff
+            breaker: the circuit breaker guarding Fuseki, defaults to opening after five failures
+        """
+        super().__init__(
+            cache_size=cache_size, cache_ttl=cache_ttl, retry=retry, breaker=breaker
+        )
+        self.timeout = timeout
+        self._transport = HTTPTransport(
+            connection_string, pool_size=pool_size, timeout=timeout
+        )
 
-            WHERE {{
-                <{sub}> rdfs:subClassOf ?super .
-                FILTER ( <{sub}> != ?super)
-                FILTER ( isIRI(?super) )
-            }}
+    def _select(
+        self, template: str, params: dict, use_cache: bool = True, stream: bool = False
+    ):
+        """
+        Binds a compiled template and runs it over the pooled transport. Nothing but the pool is shared
+        between calls, so the client can be used freely from several threads. Successful results are
+        cached under the template name and its rendered parameters.
 
-            ORDER BY ?super
-            """
-        )
+        Args:
+            template: name of a template registered in `fuseki.templates`
+            params: values for the template's parameters
+            use_cache: set to False to always ask Fuseki
+            stream: set to True to decode the response incrementally
 
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns. When
+            streaming, a generator yielding them one at a time instead.
+        """
         result = []
         try:
-            ret = self._sparql.queryAndConvert()
-            for r in ret["results"]["bindings"]:
-                result.append(r)
-        except Exception as e:
+            query = TEMPLATES[template].bind(**params)
+        except ValueError as e:
+            print(e)
+            return iter(result) if stream else result
+
+        if use_cache:
+            cached = self.cache.get(query.key)
+            record_lookup(query.template.name, cached is not None)
+            if cached is not None:
+                return iter(cached) if stream else list(cached)
+
+        if stream:
+            return self._stream(query, use_cache)
+
+        try:
+            with observe_call(query.template.name):
+                ret = self._call(
+                    lambda timeout: self._transport.select(
+                        query.sparql, timeout=timeout
+                    )
+                )
+        except TransportError as e:
             print(e)
+            return result
+        for r in ret["results"]["bindings"]:
+            result.append(r)
+
+        if use_cache:
+            self.cache.put(query.key, tuple(result))
         return result
+
+    def _call(self, operation):
+        """
+        Runs `operation(timeout)` against Fuseki under the circuit breaker, retrying network failures and
+        server errors until the client's deadline. `timeout` is the time left before the deadline, to be
+        used as the HTTP timeout of the attempt.
+
+        Raises:
+            BackendUnavailable: Fuseki did not answer, QueryTimeout when the deadline passed, also while
+                waiting for a pooled connection, and CircuitOpen when the breaker rejected the call
+            TransportError: Fuseki rejected the query with a client error, which is not retried
+        """
+        deadline = Deadline(self.timeout)
+        delays = self.retry.delays()
+        while True:
+            self.breaker.allow()
+            try:
+                result = operation(deadline.remaining())
+            except TransportError as e:
+                if e.status < 500:
+                    # Fuseki is up and answered, the query itself is wrong
+                    self.breaker.record_success()
+                    raise
+                cause = e
+            except PoolTimeout as e:
+                # every connection stayed busy until the deadline, Fuseki was not asked
+                self.breaker.abandon()
+                raise unavailable(e) from e
+            except NETWORK_ERRORS as e:
+                cause = e
+            except BaseException:
+                self.breaker.abandon()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            self.breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None or delay >= deadline.left():
+                raise unavailable(cause) from cause
+            time.sleep(delay)
+
+    def _start(self, sparql: str, timeout: float):
+        # sends the query and reads up to the first binding, so that failures to answer are retried by
+        # `_call`; bindings are never None
+        rows = self._transport.stream(sparql, timeout=timeout)
+        return next(rows, None), rows
+
+    def _stream(self, query, use_cache: bool):
+        # keep a copy for the cache only while the result is small; a consumer that stops early leaves
+        # the result incomplete, so it is never cached
+        rows = [] if use_cache else None
+        try:
+            with observe_call(query.template.name):
+                first, rest = self._call(
+                    lambda timeout: self._start(query.sparql, timeout)
+                )
+        except TransportError as e:
+            print(e)
+            return
+        if first is None:
+            if rows is not None:
+                self.cache.put(query.key, ())
+            return
+        try:
+            for r in itertools.chain((first,), rest):
+                if rows is not None:
+                    rows.append(r)
+                    if len(rows) > self.STREAM_CACHE_ROWS:
+                        rows = None
+                yield r
+        except NETWORK_ERRORS as e:
+            # bindings were already handed out, so the call cannot be retried
+            self.breaker.record_failure()
+            raise unavailable(e) from e
+        if rows is not None:
+            self.cache.put(query.key, tuple(rows))
+
+    def close(self):
+        """
+        Closes all idle connections held by the client.
+        """
+        self._transport.close()
@@ -0,0 +1,362 @@
+import asyncio
+
+import aiohttp
+
+from . import BaseFusekiClient
+from .instruments import observe_call, record_lookup
+from .resilience import (
+    NETWORK_ERRORS,
+    CircuitBreaker,
+    Deadline,
+    RetryPolicy,
+    unavailable,
+)
+from .streaming import BindingStream
+from .templates import TEMPLATES
+from .transport import SPARQL_RESULTS_JSON, TransportError
+
+# asyncio.TimeoutError is not the builtin TimeoutError before Python 3.11
+_NETWORK_ERRORS = NETWORK_ERRORS + (aiohttp.ClientError, asyncio.TimeoutError)
+
+
+class AsyncFusekiClient(BaseFusekiClient):
+    """
+    asyncio counterpart of FusekiClient. Every query template is a coroutine, so a single event loop can
+    keep many SPARQL requests in flight over one pooled aiohttp session.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        pool_size: int = 100,
+        timeout: float = 30.0,
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+        retry: RetryPolicy = None,
+        breaker: CircuitBreaker = None,
+    ):
+        """
+        Args:
+            connection_string: URL of the dataset's SPARQL query endpoint
+            pool_size: maximum number of concurrent keep-alive connections to Fuseki
+            timeout: deadline in seconds for each call, retries included
+            cache_size: maximum number of query results kept in memory, 0 disables the cache
+            cache_ttl: seconds a cached result stays valid
+            retry: how failed reads are retried, defaults to two retries with jittered backoff
+            breaker: the circuit breaker guarding Fuseki, defaults to opening after five failures
+        """
+        super().__init__(
+            cache_size=cache_size, cache_ttl=cache_ttl, retry=retry, breaker=breaker
+        )
+        self._endpoint = connection_string
+        self._pool_size = pool_size
+        self.timeout = timeout
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # sessions bind to the running loop, so create it lazily from inside a coroutine
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self._pool_size),
+                timeout=self._timeout,
+                headers={"Accept": SPARQL_RESULTS_JSON, "Accept-Encoding": "gzip"},
+            )
+        return self._session
+
+    async def _select(
+        self, template: str, params: dict, use_cache: bool = True, stream: bool = False
+    ):
+        """
+        Binds a compiled template and runs it without blocking the event loop. Successful results are
+        cached under the template name and its rendered parameters.
+
+        Args:
+            template: name of a template registered in `fuseki.templates`
+            params: values for the template's parameters
+            use_cache: set to False to always ask Fuseki
+            stream: set to True to decode the response incrementally
+
+        Returns:
+            A list of dictionaries containing representing the JSON that the SPARQL query returns. When
+            streaming, an async generator yielding them one at a time instead.
+        """
+        result = []
+        try:
+            query = TEMPLATES[template].bind(**params)
+        except ValueError as e:
+            print(e)
+            return _aiter(result) if stream else result
+
+        if use_cache:
+            cached = self.cache.get(query.key)
+            record_lookup(query.template.name, cached is not None)
+            if cached is not None:
+                return _aiter(cached) if stream else list(cached)
+
+        if stream:
+            return self._stream(query, use_cache)
+
+        try:
+            with observe_call(query.template.name):
+                ret = await self._call(
+                    lambda timeout: self._post_json(query.sparql, timeout)
+                )
+        except TransportError as e:
+            print(e)
+            return result
+        for r in ret["results"]["bindings"]:
+            result.append(r)
+
+        if use_cache:
+            self.cache.put(query.key, tuple(result))
+        return result
+
+    async def _call(self, operation):
+        """
+        Coroutine version of FusekiClient._call: awaits `operation(timeout)` under the circuit breaker,
+        retrying network failures and server errors until the client's deadline.
+        """
+        deadline = Deadline(self.timeout)
+        delays = self.retry.delays()
+        while True:
+            self.breaker.allow()
+            try:
+                result = await operation(deadline.remaining())
+            except TransportError as e:
+                if e.status < 500:
+                    # Fuseki is up and answered, the query itself is wrong
+                    self.breaker.record_success()
+                    raise
+                cause = e
+            except _NETWORK_ERRORS as e:
+                cause = e
+            except BaseException:
+                # including cancellation, which must not leave a trial call pending
+                self.breaker.abandon()
+                raise
+            else:
+                self.breaker.record_success()
+                return result
+            self.breaker.record_failure()
+            delay = next(delays, None)
+            if delay is None or delay >= deadline.left():
+                raise unavailable(_timeout_error(cause)) from cause
+            await asyncio.sleep(delay)
+
+    async def _post(self, sparql: str, timeout: float):
+        # the caller owns the returned response and must release it
+        response = await self._get_session().post(
+            self._endpoint,
+            data={"query": sparql},
+            timeout=aiohttp.ClientTimeout(total=timeout),
+        )
+        if not 200 <= response.status < 300:
+            body = await response.read()
+            response.release()
+            raise TransportError(response.status, response.reason, body)
+        return response
+
+    async def _post_json(self, sparql: str, timeout: float):
+        async with await self._post(sparql, timeout) as response:
+            return await response.json(content_type=None)
+
+    async def _stream(self, query, use_cache: bool, chunk_size: int = 16384):
+        # same caching rule as FusekiClient._stream: only small, fully consumed results are kept
+        rows = [] if use_cache else None
+        try:
+            with observe_call(query.template.name):
+                response = await self._call(
+                    lambda timeout: self._post(query.sparql, timeout)
+                )
+        except TransportError as e:
+            print(e)
+            return
+        try:
+            async with response:
+                # aiohttp already inflates gzip bodies
+                decoder = BindingStream()
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    for r in decoder.feed(chunk):
+                        if rows is not None:
+                            rows.append(r)
+                            if len(rows) > self.STREAM_CACHE_ROWS:
+                                rows = None
+                        yield r
+                    if decoder.done:
+                        break
+        except _NETWORK_ERRORS as e:
+            # bindings may already have been handed out, so the call cannot be retried
+            self.breaker.record_failure()
+            raise unavailable(_timeout_error(e)) from e
+        if rows is not None:
+            self.cache.put(query.key, tuple(rows))
+
+    async def close(self):
+        """
+        Closes the underlying session and all of its connections.
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def query(
+        self,
+        subject="?subject",
+        predicate="?predicate",
+        object="?object",
+        use_cache=True,
+        stream=False,
+    ):
+        """
+        Coroutine version of FusekiClient.query.
+        """
+        return await super().query(subject, predicate, object, use_cache, stream)
+
+    async def subject_predicates_query(self, subject, predicates, use_cache=True):
+        """
+        Coroutine version of FusekiClient.subject_predicates_query.
+        """
+        return await super().subject_predicates_query(subject, predicates, use_cache)
+
+    async def labels_query(self, use_cache=True):
+        """
+        Coroutine version of FusekiClient.labels_query.
+        """
+        return await super().labels_query(use_cache)
+
+    async def predicates_query(self, use_cache=True):
+        """
+        Coroutine version of FusekiClient.predicates_query.
+        """
+        return await super().predicates_query(use_cache)
+
+    async def assembly_query(
+        self,
+        assembly="?assembly",
+        id="?id",
+        mass="?mass",
+        function="?function",
+        decorator=None,
+        use_cache=True,
+        stream=False,
+    ):
+        """
+        Coroutine version of FusekiClient.assembly_query.
+        """
+        return await super().assembly_query(
+            assembly, id, mass, function, decorator, use_cache, stream
+        )
+
+    async def domain_range_query(
+        self,
+        domain="?domain",
+        property="?property",
+        property_label="?property_label",
+        range="?range",
+        use_cache=True,
+        properties=None,
+    ):
+        """
+        Coroutine version of FusekiClient.domain_range_query.
+        """
+        return await super().domain_range_query(
+            domain, property, property_label, range, use_cache, properties
+        )
+
+    async def domain_range_batch_query(
+        self, properties, property_label="?property_label", use_cache=True
+    ):
+        """
+        Coroutine version of FusekiClient.domain_range_batch_query.
+        """
+        result = await self._select(
+            "domain_range_batch",
+            dict(properties=list(properties), property_label=property_label),
+            use_cache,
+        )
+        return self._group_by_property(result)
+
+    async def assembly_range_query(
+        self, decorator, limit=None, offset=0, use_cache=True
+    ):
+        """
+        Coroutine version of FusekiClient.assembly_range_query.
+        """
+        return await super().assembly_range_query(decorator, limit, offset, use_cache)
+
+    async def assembly_masses_query(self, use_cache=True):
+        """
+        Coroutine version of FusekiClient.assembly_masses_query.
+        """
+        return await super().assembly_masses_query(use_cache)
+
+    async def domain_property_query(
+        self,
+        domain_label="?domain_label",
+        limit=None,
+        offset=0,
+        use_cache=True,
+        domains=None,
+    ):
+        """
+        Coroutine version of FusekiClient.domain_property_query.
+        """
+        return await super().domain_property_query(
+            domain_label, limit, offset, use_cache, domains
+        )
+
+    async def range_property_query(
+        self,
+        range_label="?range_label",
+        limit=None,
+        offset=0,
+        use_cache=True,
+        ranges=None,
+    ):
+        """
+        Coroutine version of FusekiClient.range_property_query.
+        """
+        return await super().range_property_query(
+            range_label, limit, offset, use_cache, ranges
+        )
+
+    async def subclass_query(
+        self, super="?super", limit=None, offset=0, use_cache=True
+    ):
+        """
+        Coroutine version of FusekiClient.subclass_query.
+        """
+        return await BaseFusekiClient.subclass_query(
+            self, super, limit, offset, use_cache
+        )
+
+    async def subclass_edges_query(self, use_cache=True):
+        """
+        Coroutine version of FusekiClient.subclass_edges_query.
+        """
+        return await super().subclass_edges_query(use_cache)
+
+    async def superclass_query(self, sub="?sub", limit=None, offset=0, use_cache=True):
+        """
+        Coroutine version of FusekiClient.superclass_query.
+        """
+        return await super().superclass_query(sub, limit, offset, use_cache)
+
+
+def _timeout_error(error):
+    # report asyncio timeouts as the builtin TimeoutError `unavailable` recognizes
+    if isinstance(error, asyncio.TimeoutError) and not isinstance(error, TimeoutError):
+        return TimeoutError(str(error))
+    return error
+
+
+async def _aiter(rows):
+    for r in rows:
+        yield r
@@ -0,0 +1,89 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# quoted literals and IRIs are kept verbatim, any other run of whitespace and comments collapses to one space
+_SPARQL_TOKEN = re.compile(
+    r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\'|<[^<>\s]*>)|(?:\s|#[^\n]*)+'
+)
+
+
+def normalize_query(sparql: str) -> str:
+    """
+    Canonical, single-line form of a query text: indentation, line breaks and comments are dropped
+    while literals and IRIs are left untouched.
+    """
+    return _SPARQL_TOKEN.sub(lambda m: m.group(1) or " ", sparql).strip()
+
+
+class ResultCache:
+    """
+    A bounded, thread-safe LRU cache whose entries also expire `ttl` seconds after being stored.
+    A maxsize of 0 disables caching entirely.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """
+        Returns:
+            The cached value, or None when the key is absent or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires, value = entry
+            if expires <= self._clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key=None):
+        """
+        Drops a single entry, or every entry when no key is given (ie. after the dataset is reloaded).
+        """
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,14 @@
+class FusekiError(Exception):
+    """Base class of the errors raised by the Fuseki clients."""
+
+
+class BackendUnavailable(FusekiError):
+    """Fuseki could not be reached, answered with a server error, or did not answer in time."""
+
+
+class QueryTimeout(BackendUnavailable):
+    """The deadline of a call passed before Fuseki answered."""
+
+
+class CircuitOpen(BackendUnavailable):
+    """Fuseki failed repeatedly, so calls are rejected without being sent until it recovers."""
@@ -0,0 +1,61 @@
+from contextlib import contextmanager
+
+from metrics import REGISTRY, Counter, Gauge, Histogram
+
+from .errors import FusekiError
+
+REQUESTS = Counter(
+    "fuseki_requests_total", "Calls made to Fuseki, by template.", ["template"]
+)
+ERRORS = Counter(
+    "fuseki_errors_total",
+    "Calls to Fuseki that failed, by template and error type.",
+    ["template", "error"],
+)
+LATENCY = Histogram(
+    "fuseki_request_seconds",
+    "Duration of calls to Fuseki, retries included, by template.",
+    ["template"],
+)
+IN_FLIGHT = Gauge("fuseki_requests_in_flight", "Calls to Fuseki in progress.")
+CACHE_LOOKUPS = Counter(
+    "fuseki_cache_lookups_total",
+    "Result cache lookups, by template and result (hit or miss).",
+    ["template", "result"],
+)
+
+
+@contextmanager
+def observe_call(template: str):
+    """
+    Counts and times one call to Fuseki, along with the typed error it ends with, if any.
+    """
+    REQUESTS.labels(template).inc()
+    with IN_FLIGHT.track_inprogress(), LATENCY.labels(template).time():
+        try:
+            yield
+        except FusekiError as e:
+            ERRORS.labels(template, type(e).__name__).inc()
+            raise
+
+
+def record_lookup(template: str, hit: bool):
+    CACHE_LOOKUPS.labels(template, "hit" if hit else "miss").inc()
+
+
+def _hit_ratios():
+    lookups = {}
+    for labels, child in CACHE_LOOKUPS.children():
+        lookups.setdefault(labels["template"], {})[labels["result"]] = child.get()
+    for template, counts in sorted(lookups.items()):
+        total = counts.get("hit", 0) + counts.get("miss", 0)
+        if total:
+            yield {"template": template}, counts.get("hit", 0) / total
+
+
+REGISTRY.register_collector(
+    "fuseki_cache_hit_ratio",
+    "Share of result cache lookups that hit, by template.",
+    "gauge",
+    _hit_ratios,
+)
@@ -0,0 +1,630 @@
+import re
+import threading
+from collections import defaultdict
+
+from .resilience import NETWORK_ERRORS, unavailable
+from .transport import HTTPTransport, TransportError
+
+RDF_TYPE = ("uri", "http://www.w3.org/1999/02/22-rdf-syntax-ns#type")
+RDFS = "http://www.w3.org/2000/01/rdf-schema#"
+OWL_CLASS = ("uri", "http://www.w3.org/2002/07/owl#Class")
+XSD_STRING = "http://www.w3.org/2001/XMLSchema#string"
+
+PREFIXES = {
+    "foundation": "http://imce.jpl.nasa.gov/foundation/",
+    "fse": "http://opencaesar.io/examples/firesat/disciplines/fse/fse#",
+    "base": "http://imce.jpl.nasa.gov/foundation/base#",
+    "analysis": "http://imce.jpl.nasa.gov/foundation/analysis#",
+    "vim4": "http://bipm.org/jcgm/vim4#",
+    "mission": "http://imce.jpl.nasa.gov/foundation/mission#",
+    "owl": "http://www.w3.org/2002/07/owl#",
+    "rdfs": RDFS,
+}
+
+
+def uri(value: str) -> tuple:
+    return ("uri", value)
+
+
+def literal(value: str, datatype: str = None, lang: str = None) -> tuple:
+    # plain and xsd:string literals are the same term in SPARQL 1.1
+    return ("literal", value, None if datatype == XSD_STRING else datatype, lang)
+
+
+def term_from_binding(binding: dict) -> tuple:
+    """
+    Converts one value of an application/sparql-results+json binding into an index term.
+    """
+    kind = binding["type"]
+    if kind == "uri":
+        return uri(binding["value"])
+    if kind == "bnode":
+        return ("bnode", binding["value"])
+    return literal(binding["value"], binding.get("datatype"), binding.get("xml:lang"))
+
+
+def term_to_binding(term: tuple) -> dict:
+    """
+    Converts an index term into the JSON shape Fuseki returns, so results are interchangeable.
+    """
+    if term[0] != "literal":
+        return {"type": term[0], "value": term[1]}
+    binding = {"type": "literal", "value": term[1]}
+    if term[2] is not None:
+        binding["datatype"] = term[2]
+    if term[3] is not None:
+        binding["xml:lang"] = term[3]
+    return binding
+
+
+_NT_ESCAPES = {"t": "\t", "b": "\b", "n": "\n", "r": "\r", "f": "\f", '"': '"'}
+_NT_ESCAPES.update({"'": "'", "\\": "\\"})
+_NT_ESCAPE = re.compile(r"\\(?:u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))")
+_NT_TERM = r'<[^>]*>|_:\S+|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9\-]+|\^\^<[^>]*>)?'
+_NT_LINE = re.compile(rf"\s*({_NT_TERM})\s+({_NT_TERM})\s+({_NT_TERM})\s*\.\s*$")
+
+
+def _nt_unescape(text: str) -> str:
+    def replace(match):
+        code = match.group(1) or match.group(2)
+        return chr(int(code, 16)) if code else _NT_ESCAPES[match.group(3)]
+
+    return _NT_ESCAPE.sub(replace, text)
+
+
+def _nt_term(text: str) -> tuple:
+    if text[0] == "<":
+        return uri(text[1:-1])
+    if text[0] == "_":
+        return ("bnode", text[2:])
+    end = text.rindex('"')
+    suffix = text[end + 1 :]
+    return literal(
+        _nt_unescape(text[1:end]),
+        datatype=suffix[3:-1] if suffix.startswith("^^") else None,
+        lang=suffix[1:] if suffix.startswith("@") else None,
+    )
+
+
+def parse_ntriples(lines):
+    """
+    Parses N-Triples lines into (subject, predicate, object) index terms, skipping blanks and comments.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        match = _NT_LINE.match(line)
+        if match is None:
+            raise ValueError(f"Malformed N-Triples statement on line {number}: {line}")
+        yield tuple(_nt_term(group) for group in match.groups())
+
+
+class TripleIndex:
+    """
+    An in-memory graph stored three times, as subject->predicate->objects (SPO), predicate->object->
+    subjects (POS) and object->subject->predicates (OSP), so every triple pattern is answered by at most
+    two dictionary lookups whatever combination of its positions is bound.
+    """
+
+    def __init__(self):
+        self._spo = defaultdict(lambda: defaultdict(set))
+        self._pos = defaultdict(lambda: defaultdict(set))
+        self._osp = defaultdict(lambda: defaultdict(set))
+        self.size = 0
+
+    def add(self, s: tuple, p: tuple, o: tuple):
+        objects = self._spo[s][p]
+        if o in objects:
+            return
+        objects.add(o)
+        self._pos[p][o].add(s)
+        self._osp[o][s].add(p)
+        self.size += 1
+
+    def predicates(self):
+        """
+        Returns every distinct predicate term.
+        """
+        return list(self._pos)
+
+    def triples(self, s=None, p=None, o=None):
+        """
+        Yields every stored triple matching the pattern, None being a wildcard.
+        """
+        if s is not None:
+            predicates = self._spo.get(s, {})
+            if p is not None:
+                objects = predicates.get(p, ())
+                if o is not None:
+                    if o in objects:
+                        yield (s, p, o)
+                    return
+                for obj in objects:
+                    yield (s, p, obj)
+            elif o is not None:
+                for pred in self._osp.get(o, {}).get(s, ()):
+                    yield (s, pred, o)
+            else:
+                for pred, objects in predicates.items():
+                    for obj in objects:
+                        yield (s, pred, obj)
+        elif p is not None:
+            objects = self._pos.get(p, {})
+            if o is not None:
+                for subj in objects.get(o, ()):
+                    yield (subj, p, o)
+            else:
+                for obj, subjects in objects.items():
+                    for subj in subjects:
+                        yield (subj, p, obj)
+        elif o is not None:
+            for subj, predicates in self._osp.get(o, {}).items():
+                for pred in predicates:
+                    yield (subj, pred, o)
+        else:
+            for subj, predicates in self._spo.items():
+                for pred, objects in predicates.items():
+                    for obj in objects:
+                        yield (subj, pred, obj)
+
+    def solve(self, patterns, binding=None):
+        """
+        Evaluates a basic graph pattern. Pattern positions are either index terms or variable names
+        (strings starting with "?"); patterns are joined in the given order, so put the most selective first.
+
+        Yields:
+            A dictionary from variable name (without "?") to term for every solution.
+        """
+        binding = binding or {}
+        if not patterns:
+            yield binding
+            return
+        pattern, rest = patterns[0], patterns[1:]
+        lookup = [binding.get(t[1:]) if isinstance(t, str) else t for t in pattern]
+        for triple in self.triples(*lookup):
+            extended = dict(binding)
+            for position, value in zip(pattern, triple):
+                if isinstance(position, str):
+                    name = position[1:]
+                    if extended.setdefault(name, value) != value:
+                        break
+            else:
+                yield from self.solve(rest, extended)
+
+
+_ORDER_RANK = {"bnode": 1, "uri": 2, "literal": 3}
+
+
+def _order_key(term):
+    # SPARQL ORDER BY: unbound < blank nodes < IRIs < literals
+    return (0, "") if term is None else (_ORDER_RANK[term[0]], term[1])
+
+
+class LocalFusekiClient:
+    """
+    Drop-in replacement for FusekiClient that answers the built-in query templates from an in-memory
+    TripleIndex instead of sending SPARQL. The graph is loaded once, lazily, from either a Fuseki endpoint
+    or an N-Triples file, and results come back in the same shape as Fuseki's JSON bindings.
+    """
+
+    def __init__(self, connection_string: str = None, ntriples_path: str = None):
+        """
+        Args:
+            connection_string: URL of a SPARQL endpoint to copy the dataset from
+            ntriples_path: path of an N-Triples dump to load instead
+        """
+        if connection_string is None and ntriples_path is None:
+            raise ValueError("Either connection_string or ntriples_path is required")
+        self._connection_string = connection_string
+        self._ntriples_path = ntriples_path
+        self._index = None
+        self._lock = threading.Lock()
+        self._invalidation_callbacks = []
+
+    @property
+    def index(self) -> TripleIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+        return self._index
+
+    def _load(self) -> TripleIndex:
+        index = TripleIndex()
+        if self._ntriples_path is not None:
+            with open(self._ntriples_path, encoding="utf-8") as lines:
+                for triple in parse_ntriples(lines):
+                    index.add(*triple)
+        else:
+            transport = HTTPTransport(self._connection_string, pool_size=1)
+            try:
+                ret = transport.select("SELECT ?s ?p ?o WHERE { ?s ?p ?o }")
+            except NETWORK_ERRORS + (TransportError,) as e:
+                # reported like the failures of FusekiClient, so that callers handle both alike
+                raise unavailable(e) from e
+            finally:
+                transport.close()
+            for row in ret["results"]["bindings"]:
+                index.add(*(term_from_binding(row[v]) for v in ("s", "p", "o")))
+        return index
+
+    def reload(self):
+        """
+        Rebuilds the index from its source, ie. after the dataset was reloaded into Fuseki.
+        """
+        index = self._load()
+        with self._lock:
+            self._index = index
+        for callback in self._invalidation_callbacks:
+            callback()
+
+    def on_invalidate(self, callback):
+        """
+        Calls `callback()` after every reload, like FusekiClient.on_invalidate.
+        """
+        self._invalidation_callbacks.append(callback)
+
+    def invalidate_cache(self, template: str = None, **params):
+        self.reload()
+
+    def close(self):
+        pass
+
+    def _term(self, text: str):
+        """
+        Interprets a template argument the way the SPARQL templates would: "?name" is a variable,
+        "<...>" an IRI and "prefix:name" a prefixed name.
+        """
+        if text.startswith("?"):
+            return text
+        if text.startswith("<") and text.endswith(">"):
+            return uri(text[1:-1])
+        prefix, sep, local = text.partition(":")
+        if sep and prefix in PREFIXES:
+            return uri(PREFIXES[prefix] + local)
+        return uri(text)
+
+    def _rows(
+        self, solutions, variables, order_by=None, distinct=False, limit=None, offset=0
+    ):
+        rows = [
+            {v: solution[v] for v in variables if v in solution}
+            for solution in solutions
+        ]
+        if distinct:
+            rows = list({tuple(sorted(row.items())): row for row in rows}.values())
+        if order_by is not None:
+            rows.sort(key=lambda row: [_order_key(row.get(v)) for v in order_by])
+        if limit is not None:
+            rows = rows[offset : offset + limit]
+        return [{v: term_to_binding(t) for v, t in row.items()} for row in rows]
+
+    def _stream_rows(self, solutions, variables, distinct=False):
+        # unordered rows can be produced lazily, deduplicating as they go
+        seen = set()
+        for solution in solutions:
+            row = {v: solution[v] for v in variables if v in solution}
+            if distinct:
+                key = tuple(sorted(row.items()))
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield {v: term_to_binding(t) for v, t in row.items()}
+
+    def _values(self, patterns, variable, values):
+        # a VALUES block: solve the patterns once per value bound to the variable
+        if values is None:
+            return self.index.solve(patterns)
+        return (
+            solution
+            for value in dict.fromkeys(map(self._term, values))
+            for solution in self.index.solve(patterns, {variable: value})
+        )
+
+    def _optional(self, solutions, pattern):
+        for solution in solutions:
+            extended = list(self.index.solve([pattern], solution))
+            yield from extended or [solution]
+
+    def query(
+        self,
+        subject="?subject",
+        predicate="?predicate",
+        object="?object",
+        use_cache=True,
+        stream=False,
+    ):
+        """
+        In-memory version of FusekiClient.query.
+        """
+        pattern = (self._term(subject), self._term(predicate), self._term(object))
+        rows = self._rows if not stream else self._stream_rows
+        return rows(self.index.solve([pattern]), ("subject", "predicate", "object"))
+
+    def subject_predicates_query(self, subject, predicates, use_cache=True):
+        """
+        In-memory version of FusekiClient.subject_predicates_query.
+        """
+        subject = self._term(subject)
+        solutions = (
+            dict(solution, predicate=predicate)
+            for predicate in dict.fromkeys(map(self._term, predicates))
+            for solution in self.index.solve([(subject, predicate, "?object")])
+        )
+        return self._rows(solutions, ("subject", "predicate", "object"))
+
+    def labels_query(self, use_cache=True):
+        """
+        In-memory version of FusekiClient.labels_query.
+        """
+        label = uri(RDFS + "label")
+        kinds = (
+            ("class", [("?subject", RDF_TYPE, OWL_CLASS)]),
+            ("property", [("?subject", uri(RDFS + "domain"), "?_domain")]),
+        )
+        solutions = (
+            dict(solution, kind=literal(kind))
+            for kind, patterns in kinds
+            for solution in self.index.solve(patterns + [("?subject", label, "?label")])
+        )
+        return self._rows(solutions, ("subject", "label", "kind"), distinct=True)
+
+    def predicates_query(self, use_cache=True):
+        """
+        In-memory version of FusekiClient.predicates_query.
+        """
+        solutions = ({"predicate": p} for p in self.index.predicates())
+        return self._rows(solutions, ("predicate",), order_by=("predicate",))
+
+    def assembly_query(
+        self,
+        assembly="?assembly",
+        id="?id",
+        mass="?mass",
+        function="?function",
+        decorator=None,
+        use_cache=True,
+        stream=False,
+    ):
+        """
+        In-memory version of FusekiClient.assembly_query. A decorator is read for its `lower` and
+        `upper` mass bounds, -1 meaning unbounded.
+        """
+        assembly, mass, function = map(self._term, (assembly, mass, function))
+        id = literal(id) if decorator is None else self._term(id)
+        patterns = [
+            (assembly, RDF_TYPE, uri(PREFIXES["fse"] + "Assembly")),
+            (assembly, uri(PREFIXES["base"] + "hasIdentifier"), id),
+            (assembly, uri(PREFIXES["analysis"] + "isCharacterizedBy"), "?_quantity"),
+            ("?_quantity", uri(PREFIXES["vim4"] + "hasDoubleNumber"), mass),
+            (assembly, uri(PREFIXES["mission"] + "performs"), function),
+        ]
+        if isinstance(id, tuple):
+            # the identifier is the most selective pattern when it is bound
+            patterns.insert(0, patterns.pop(1))
+        solutions = self.index.solve(patterns)
+        if decorator is not None and isinstance(mass, str):
+            solutions = (s for s in solutions if self._in_range(s[mass[1:]], decorator))
+        rows = self._rows if not stream else self._stream_rows
+        return rows(solutions, ("assembly", "id", "mass", "function"), distinct=True)
+
+    def assembly_range_query(self, decorator, limit=None, offset=0, use_cache=True):
+        """
+        In-memory version of FusekiClient.assembly_range_query.
+        """
+        solutions = self.index.solve(
+            [
+                ("?assembly", RDF_TYPE, uri(PREFIXES["fse"] + "Assembly")),
+                ("?assembly", uri(PREFIXES["base"] + "hasIdentifier"), "?id"),
+                ("?assembly", uri(PREFIXES["analysis"] + "isCharacterizedBy"), "?_q"),
+                ("?_q", uri(PREFIXES["vim4"] + "hasDoubleNumber"), "?mass"),
+                ("?assembly", uri(PREFIXES["mission"] + "performs"), "?function"),
+            ]
+        )
+        solutions = (s for s in solutions if self._in_range(s["mass"], decorator))
+        return self._rows(
+            solutions,
+            ("assembly",),
+            order_by=("assembly",),
+            distinct=True,
+            limit=limit,
+            offset=offset,
+        )
+
+    def assembly_masses_query(self, use_cache=True):
+        """
+        In-memory version of FusekiClient.assembly_masses_query.
+        """
+        solutions = self.index.solve(
+            [
+                ("?assembly", RDF_TYPE, uri(PREFIXES["fse"] + "Assembly")),
+                ("?assembly", uri(PREFIXES["base"] + "hasIdentifier"), "?id"),
+                ("?assembly", uri(PREFIXES["analysis"] + "isCharacterizedBy"), "?_q"),
+                ("?_q", uri(PREFIXES["vim4"] + "hasDoubleNumber"), "?mass"),
+                ("?assembly", uri(PREFIXES["mission"] + "performs"), "?function"),
+            ]
+        )
+        return self._rows(solutions, ("assembly", "id", "mass"), distinct=True)
+
+    def _in_range(self, term, decorator):
+        try:
+            value = float(term[1])
+        except (TypeError, ValueError):
+            return False
+        if decorator.lower != -1 and not value > decorator.lower:
+            return False
+        if decorator.upper != -1 and not value < decorator.upper:
+            return False
+        return True
+
+    def domain_range_query(
+        self,
+        domain="?domain",
+        property="?property",
+        property_label="?property_label",
+        range="?range",
+        use_cache=True,
+        properties=None,
+    ):
+        """
+        In-memory version of FusekiClient.domain_range_query.
+        """
+        domain, property, range = map(self._term, (domain, property, range))
+        solutions = self._values(
+            [
+                (property, uri(RDFS + "label"), literal(property_label)),
+                (property, uri(RDFS + "domain"), domain),
+                (domain, RDF_TYPE, OWL_CLASS),
+                (property, uri(RDFS + "range"), range),
+            ],
+            "property",
+            properties,
+        )
+        solutions = self._optional(
+            solutions, (domain, uri(RDFS + "label"), "?domain_label")
+        )
+        solutions = self._optional(
+            solutions, (range, uri(RDFS + "label"), "?range_label")
+        )
+        return self._rows(
+            solutions,
+            (
+                "domain",
+                "domain_label",
+                "property",
+                "property_label",
+                "range",
+                "range_label",
+            ),
+            order_by=("domain",),
+            distinct=True,
+        )
+
+    def domain_range_batch_query(
+        self, properties, property_label="?property_label", use_cache=True
+    ):
+        """
+        In-memory version of FusekiClient.domain_range_batch_query.
+        """
+        grouped = {}
+        for property in properties:
+            result = self.domain_range_query(
+                property=property, property_label=property_label
+            )
+            if result:
+                # the property is bound, so put it back into the rows like VALUES would
+                iri = self._term(property)
+                for r in result:
+                    r["property"] = term_to_binding(iri)
+                grouped[iri[1]] = result
+        return grouped
+
+    def domain_property_query(
+        self,
+        domain_label="?domain_label",
+        limit=None,
+        offset=0,
+        use_cache=True,
+        domains=None,
+    ):
+        """
+        In-memory version of FusekiClient.domain_property_query.
+        """
+        solutions = self._values(
+            [
+                ("?domain", uri(RDFS + "label"), literal(domain_label)),
+                ("?domain", RDF_TYPE, OWL_CLASS),
+                ("?property", uri(RDFS + "domain"), "?domain"),
+                ("?property", uri(RDFS + "label"), "?property_label"),
+            ],
+            "domain",
+            domains,
+        )
+        return self._rows(
+            solutions,
+            ("domain", "property", "property_label"),
+            order_by=("domain", "property", "property_label"),
+            distinct=True,
+            limit=limit,
+            offset=offset,
+        )
+
+    def range_property_query(
+        self,
+        range_label="?range_label",
+        limit=None,
+        offset=0,
+        use_cache=True,
+        ranges=None,
+    ):
+        """
+        In-memory version of FusekiClient.range_property_query.
+        """
+        solutions = self._values(
+            [
+                ("?range", uri(RDFS + "label"), literal(range_label)),
+                ("?range", RDF_TYPE, OWL_CLASS),
+                ("?property", uri(RDFS + "range"), "?range"),
+                ("?property", uri(RDFS + "label"), "?property_label"),
+            ],
+            "range",
+            ranges,
+        )
+        return self._rows(
+            solutions,
+            ("range", "property", "property_label"),
+            order_by=("range", "property", "property_label"),
+            distinct=True,
+            limit=limit,
+            offset=offset,
+        )
+
+    def subclass_query(self, super="?super", limit=None, offset=0, use_cache=True):
+        """
+        In-memory version of FusekiClient.subclass_query.
+        """
+        parent = uri(super)
+        solutions = (
+            s
+            for s in self.index.solve([("?sub", uri(RDFS + "subClassOf"), parent)])
+            if s["sub"] != parent
+        )
+        return self._rows(
+            solutions,
+            ("sub", "super"),
+            order_by=("sub",),
+            distinct=True,
+            limit=limit,
+            offset=offset,
+        )
+
+    def subclass_edges_query(self, use_cache=True):
+        """
+        In-memory version of FusekiClient.subclass_edges_query.
+        """
+        solutions = (
+            s
+            for s in self.index.solve([("?sub", uri(RDFS + "subClassOf"), "?super")])
+            if s["sub"] != s["super"] and s["sub"][0] == s["super"][0] == "uri"
+        )
+        return self._rows(solutions, ("sub", "super"), distinct=True)
+
+    def superclass_query(self, sub="?sub", limit=None, offset=0, use_cache=True):
+        """
+        In-memory version of FusekiClient.superclass_query.
+        """
+        child = uri(sub)
+        solutions = (
+            s
+            for s in self.index.solve([(child, uri(RDFS + "subClassOf"), "?super")])
+            if s["super"] != child and s["super"][0] == "uri"
+        )
+        return self._rows(
+            solutions,
+            ("sub", "super"),
+            order_by=("super",),
+            distinct=True,
+            limit=limit,
+            offset=offset,
+        )
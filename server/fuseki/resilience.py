@@ -0,0 +1,151 @@
+import http.client
+import random
+import threading
+import time
+
+from .errors import BackendUnavailable, CircuitOpen, QueryTimeout
+
+
+class Deadline:
+    """
+    The point in time by which a call, including all of its retries, has to be answered.
+    """
+
+    def __init__(self, seconds: float, clock=time.monotonic):
+        self._clock = clock
+        self.expires = clock() + seconds
+
+    def left(self) -> float:
+        return self.expires - self._clock()
+
+    def remaining(self) -> float:
+        """
+        Seconds left before the deadline, to be used as the timeout of the next network operation.
+        Raises QueryTimeout once the deadline has passed.
+        """
+        left = self.left()
+        if left <= 0:
+            raise QueryTimeout("Deadline exceeded before Fuseki answered")
+        return left
+
+
+class RetryPolicy:
+    """
+    Bounded retries for idempotent reads. The pause before each retry is drawn uniformly between zero and
+    an exponentially growing cap ("full jitter"), so clients that failed together do not retry together.
+    """
+
+    def __init__(
+        self,
+        retries: int = 2,
+        base_delay: float = 0.1,
+        max_delay: float = 2.0,
+        random=random.random,
+    ):
+        """
+        Args:
+            retries: number of attempts made after the first one fails, 0 disables retries
+            base_delay: cap in seconds of the pause before the first retry, doubled for every later one
+            max_delay: largest cap in seconds
+            random: source of uniform numbers in [0, 1)
+        """
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._random = random
+
+    def delays(self):
+        """
+        Yields the pause in seconds before each retry.
+        """
+        for attempt in range(self.retries):
+            cap = min(self.max_delay, self.base_delay * 2**attempt)
+            yield self._random() * cap
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while Fuseki is unhealthy. After `failure_threshold` consecutive failures the breaker
+    opens and rejects every call with CircuitOpen. Once `reset_timeout` seconds have passed, a single trial
+    call is let through (half-open): its success closes the breaker, its failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow(self):
+        """
+        Checks that a call may be sent, raising CircuitOpen otherwise.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    raise CircuitOpen("Fuseki is unavailable, not sending the query")
+                self._state = self.HALF_OPEN
+                self._trial = False
+            if self._trial:
+                raise CircuitOpen("Fuseki is recovering, not sending the query")
+            self._trial = True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial = False
+
+    def abandon(self):
+        """
+        Ends a call that says nothing of Fuseki's health, such as one that never reached it. A trial call
+        abandoned this way lets the next call through as the trial instead.
+        """
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+                self._trial = False
+
+
+# errors of the standard library HTTP stack that mean Fuseki did not answer properly
+NETWORK_ERRORS = (OSError, http.client.HTTPException)
+
+
+def unavailable(error: Exception) -> BackendUnavailable:
+    """
+    The typed error reported for a failed attempt, QueryTimeout for timeouts.
+    """
+    if isinstance(error, BackendUnavailable):
+        return error
+    detail = str(error) or type(error).__name__
+    if isinstance(error, TimeoutError):
+        return QueryTimeout(f"Fuseki did not answer in time: {detail}")
+    return BackendUnavailable(f"Fuseki is unavailable: {detail}")
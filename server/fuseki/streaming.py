@@ -0,0 +1,75 @@
+import codecs
+import json
+import re
+import zlib
+
+_BINDINGS_START = re.compile(r'"bindings"\s*:\s*\[')
+_SEPARATORS = " \t\r\n,"
+
+
+class BindingStream:
+    """
+    Incremental decoder for application/sparql-results+json documents. Raw body chunks are fed in as they
+    arrive and every complete binding object is decoded as soon as its closing brace is seen, so only the
+    binding currently being received is held in memory instead of the whole document.
+    """
+
+    def __init__(self, gzipped: bool = False):
+        self._inflate = zlib.decompressobj(wbits=31) if gzipped else None
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._in_bindings = False
+        self.done = False
+
+    def feed(self, chunk: bytes):
+        """
+        Adds a chunk of the response body.
+
+        Yields:
+            Every binding dictionary completed by this chunk.
+        """
+        if self._inflate is not None:
+            chunk = self._inflate.decompress(chunk)
+        self._buffer += self._text.decode(chunk)
+        yield from self._drain()
+
+    def _drain(self):
+        if not self._in_bindings:
+            match = _BINDINGS_START.search(self._buffer)
+            if match is None:
+                # keep only a tail long enough to contain a split '"bindings" : ['
+                self._buffer = self._buffer[-64:]
+                return
+            self._buffer = self._buffer[match.end() :]
+            self._in_bindings = True
+
+        position = 0
+        while not self.done:
+            while (
+                position < len(self._buffer) and self._buffer[position] in _SEPARATORS
+            ):
+                position += 1
+            if position == len(self._buffer):
+                break
+            if self._buffer[position] == "]":
+                self.done = True
+                break
+            try:
+                binding, position = self._decoder.raw_decode(self._buffer, position)
+            except json.JSONDecodeError:
+                # the object is not complete yet, wait for the next chunk
+                break
+            yield binding
+        self._buffer = "" if self.done else self._buffer[position:]
+
+
+def iter_bindings(chunks, gzipped: bool = False):
+    """
+    Decodes the bindings of a SPARQL JSON result body given as an iterable of byte chunks, one at a time.
+    """
+    stream = BindingStream(gzipped=gzipped)
+    for chunk in chunks:
+        yield from stream.feed(chunk)
+        if stream.done:
+            return
@@ -0,0 +1,466 @@
+import math
+import re
+
+from .cache import normalize_query
+
+XSD_DOUBLE = "http://www.w3.org/2001/XMLSchema#double"
+
+_PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+_IRI = re.compile(r'[^<>"{}|^`\\\x00-\x20]*')
+_VARIABLE = re.compile(r"\?\w+")
+_PREFIXED_NAME = re.compile(r"[A-Za-z][\w\-.]*:[\w\-.]*")
+_LITERAL_ESCAPES = str.maketrans(
+    {"\\": "\\\\", '"': '\\"', "\n": "\\n", "\r": "\\r", "\t": "\\t"}
+)
+
+
+class Param:
+    """
+    A typed template parameter. `render` turns a Python value into SPARQL syntax, escaping or rejecting
+    anything that could change the shape of the query. Parameters with a `default` may be left out when
+    binding.
+    """
+
+    def render(self, value) -> str:
+        raise NotImplementedError
+
+
+class Iri(Param):
+    def render(self, value) -> str:
+        value = str(value)
+        if value.startswith("<") and value.endswith(">"):
+            value = value[1:-1]
+        if not _IRI.fullmatch(value):
+            raise ValueError(f"Invalid IRI: {value!r}")
+        return f"<{value}>"
+
+
+class Literal(Param):
+    def render(self, value) -> str:
+        return f'"{str(value).translate(_LITERAL_ESCAPES)}"'
+
+
+class Number(Param):
+    def render(self, value) -> str:
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            value = float(value)
+        if isinstance(value, int):
+            return str(value)
+        if math.isnan(value):
+            raise ValueError("NaN is not a valid query bound")
+        if math.isinf(value):
+            return f'"{"INF" if value > 0 else "-INF"}"^^<{XSD_DOUBLE}>'
+        return repr(value)
+
+
+class Term(Param):
+    """
+    A triple pattern position: a variable ("?name"), a prefixed name ("foundation:base") or an IRI.
+    """
+
+    def render(self, value) -> str:
+        value = str(value)
+        if _VARIABLE.fullmatch(value) or _PREFIXED_NAME.fullmatch(value):
+            return value
+        return Iri().render(value)
+
+
+class Values(Param):
+    """
+    A list of values for a VALUES block, each rendered by `item`.
+    """
+
+    def __init__(self, item: Param):
+        self.item = item
+
+    def render(self, value) -> str:
+        return " ".join(self.item.render(v) for v in value)
+
+
+class ValuesBlock(Param):
+    """
+    An optional VALUES block binding `variable` to a list of values, or nothing when the value is None.
+    """
+
+    default = None
+
+    def __init__(self, variable: str, item: Param):
+        self.variable = variable
+        self.values = Values(item)
+
+    def render(self, value) -> str:
+        if value is None:
+            return ""
+        return f"VALUES {self.variable} {{ {self.values.render(value)} }}"
+
+
+class Page(Param):
+    """
+    A LIMIT/OFFSET clause from a (limit, offset) pair, or nothing when the value is None.
+    """
+
+    default = None
+
+    def render(self, value) -> str:
+        if value is None:
+            return ""
+        limit, offset = (int(v) for v in value)
+        if limit < 0 or offset < 0:
+            raise ValueError(f"Invalid page: {value!r}")
+        return f"LIMIT {limit} OFFSET {offset}"
+
+
+class BoundQuery:
+    """
+    A template together with its rendered parameter values. `key` identifies the query for caching and
+    batching without building the query text; `sparql` builds it.
+    """
+
+    __slots__ = ("template", "values")
+
+    def __init__(self, template, values: tuple):
+        self.template = template
+        self.values = values
+
+    @property
+    def key(self) -> tuple:
+        return (self.template.name,) + self.values
+
+    @property
+    def sparql(self) -> str:
+        parts = list(self.template.segments)
+        parts[1::2] = self.values
+        return "".join(parts)
+
+
+class SparqlTemplate:
+    """
+    A query shape parsed once: the text is normalized and split around its ${name} placeholders, and each
+    call only renders its parameters into the slots.
+    """
+
+    def __init__(self, name: str, text: str, **params: Param):
+        self.name = name
+        self.params = params
+        self.segments = tuple(_PLACEHOLDER.split(normalize_query(text)))
+        self.slots = self.segments[1::2]
+        unknown = set(self.slots) - set(params)
+        if unknown:
+            raise ValueError(f"Template {name} has untyped placeholders: {unknown}")
+
+    def bind(self, **values) -> BoundQuery:
+        for name, param in self.params.items():
+            if name not in values and hasattr(param, "default"):
+                values[name] = param.default
+        rendered = {
+            name: self.params[name].render(value) for name, value in values.items()
+        }
+        return BoundQuery(self, tuple(rendered[slot] for slot in self.slots))
+
+
+TEMPLATES = {}
+
+
+def register_template(name: str, text: str, **params: Param) -> SparqlTemplate:
+    """
+    Compiles a template and makes it available to the clients under `name`.
+    """
+    template = SparqlTemplate(name, text, **params)
+    TEMPLATES[name] = template
+    return template
+
+
+register_template(
+    "query",
+    """
+    PREFIX foundation:<http://imce.jpl.nasa.gov/foundation/>
+    SELECT ?subject ?predicate ?object
+    WHERE {
+        ${subject} ${predicate} ${object}
+    }
+    """,
+    subject=Term(),
+    predicate=Term(),
+    object=Term(),
+)
+
+register_template(
+    "subject_predicates",
+    """
+    PREFIX foundation:<http://imce.jpl.nasa.gov/foundation/>
+    SELECT ?subject ?predicate ?object
+    WHERE {
+        VALUES ?predicate { ${predicates} }
+        ${subject} ?predicate ?object
+    }
+    """,
+    subject=Term(),
+    predicates=Values(Iri()),
+)
+
+register_template(
+    "predicates",
+    """
+    SELECT DISTINCT ?predicate
+    WHERE {
+        ?subject ?predicate ?object
+    }
+    """,
+)
+
+register_template(
+    "labels",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT DISTINCT ?subject ?label ?kind
+    WHERE {
+        { ?subject a owl:Class . BIND ("class" AS ?kind) }
+        UNION
+        { ?subject rdfs:domain ?domain . BIND ("property" AS ?kind) }
+        ?subject rdfs:label ?label .
+    }
+    """,
+)
+
+_ASSEMBLY = """
+    PREFIX fse:			<http://opencaesar.io/examples/firesat/disciplines/fse/fse#>
+    PREFIX base:		<http://imce.jpl.nasa.gov/foundation/base#>
+    PREFIX analysis: 	<http://imce.jpl.nasa.gov/foundation/analysis#>
+    PREFIX vim4: 		<http://bipm.org/jcgm/vim4#>
+    PREFIX mission: 	<http://imce.jpl.nasa.gov/foundation/mission#>
+
+    SELECT DISTINCT ?assembly ?id ?mass ?function
+    WHERE {
+        ${assembly} a fse:Assembly ;                                # match an assembly
+                base:hasIdentifier ${id} ;                          # match its id
+                analysis:isCharacterizedBy [                        # match its mass
+                    vim4:hasDoubleNumber ${mass}
+                ] ;
+                mission:performs ${function} .                      # match a function it performs
+        %s
+    }
+    """
+
+register_template(
+    "assembly",
+    _ASSEMBLY % "",
+    assembly=Term(),
+    id=Literal(),
+    mass=Term(),
+    function=Term(),
+)
+
+register_template(
+    "assembly_range",
+    _ASSEMBLY % "FILTER (${mass} > ${lower} && ${mass} < ${upper})",
+    assembly=Term(),
+    id=Term(),
+    mass=Term(),
+    function=Term(),
+    lower=Number(),
+    upper=Number(),
+)
+
+register_template(
+    "assembly_range_distinct",
+    """
+    PREFIX fse:			<http://opencaesar.io/examples/firesat/disciplines/fse/fse#>
+    PREFIX base:		<http://imce.jpl.nasa.gov/foundation/base#>
+    PREFIX analysis: 	<http://imce.jpl.nasa.gov/foundation/analysis#>
+    PREFIX vim4: 		<http://bipm.org/jcgm/vim4#>
+    PREFIX mission: 	<http://imce.jpl.nasa.gov/foundation/mission#>
+
+    SELECT DISTINCT ?assembly
+    WHERE {
+        ?assembly a fse:Assembly ;
+                base:hasIdentifier ?id ;
+                analysis:isCharacterizedBy [
+                    vim4:hasDoubleNumber ?mass
+                ] ;
+                mission:performs ?function .
+        FILTER (?mass > ${lower} && ?mass < ${upper})
+    }
+    ORDER BY ?assembly
+    ${page}
+    """,
+    lower=Number(),
+    upper=Number(),
+    page=Page(),
+)
+
+register_template(
+    "assembly_masses",
+    """
+    PREFIX fse:			<http://opencaesar.io/examples/firesat/disciplines/fse/fse#>
+    PREFIX base:		<http://imce.jpl.nasa.gov/foundation/base#>
+    PREFIX analysis: 	<http://imce.jpl.nasa.gov/foundation/analysis#>
+    PREFIX vim4: 		<http://bipm.org/jcgm/vim4#>
+    PREFIX mission: 	<http://imce.jpl.nasa.gov/foundation/mission#>
+
+    SELECT DISTINCT ?assembly ?id ?mass
+    WHERE {
+        ?assembly a fse:Assembly ;
+                base:hasIdentifier ?id ;
+                analysis:isCharacterizedBy [
+                    vim4:hasDoubleNumber ?mass
+                ] .
+        FILTER EXISTS { ?assembly mission:performs ?function }
+    }
+    """,
+)
+
+register_template(
+    "domain_range",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT DISTINCT ?domain ?domain_label ?property ?property_label ?range ?range_label
+    WHERE {
+        ${properties}
+        ${domain} a owl:Class .
+        OPTIONAL { ${domain} rdfs:label ?domain_label }
+
+        ${property} rdfs:domain ${domain} .
+        ${property} rdfs:label ${property_label} .
+
+        ${property} rdfs:range ${range} .
+        OPTIONAL { ${range} rdfs:label ?range_label }
+    }
+
+    ORDER BY ?domain
+    """,
+    domain=Term(),
+    property=Term(),
+    property_label=Literal(),
+    range=Term(),
+    properties=ValuesBlock("?property", Iri()),
+)
+
+register_template(
+    "domain_range_batch",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT DISTINCT ?domain ?domain_label ?property ?property_label ?range ?range_label
+    WHERE {
+        VALUES ?property { ${properties} }
+
+        ?domain a owl:Class .
+        OPTIONAL { ?domain rdfs:label ?domain_label }
+
+        ?property rdfs:domain ?domain .
+        ?property rdfs:label ${property_label} .
+
+        ?property rdfs:range ?range .
+        OPTIONAL { ?range rdfs:label ?range_label }
+    }
+
+    ORDER BY ?property ?domain
+    """,
+    properties=Values(Iri()),
+    property_label=Literal(),
+)
+
+register_template(
+    "domain_property",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT DISTINCT ?domain ?property ?property_label
+    WHERE {
+        ${domains}
+        ?domain a owl:Class .
+        ?domain rdfs:label ${domain_label} .
+
+        ?property rdfs:domain ?domain .
+        ?property rdfs:label ?property_label .
+    }
+
+    ORDER BY ?domain ?property ?property_label
+    ${page}
+    """,
+    domain_label=Literal(),
+    domains=ValuesBlock("?domain", Iri()),
+    page=Page(),
+)
+
+register_template(
+    "range_property",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+    SELECT DISTINCT ?range ?property ?property_label
+    WHERE {
+        ${ranges}
+        ?range a owl:Class .
+        ?range rdfs:label ${range_label} .
+
+        ?property rdfs:range ?range .
+        ?property rdfs:label ?property_label .
+    }
+
+    ORDER BY ?range ?property ?property_label
+    ${page}
+    """,
+    range_label=Literal(),
+    ranges=ValuesBlock("?range", Iri()),
+    page=Page(),
+)
+
+register_template(
+    "subclass",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+    SELECT DISTINCT ?sub ?super
+
+    WHERE {
+        ?sub rdfs:subClassOf ${super} .
+        FILTER ( ?sub != ${super} )
+        FILTER ( isIRI(${super}) )
+    }
+
+    ORDER BY ?sub
+    ${page}
+    """,
+    super=Iri(),
+    page=Page(),
+)
+
+register_template(
+    "superclass",
+    """
+    PREFIX owl:   <http://www.w3.org/2002/07/owl#>
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+    SELECT DISTINCT ?sub ?super
+
+    WHERE {
+        ${sub} rdfs:subClassOf ?super .
+        FILTER ( ${sub} != ?super)
+        FILTER ( isIRI(?super) )
+    }
+
+    ORDER BY ?super
+    ${page}
+    """,
+    sub=Iri(),
+    page=Page(),
+)
+
+register_template(
+    "subclass_edges",
+    """
+    PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+
+    SELECT DISTINCT ?sub ?super
+
+    WHERE {
+        ?sub rdfs:subClassOf ?super .
+        FILTER ( ?sub != ?super )
+        FILTER ( isIRI(?sub) && isIRI(?super) )
+    }
+    """,
+)
@@ -0,0 +1,217 @@
+import gzip
+import http.client
+import json
+import queue
+import threading
+from urllib.parse import urlencode, urlsplit
+
+from .errors import FusekiError
+from .streaming import BindingStream
+
+SPARQL_RESULTS_JSON = "application/sparql-results+json"
+
+
+class TransportError(FusekiError):
+    """Raised when the SPARQL endpoint answers with a non-2xx status."""
+
+    def __init__(self, status: int, reason: str, body: bytes = b""):
+        super().__init__(f"{status} {reason}: {body[:200]!r}")
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+class PoolTimeout(TimeoutError):
+    """Raised when no pooled connection was freed in time, before anything was sent to the endpoint."""
+
+
+class ConnectionPool:
+    """
+    A bounded pool of persistent HTTP/1.1 connections to a single host. At most `size` connections
+    exist at any time; callers block in `acquire` until one is free. Idle connections are kept open
+    (keep-alive) and handed out most-recently-used first so the warmest socket is reused.
+    """
+
+    def __init__(self, endpoint: str, size: int = 4, timeout: float = 30.0):
+        parts = urlsplit(endpoint)
+        if parts.scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported endpoint scheme: {endpoint}")
+        self.path = parts.path or "/"
+        self.size = size
+        self.timeout = timeout
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _connect(self):
+        connection_class = (
+            http.client.HTTPSConnection
+            if self._scheme == "https"
+            else http.client.HTTPConnection
+        )
+        return connection_class(self._host, self._port, timeout=self.timeout)
+
+    def acquire(self, timeout: float = None):
+        """
+        Check out a connection, opening a new one if no idle connection is available.
+
+        Args:
+            timeout: seconds to wait for a free slot, None waits forever
+
+        Returns:
+            A (connection, reused) tuple, where reused tells whether the socket was already open.
+        """
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout("Timed out waiting for a pooled connection")
+        try:
+            return self._idle.get_nowait(), True
+        except queue.Empty:
+            return self._connect(), False
+
+    def release(self, connection, reusable: bool = True):
+        """
+        Return a connection to the pool. Connections in an unknown state (errors, unread bodies)
+        must be released with reusable=False so they are closed instead of recycled.
+        """
+        if reusable and not self._closed:
+            self._idle.put(connection)
+        else:
+            connection.close()
+        self._slots.release()
+
+    def close(self):
+        """
+        Close every idle connection. Connections currently checked out are closed on release.
+        """
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class HTTPTransport:
+    """
+    Thread-safe SPARQL protocol transport. Every call builds its own request from the query text, so
+    nothing is shared between threads except the connection pool itself.
+    """
+
+    # errors that mean a kept-alive socket was closed by the server while it sat in the pool
+    _STALE_ERRORS = (
+        http.client.RemoteDisconnected,
+        http.client.BadStatusLine,
+        ConnectionResetError,
+        BrokenPipeError,
+    )
+
+    def __init__(self, endpoint: str, pool_size: int = 4, timeout: float = 30.0):
+        self.endpoint = endpoint
+        self._pool = ConnectionPool(endpoint, size=pool_size, timeout=timeout)
+
+    def _headers(self):
+        return {
+            "Accept": SPARQL_RESULTS_JSON,
+            "Accept-Encoding": "gzip",
+            "Connection": "keep-alive",
+            "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
+        }
+
+    def _send(self, connection, sparql: str, timeout: float = None):
+        # pooled sockets keep the timeout of their last request, so it is set on every request
+        connection.timeout = self._pool.timeout if timeout is None else timeout
+        if connection.sock is not None:
+            connection.sock.settimeout(connection.timeout)
+        body = urlencode({"query": sparql}).encode("utf-8")
+        connection.request("POST", self._pool.path, body=body, headers=self._headers())
+        response = connection.getresponse()
+        if not 200 <= response.status < 300:
+            payload = response.read()
+            if self._gzipped(response):
+                payload = gzip.decompress(payload)
+            raise TransportError(response.status, response.reason, payload)
+        return response
+
+    def _gzipped(self, response) -> bool:
+        return response.getheader("Content-Encoding", "").lower() == "gzip"
+
+    def _open(self, sparql: str, timeout: float = None):
+        """
+        Checks out a connection and sends the query, returning once the response headers arrived.
+        The caller owns the returned connection and must release it.
+        """
+        connection, reused = self._pool.acquire(timeout=timeout)
+        try:
+            try:
+                return connection, self._send(connection, sparql, timeout)
+            except self._STALE_ERRORS:
+                if not reused:
+                    raise
+                # the server dropped an idle keep-alive socket, retry once on a fresh one
+                connection.close()
+                connection = self._pool._connect()
+                return connection, self._send(connection, sparql, timeout)
+        except BaseException:
+            self._pool.release(connection, reusable=False)
+            raise
+
+    def select(self, sparql: str, timeout: float = None) -> dict:
+        """
+        Send a SELECT query and decode the application/sparql-results+json document.
+
+        Args:
+            sparql: the full query text
+            timeout: seconds to wait for a pooled connection and for each socket operation, None uses
+                the pool's timeout
+
+        Returns:
+            The decoded result document, ie. {"head": ..., "results": {"bindings": [...]}}
+        """
+        connection, response = self._open(sparql, timeout)
+        try:
+            payload = response.read()
+        except BaseException:
+            self._pool.release(connection, reusable=False)
+            raise
+        self._pool.release(connection, reusable=not response.will_close)
+        if self._gzipped(response):
+            payload = gzip.decompress(payload)
+        return json.loads(payload)
+
+    def stream(self, sparql: str, chunk_size: int = 16384, timeout: float = None):
+        """
+        Send a SELECT query and decode its bindings while the body is still arriving.
+
+        Args:
+            sparql: the full query text
+            chunk_size: number of body bytes read from the socket at a time
+            timeout: seconds to wait for a pooled connection and for each socket operation, None uses
+                the pool's timeout
+
+        Yields:
+            One binding dictionary at a time. Closing the generator early abandons the rest of the
+            response; its connection is then closed instead of returned to the pool.
+        """
+        connection, response = self._open(sparql, timeout)
+        reusable = False
+        try:
+            decoder = BindingStream(gzipped=self._gzipped(response))
+            while not decoder.done:
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                yield from decoder.feed(chunk)
+            # the document tail after the bindings is tiny, drain it so the socket can be reused
+            while response.read(chunk_size):
+                pass
+            reusable = not response.will_close
+        finally:
+            self._pool.release(connection, reusable=reusable)
+
+    def close(self):
+        self._pool.close()
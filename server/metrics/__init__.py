@@ -0,0 +1,294 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+# seconds, from a cached lookup up to a slow full scan of the dataset
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+
+class Registry:
+    """
+    The metrics of a process, rendered together in the Prometheus text exposition format. Besides
+    metrics, plain functions returning (labels, value) samples can be registered as collectors for values
+    that are only computed when scraped.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def register_collector(self, name: str, documentation: str, kind: str, collect):
+        """
+        Args:
+            name: metric name of the collected samples
+            documentation: HELP text
+            kind: "gauge" or "counter"
+            collect: function returning an iterable of (labels dict, value) pairs
+        """
+        with self._lock:
+            self._collectors.append((name, documentation, kind, collect))
+
+    def get(self, name: str):
+        return self._metrics[name]
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        for name, documentation, kind, collect in collectors:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_sample(name, labels, value) for labels, value in collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def generate_latest(registry: Registry = REGISTRY) -> bytes:
+    """
+    The metrics of a registry in the Prometheus text exposition format.
+    """
+    return registry.render().encode("utf-8")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _sample(name: str, labels: dict, value: float) -> str:
+    if labels:
+        rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f"{name}{{{rendered}}} {_format(value)}"
+    return f"{name} {_format(value)}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # unlabelled metrics are exposed, as zero, before their first update
+            self.labels()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values, **labelvalues):
+        """
+        The child metric holding the values of one combination of labels.
+        """
+        if labelvalues:
+            values = tuple(labelvalues[name] for name in self.labelnames)
+        values = tuple(str(v) for v in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        with self._lock:
+            child = self._children.get(values)
+            if child is None:
+                child = self._children[values] = self._child()
+            return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels, use .labels() first")
+        return self.labels()
+
+    def children(self) -> list:
+        """
+        Every (labels dict, child) pair of the metric, in label order.
+        """
+        with self._lock:
+            children = sorted(self._children.items())
+        return [
+            (dict(zip(self.labelnames, values)), child) for values, child in children
+        ]
+
+    def samples(self):
+        for labels, child in self.children():
+            yield from child.samples(self.name, labels)
+
+
+class _Value:
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = float(value)
+
+    def get(self) -> float:
+        return self._value
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+    def samples(self, name, labels):
+        yield _sample(name, labels, self._value)
+
+
+class Counter(_Metric):
+    """A value that only goes up, ie. the number of Fuseki calls."""
+
+    kind = "counter"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        if amount < 0:
+            raise ValueError("Counters can only be incremented")
+        self._default().inc(amount)
+
+
+class Gauge(_Metric):
+    """A value that goes up and down, ie. the number of requests in flight."""
+
+    kind = "gauge"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def track_inprogress(self):
+        return self._default().track_inprogress()
+
+
+class _Buckets:
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._counts = [0] * len(bounds)
+        self._count = 0
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            for i, bound in enumerate(self._bounds):
+                if value <= bound:
+                    self._counts[i] += 1
+                    break
+            self._count += 1
+            self._sum += value
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def samples(self, name, labels):
+        with self._lock:
+            counts, count, total = list(self._counts), self._count, self._sum
+        cumulative = 0
+        for bound, bucket in zip(self._bounds, counts):
+            cumulative += bucket
+            yield _sample(f"{name}_bucket", dict(labels, le=_format(bound)), cumulative)
+        yield _sample(f"{name}_bucket", dict(labels, le="+Inf"), count)
+        yield _sample(f"{name}_count", labels, count)
+        yield _sample(f"{name}_sum", labels, total)
+
+
+class Histogram(_Metric):
+    """Observations counted in cumulative buckets, ie. latencies in seconds."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        registry: Registry = REGISTRY,
+        buckets=DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(b for b in buckets if not math.isinf(b)))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _child(self):
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+
+# shared by the stages of answering a question, which live in different packages
+STAGE_LATENCY = Histogram(
+    "chatbot_stage_seconds",
+    "Time spent in each stage of answering a question. Stages nest: dispatch includes parse.",
+    ["stage"],
+)
@@ -1,19 +1,132 @@
 from collections import defaultdict
+import base64
+import json
+import logging
 import re
-import nltk
+import time
 from enum import Enum
-from nltk.tokenize import word_tokenize, sent_tokenize
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer
 
-nltk.download("stopwords")
-nltk.download("punkt")
-nltk.download("averaged_perceptron_tagger")
+from fuseki.cache import ResultCache
+from fuseki.errors import BackendUnavailable
+from metrics import STAGE_LATENCY, Counter, Histogram
+
+from .grammar import TEMPLATES
+from .hierarchy import ClassHierarchy
+from .labels import LabelIndex
+from .predicates import PredicateIndex, local_name
+from .quantities import QuantityIndex
+from .sessions import (
+    DEFAULT_SESSION,
+    MemorySessionStore,
+    SQLiteSessionStore,
+    new_session,
+)
+from . import parsing, resources
+
+logger = logging.getLogger(__name__)
+
+# number of items listed per answer, longer lists are continued with "show more"
+PAGE_SIZE = 50
+MORE_RESULTS_HINT = " Type 'show more' to see more."
+NO_MORE_RESULTS = "There are no more results to show."
+BACKEND_UNAVAILABLE = (
+    "The knowledge base is not responding right now, please try again in a moment."
+)
+
+# the status of an answered Query: complete, waiting on a disambiguation choice, or not answered
+ANSWERED, DISAMBIGUATING, UNAVAILABLE = "answered", "disambiguating", "unavailable"
+_SHOW_MORE = re.compile(r"(?i)\s*(show|see|load)\s+more\W*")
+# "all" is a stop word, so transitive and yes/no class questions are recognized on the raw input
+_ALL_CLASSES = re.compile(r"(?i)\ball\s+(the\s+)?(sub|super)-?class")
+_IS_SUBCLASS = re.compile(
+    r'(?i)\s*is\s+"?(?P<first>\S+?)"?\s+an?\s+(?P<kind>sub|super)-?class\s+of\s+"?(?P<second>\S+?)"?\W*'
+)
+_EXTREME_MASS = re.compile(r"(?i)\b(heaviest|lightest)\b")
+_HOW_MANY = re.compile(r"(?i)\bhow\s+many\b")
+
+STRATEGY_LATENCY = Histogram(
+    "chatbot_strategy_seconds",
+    "Time spent executing a strategy, Fuseki calls included, by strategy.",
+    ["strategy"],
+)
+PARSE_CACHE_LOOKUPS = Counter(
+    "chatbot_parse_cache_lookups_total",
+    "Parse cache lookups of questions parsed by NLTK, by result (hit or miss).",
+    ["result"],
+)
+
+
+def normalize_question(text: str) -> str:
+    """
+    The key of a question in the parse cache: surrounding and repeated whitespace is dropped, while
+    case is kept since labels are case-sensitive.
+    """
+    return " ".join(text.split())
+
+
+def encode_cursor(strategy: str, **state) -> str:
+    """
+    Packs everything a strategy needs to fetch its next page into an opaque, url-safe continuation token.
+    """
+    state["strategy"] = strategy
+    data = json.dumps(state, separators=(",", ":"), sort_keys=True)
+    return base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+
+
+class InvalidCursor(ValueError):
+    """A continuation token that was not made by `encode_cursor`, or was altered since."""
+
+
+# the state kept in the cursors of each paginating strategy, by strategy class name: field -> types
+CURSOR_FIELDS = {
+    "DomainRangePropertyStrategy": dict(offset=int, kind=str, label=str),
+    "SubSuperStrategy": dict(offset=int, kind=str, uri=str, transitive=bool),
+    "FilterMassStrategy": dict(offset=int, upper=(int, float), lower=(int, float)),
+}
+
+
+def decode_cursor(token: str) -> dict:
+    """
+    Unpacks a continuation token made by `encode_cursor`, checking that it holds exactly the state its
+    strategy pages with, so that strategies can trust every field of it.
+
+    Raises:
+        InvalidCursor: if the token is malformed or its state is not the one of a paginating strategy
+    """
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (AttributeError, ValueError) as e:
+        raise InvalidCursor("Invalid cursor: not a continuation token") from e
+    if not isinstance(state, dict):
+        raise InvalidCursor("Invalid cursor: not a continuation token")
+    strategy = state.pop("strategy", None)
+    fields = CURSOR_FIELDS.get(strategy) if isinstance(strategy, str) else None
+    if fields is None:
+        raise InvalidCursor(f"Invalid cursor: unknown strategy {strategy!r}")
+    if state.keys() != fields.keys():
+        raise InvalidCursor(f"Invalid cursor: expected the fields {sorted(fields)}")
+    for field, types in fields.items():
+        value = state[field]
+        # bool is a subclass of int, but never a valid number here
+        if not isinstance(value, types) or (
+            isinstance(value, bool) and types is not bool
+        ):
+            raise InvalidCursor(f"Invalid cursor: {field} has the wrong type")
+    if state["offset"] < 0:
+        raise InvalidCursor("Invalid cursor: offset is negative")
+    state["strategy"] = strategy
+    return state
 
 
 class Query:
-    def __init__(self, user_input):
+    def __init__(self, user_input, cursor=None, session_id=DEFAULT_SESSION):
         self.user_input = user_input
+        self.cursor = cursor
+        self.session_id = session_id
+        # set by the executor once answered: the Strategy name and one of ANSWERED, DISAMBIGUATING
+        # or UNAVAILABLE
+        self.strategy_name = None
+        self.status = None
 
     def set_type(self, query_type):
         self._type = query_type
@@ -30,32 +143,180 @@ class Query:
     def set_strategy(self, strategy):
         self._strategy = strategy
 
+    def set_cursor(self, cursor):
+        self.cursor = cursor
+
+    def set_session(self, session):
+        self.session = session
+        # the strategy the session waited on when the question arrived, before it is routed
+        self.prior_strategy = session["strategy"]
+
     def execute(self):
         if self._strategy == None:
             print("No strategy has been set!")
 
         return self._strategy.execute(
-            tagged_tokens=self.tokens, cache=self.predicate_cache, client=self.client
+            tagged_tokens=self.tokens,
+            cache=self.predicate_cache,
+            client=self.client,
+            cursor=self.cursor,
+        )
+
+    async def execute_async(self):
+        if self._strategy == None:
+            print("No strategy has been set!")
+
+        return await self._strategy.execute_async(
+            tagged_tokens=self.tokens,
+            cache=self.predicate_cache,
+            client=self.client,
+            cursor=self.cursor,
         )
 
 
 class NLPStrategy:
-    def execute(self, tokens, cache, client):
+    """
+    Strategies implement `_execute` as a generator that yields every client call and is sent back its
+    result, ie. `result = yield client.subclass_query(super=uri)`. The same strategy body then runs
+    against a blocking FusekiClient through `execute` and an AsyncFusekiClient through `execute_async`.
+    Calls made with stream=True give the body an iterator of bindings it may stop reading early.
+
+    Strategies that list many items answer one page at a time and implement `_page`, which continues from
+    the cursor returned in the "next" key of the previous page.
+    """
+
+    def __init__(
+        self,
+        predicates: PredicateIndex = None,
+        labels: LabelIndex = None,
+        hierarchy: ClassHierarchy = None,
+        masses: QuantityIndex = None,
+        session: dict = None,
+    ):
+        """
+        Args:
+            predicates: the executor's shared predicate index
+            labels: the executor's shared label index
+            hierarchy: the executor's shared class hierarchy
+            masses: the executor's shared index of assembly masses
+            session: the state of the conversation asking, see sessions.new_session
+
+        Indexes that are not given start empty, and like shared ones are loaded on first use if needed.
+        Without a session the strategy answers as if in a new conversation.
+        """
+        self._session = session if session is not None else new_session()
+        self._predicates = predicates if predicates is not None else PredicateIndex()
+        self._labels = labels if labels is not None else LabelIndex()
+        self._hierarchy = hierarchy if hierarchy is not None else ClassHierarchy()
+        self._masses = masses if masses is not None else QuantityIndex("mass")
+
+    def execute(self, tagged_tokens, cache, client, cursor=None):
+        steps = self._steps(tagged_tokens, cache, client, cursor)
+        result = None
+        try:
+            while True:
+                start = time.perf_counter()
+                result = steps.send(result)
+        except StopIteration as done:
+            # the last step runs from the last Fuseki result to the answer: rendering the response
+            STAGE_LATENCY.labels("render").observe(time.perf_counter() - start)
+            return done.value
+
+    async def execute_async(self, tagged_tokens, cache, client, cursor=None):
+        steps = self._steps(tagged_tokens, cache, client, cursor)
+        result = None
+        try:
+            while True:
+                start = time.perf_counter()
+                result = await steps.send(result)
+                if hasattr(result, "__aiter__"):
+                    # strategy bodies iterate synchronously, so collect streamed rows first
+                    result = [r async for r in result]
+        except StopIteration as done:
+            STAGE_LATENCY.labels("render").observe(time.perf_counter() - start)
+            return done.value
+
+    def _steps(self, tagged_tokens, cache, client, cursor):
+        if cursor is None:
+            return self._execute(tagged_tokens, cache, client)
+        return self._page(decode_cursor(cursor), client)
+
+    def _execute(self, tagged_tokens, cache, client):
         pass
 
+    def _page(self, state, client):
+        raise NotImplementedError(f"{type(self).__name__} does not paginate")
+
+    def _paginate(self, rows, offset, **state):
+        """
+        Trims rows fetched with a limit of PAGE_SIZE + 1 down to one page. The extra row only tells
+        whether another page exists, in which case a cursor for it is returned along with the page.
+
+        Returns:
+            rows: at most PAGE_SIZE rows
+            cursor: a continuation token for the next page, or None on the last page
+        """
+        if len(rows) <= PAGE_SIZE:
+            return rows, None
+        cursor = encode_cursor(type(self).__name__, offset=offset + PAGE_SIZE, **state)
+        return rows[:PAGE_SIZE], cursor
+
+    def _resolve_label(self, client, label, kind):
+        """
+        Resolves a label typed by the user to the uris carrying it through the label index, so that
+        Fuseki only has to evaluate uri-bound patterns. Returns None when the label is not in the index,
+        in which case Fuseki still matches the label itself.
+
+        Args:
+            label: the label as typed
+            kind: "class" or "property"
+        """
+        if not self._labels.loaded:
+            self._labels.load((yield client.labels_query()))
+        return self._labels.resolve(label, kind) or None
+
+    def _add_suggestions(self, filtered_result, label, kind):
+        """
+        Adds the labels closest to one that matched nothing under the "suggestions" key of a response.
+        """
+        suggestions = [
+            dict(label=m.label, iri=m.iri, vocabulary=m.vocabulary)
+            for m in self._labels.lookup(label, kind=kind)
+            if m.label != label
+        ]
+        if suggestions:
+            filtered_result["suggestions"] = suggestions
+        return filtered_result
+
+    def _add_cursor(self, filtered_result, cursor):
+        if cursor is not None:
+            filtered_result["response"] += MORE_RESULTS_HINT
+            filtered_result["next"] = cursor
+        return filtered_result
+
+
+class NoMoreResultsStrategy(NLPStrategy):
+    def _execute(self, tagged_tokens, cache, client):
+        """
+        Answers a "show more" follow-up that has nothing left to continue.
+        """
+        return ({"response": NO_MORE_RESULTS}, 1)
+        yield
+
 
 class WhatStrategy(NLPStrategy):
     def isURI(self, uri: str):
         return len(uri) > 2 and uri[0] == "<" and uri[-1] == ">"
 
-    def execute(self, tagged_tokens, cache, client):
+    def _execute(self, tagged_tokens, cache, client):
         """
         Processes user queries that ask a basic "what" question. In the context of RDF triples, the user
         should prompt a subject and predicate, which will match all objects that match the criteria. The
-        implementation will involve making a more general query initially where only the subject is included,
-        which will allow us to search through all of the predicate URIs, which this function will attempt to match
-        with the user's provided predicate. Every RDF triple that matches this predicate will be returned from
-        this query.
+        user's predicate is first resolved to candidate predicate URIs through the predicate index, which
+        matches it against the local names and stems of every predicate in the dataset, then against the
+        predicates with the most similar names. Only the triples of the subject with those predicates are
+        then fetched. A general query where only the subject is
+        included, searching through all of its predicate URIs, remains as a fallback.
 
         Args:
             tagged_tokens: A list of tokens
@@ -69,26 +330,42 @@ class WhatStrategy(NLPStrategy):
         subject = tagged_tokens[1][
             0
         ]  # subject: analysis, base, bundle, mission, project, etc
-        predicate = tagged_tokens[2][0]
-        if self.isURI(subject):
-            db_result = client.query(subject=subject)
-        else:
-            db_result = client.query(subject=f"foundation:{subject}")
+        if not self.isURI(subject):
+            subject = f"foundation:{subject}"
 
-        # Stemming initialization
-        ps = PorterStemmer()
         predicate = tagged_tokens[2][0]
-        predicate_stem = ps.stem(predicate)
-        filtered_result = list()
-        for i in range(len(db_result)):
-            # Split string with delimiters ('/' and '#')
-            predicate_uri = db_result[i]["predicate"]["value"]
-            predicate_name = re.split(r"/|#", predicate_uri)[-1]
-            predicate_name_stem = ps.stem(predicate_name)
+        if not self._predicates.loaded:
+            self._predicates.load((yield client.predicates_query()))
+
+        # 1) fetch only the triples whose predicate matches the user's word
+        candidates = self._predicates.lookup(predicate)
+        filtered_result = []
+        if candidates:
+            filtered_result = yield client.subject_predicates_query(
+                subject=subject, predicates=candidates
+            )
 
-            if predicate_name == predicate or predicate_stem == predicate_name_stem:
-                cache[predicate_name] = predicate_uri
-                filtered_result.append(db_result[i])
+        # 2) fetch the triples of the predicates named most like the user's word, ie. "desc"
+        if not filtered_result:
+            matches = self._predicates.similar(predicate)
+            if matches:
+                rows = yield client.subject_predicates_query(
+                    subject=subject, predicates=[match.uri for match in matches]
+                )
+                rank = {match.uri: i for i, match in enumerate(matches)}
+                filtered_result = sorted(
+                    rows, key=lambda row: rank.get(row["predicate"]["value"], len(rank))
+                )
+
+        # 3) scan every triple of the subject
+        if not filtered_result:
+            filtered_result = yield from self._scan(client, subject, predicate)
+            if filtered_result:
+                self._predicates.add(filtered_result[0]["predicate"]["value"])
+
+        if filtered_result:
+            predicate_uri = filtered_result[0]["predicate"]["value"]
+            cache[local_name(predicate_uri)] = predicate_uri
 
         # TEMPORARY: code to set consistent POST response
         filtered_result2 = {}
@@ -96,11 +373,22 @@ class WhatStrategy(NLPStrategy):
 
         return (filtered_result2, 1)
 
+    def _scan(self, client, subject, predicate):
+        """
+        Fallback for predicates missing from the index: streams every triple of the subject and stops at
+        the first one whose predicate local name, or its stem, matches.
+        """
+        ps = resources.stemmer()
+        predicate_stem = ps.stem(predicate)
+        db_result = yield client.query(subject=subject, stream=True)
+        for row in db_result:
+            predicate_name = local_name(row["predicate"]["value"])
+            if predicate_name == predicate or predicate_stem == ps.stem(predicate_name):
+                return [row]
+        return []
+
 
 class DomainRangePropertyStrategy(NLPStrategy):
-    _disambiguation_options = {}
-    _disambiguation_prop_label = {}
-
     def _send_domain_range_properties_error(self):
         """
         Send back a response message to the user asking them to reformat their domain/range query.
@@ -114,7 +402,7 @@ class DomainRangePropertyStrategy(NLPStrategy):
         ] = f"Sorry, phrase your query as 'What are the properties of domain/range __?'"
         return filtered_result
 
-    def execute(self, tagged_tokens, cache, client):
+    def _execute(self, tagged_tokens, cache, client):
         """
         Processes user queries that ask about the properties of a particular "domain / range". In the context of RDF triples,
         the user should prompt a domain/range label, which will return all property_labels that match the criteria and return their
@@ -161,33 +449,7 @@ class DomainRangePropertyStrategy(NLPStrategy):
 
             # query via domain label
             domain_label = tagged_tokens[label_index][0].strip('"')
-            result = client.domain_property_query(domain_label=domain_label)
-            filtered_result = {}
-            property_labels = []
-
-            # NO RESULTS
-            if len(result) == 0:
-                filtered_result[
-                    "response"
-                ] = f"Unable to find information about domain {domain_label}"
-                return (filtered_result, 1)
-
-            # extract property labels for specified domain_label
-            for entity in result:
-                for key, dic in entity.items():
-                    if key == "property_label":
-                        property_labels.append(dic["value"])
-
-            # create response object with all labels
-            collected_response = f"For domain '{domain_label}', the properties are: "
-            for plabel in property_labels[:-1]:
-                collected_response += f"{plabel}, "
-            collected_response += (
-                "" if len(property_labels) < 1 else f"{property_labels[-1]}."
-            )
-
-            filtered_result["response"] = collected_response
-            return (filtered_result, 1)
+            return (yield from self._list_properties(client, "domain", domain_label))
 
         # 2) RANGE PROPERTIES QUERY
         elif domain_index == -1:
@@ -196,40 +458,91 @@ class DomainRangePropertyStrategy(NLPStrategy):
                 filtered_result = self._send_domain_range_properties_error()
                 return (filtered_result, 1)
 
-            # query via domain label
+            # query via range label
             range_label = tagged_tokens[label_index][0].strip('"')
-            result = client.range_property_query(range_label=range_label)
-            filtered_result = {}
-            property_labels = []
+            return (yield from self._list_properties(client, "range", range_label))
 
-            # NO RESULTS
-            if len(result) == 0:
-                filtered_result[
-                    "response"
-                ] = f"Unable to find information about range {range_label}"
-                return (filtered_result, 1)
+    def _page(self, state, client):
+        return (
+            yield from self._list_properties(
+                client, state["kind"], state["label"], state["offset"]
+            )
+        )
+
+    def _list_properties(self, client, kind, label, offset=0):
+        """
+        Fetches one page of the properties of a domain or range label and renders it.
 
-            # extract property labels for specified domain_label
-            for entity in result:
-                for key, dic in entity.items():
-                    if key == "property_label":
-                        property_labels.append(dic["value"])
-
-            # create response object with all labels
-            collected_response = f"For range '{range_label}', the properties are: "
-            for plabel in property_labels[:-1]:
-                collected_response += f"{plabel}, "
-            collected_response += (
-                "" if len(property_labels) < 1 else f"{property_labels[-1]}."
+        Args:
+            kind: either "domain" or "range"
+            label: the domain/range label
+            offset: number of properties listed on previous pages
+
+        Returns:
+            filtered_result: A dict containing a response english string, and a "next" cursor when there
+                are more properties
+            status: A boolean for whether query requires disambiguation
+        """
+        classes = yield from self._resolve_label(client, label, "class")
+        if kind == "domain":
+            result = yield client.domain_property_query(
+                domain_label=label,
+                limit=PAGE_SIZE + 1,
+                offset=offset,
+                domains=classes,
             )
+        else:
+            result = yield client.range_property_query(
+                range_label=label,
+                limit=PAGE_SIZE + 1,
+                offset=offset,
+                ranges=classes,
+            )
+        filtered_result = {}
+        property_labels = []
 
-            filtered_result["response"] = collected_response
-            return (filtered_result, 1)
+        # NO RESULTS
+        if len(result) == 0:
+            if offset > 0:
+                filtered_result["response"] = NO_MORE_RESULTS
+                return (filtered_result, 1)
+            filtered_result[
+                "response"
+            ] = f"Unable to find information about {kind} {label}"
+            return (self._add_suggestions(filtered_result, label, "class"), 1)
+
+        result, cursor = self._paginate(result, offset, kind=kind, label=label)
+
+        # extract property labels for specified domain/range label
+        for entity in result:
+            for key, dic in entity.items():
+                if key == "property_label":
+                    property_labels.append(dic["value"])
+
+        # create response object with all labels
+        if offset == 0:
+            collected_response = f"For {kind} '{label}', the properties are: "
+        else:
+            collected_response = f"More properties for {kind} '{label}': "
+        for plabel in property_labels[:-1]:
+            collected_response += f"{plabel}, "
+        collected_response += (
+            "" if len(property_labels) < 1 else f"{property_labels[-1]}."
+        )
+
+        filtered_result["response"] = collected_response
+        return (self._add_cursor(filtered_result, cursor), 1)
 
 
 class DomainRangeStrategy(NLPStrategy):
-    _disambiguation_options = {}
-    _disambiguation_prop_label = {}
+    # the choices of a disambiguation prompt are kept in the session, for the next question to pick from
+    @property
+    def _disambiguation_options(self):
+        return self._session["options"]
+
+    @property
+    def _disambiguation_prop_label(self):
+        return self._session["prop_label"]
 
     def _clear_disambiguation_cache(self):
         """
@@ -268,7 +581,8 @@ class DomainRangeStrategy(NLPStrategy):
 
     def _show_all(self, client, prop):
         """
-        Show all property/domain/range labels from Fuseki result object.
+        Show all property/domain/range labels from Fuseki result object. Like `_execute`, this is a
+        generator that yields its client calls.
         Args:
             client: A Fuseki client
             prop: A string property label
@@ -278,12 +592,12 @@ class DomainRangeStrategy(NLPStrategy):
         """
         filtered_result = {}
         collected_response = ""
-        # iterate over each property data source
+        # look up every property data source in one batched query
+        results = yield client.domain_range_batch_query(
+            list(self._disambiguation_options.values()), property_label=prop
+        )
         for src, value in self._disambiguation_options.items():
-            selected_uri = value
-            result = client.domain_range_query(
-                property=selected_uri, property_label=prop
-            )
+            result = results.get(value.strip("<>"), [])
             property_label, domain_label, range_label = self._assign_labels(
                 prop, result
             )
@@ -310,7 +624,7 @@ class DomainRangeStrategy(NLPStrategy):
         ] = f"Sorry, phrase your query as 'What is the domain and range of __?'"
         return filtered_result
 
-    def execute(self, tagged_tokens, cache, client):
+    def _execute(self, tagged_tokens, cache, client):
         """
         Processes user queries that ask a basic "domain / range" question. In the context of RDF triples, the user
         should prompt a property_label, which will match all property_labels that match the criteria and return their
@@ -331,10 +645,11 @@ class DomainRangeStrategy(NLPStrategy):
             # SUCCESS match single option
             if tagged_tokens[0] in self._disambiguation_options:
                 selected_uri = self._disambiguation_options[tagged_tokens[0]]
-                result = client.domain_range_query(
-                    property=selected_uri,
+                results = yield client.domain_range_batch_query(
+                    [selected_uri],
                     property_label=self._disambiguation_prop_label["prop"],
                 )
+                result = results.get(selected_uri.strip("<>"), [])
                 property_label, domain_label, range_label = self._assign_labels(
                     self._disambiguation_prop_label["prop"], result
                 )
@@ -346,7 +661,7 @@ class DomainRangeStrategy(NLPStrategy):
 
             # SUCCESS match all-of-the-above option
             elif tagged_tokens[0] == "all of the above":
-                filtered_result = self._show_all(
+                filtered_result = yield from self._show_all(
                     client, self._disambiguation_prop_label["prop"]
                 )
                 return (filtered_result, 1)
@@ -395,13 +710,16 @@ class DomainRangeStrategy(NLPStrategy):
 
             # query via property label
             prop = tagged_tokens[property_index][0].strip('"')
-            result = client.domain_range_query(property_label=prop)
+            properties = yield from self._resolve_label(client, prop, "property")
+            result = yield client.domain_range_query(
+                property_label=prop, properties=properties
+            )
             # NO RESULTS
             if len(result) == 0:
                 filtered_result[
                     "response"
                 ] = f"Unable to find information for domain/range of '{prop}'"
-                return (filtered_result, 1)
+                return (self._add_suggestions(filtered_result, prop, "property"), 1)
 
             property_label, domain_label, range_label = self._assign_labels(
                 prop, result
@@ -520,6 +838,16 @@ class FilterDecorator:
 
 
 class SubSuperStrategy(NLPStrategy):
+    def __init__(self, transitive=False, check=False, **indexes):
+        """
+        Args:
+            transitive: list every direct and indirect sub/super-class rather than the direct ones
+            check: answer "Is A a subclass of B?" from the tokens [(A, "NN"), ("subclass", "NN"), (B, "NN")]
+        """
+        super().__init__(**indexes)
+        self._transitive = transitive
+        self._check = check
+
     def _send_subsuper_error(self):
         """
         Send back a response message to the user asking them to reformat their sub/super-class query.
@@ -533,7 +861,7 @@ class SubSuperStrategy(NLPStrategy):
         ] = f"Sorry, phrase your query as 'What are the sub/super-classes of __?'"
         return filtered_result
 
-    def execute(self, tagged_tokens, cache, client):
+    def _execute(self, tagged_tokens, cache, client):
         """
         Processes user queries that ask a basic "sub / super-class" question. In the context of RDF triples, the user
         should prompt a property_label, which will match all property_labels that match the criteria and return their
@@ -547,6 +875,9 @@ class SubSuperStrategy(NLPStrategy):
             filtered_result: A dict containing a response english string
             status: A boolean for whether query requires disambiguation
         """
+        if self._check:
+            return (yield from self._check_subclass(client, *tagged_tokens))
+
         filtered_result = {}
 
         # extract subclass OR superclass index from tokens
@@ -578,72 +909,145 @@ class SubSuperStrategy(NLPStrategy):
         if (("subclass", "NN") in tagged_tokens) or (
             ("subclasses", "VBZ") in tagged_tokens
         ):
-            uri = tagged_tokens[uri_index][0].strip('"')
-            result = client.subclass_query(super=uri)
-            subclasses = []
-
-            # NO RESULTS
-            if len(result) == 0:
-                filtered_result[
-                    "response"
-                ] = f"Unable to find information for subclasses of '{uri}'"
-                return (filtered_result, 1)
-
-            # extract subclasses for specified superclass
-            for entity in result:
-                for key, dic in entity.items():
-                    if key == "sub":
-                        subclasses.append(dic["value"])
-
-            # create response object with all subclasses
-            collected_response = f"The subclasses for '{uri}' are:<br>"
-
-            tabstr = "&nbsp;" * 4
-            for sub in subclasses[:-1]:
-                collected_response += tabstr + f"- {sub} <br> "
-            collected_response += (
-                "" if len(subclasses) < 1 else tabstr + f"- {subclasses[-1]} <br> "
+            uri = self._class_uri(tagged_tokens[uri_index])
+            return (
+                yield from self._list_classes(
+                    client, "subclass", uri, transitive=self._transitive
+                )
             )
 
-            filtered_result["response"] = collected_response
-            return (filtered_result, 1)
-
         # (2) SUPERCLASS state
         elif (("superclass", "NN") in tagged_tokens) or (
             ("superclasses", "VBZ") in tagged_tokens
         ):
-            uri = tagged_tokens[uri_index][0].strip('"')
-            result = client.superclass_query(sub=uri)
-            superclasses = []
+            uri = self._class_uri(tagged_tokens[uri_index])
+            return (
+                yield from self._list_classes(
+                    client, "superclass", uri, transitive=self._transitive
+                )
+            )
+        # (3) POORLY FORMATTED QUERY
+        else:
+            return (self._send_subsuper_error(), 1)
 
-            # NO RESULTS
-            if len(result) == 0:
-                filtered_result[
-                    "response"
-                ] = f"Unable to find information for superclasses of '{uri}'"
-                return (filtered_result, 1)
+    @staticmethod
+    def _class_uri(token):
+        # quoted uris keep their quotes and bare ones come in angle brackets, as the hierarchy and the
+        # templates take the uri alone
+        return token[0].strip('"').strip("<>")
+
+    def _page(self, state, client):
+        return (
+            yield from self._list_classes(
+                client,
+                state["kind"],
+                state["uri"],
+                state["offset"],
+                state["transitive"],
+            )
+        )
 
-            # extract superclasses for specified subclass
-            for entity in result:
-                for key, dic in entity.items():
-                    if key == "super":
-                        superclasses.append(dic["value"])
+    def _load_hierarchy(self, client):
+        if not self._hierarchy.loaded:
+            self._hierarchy.load((yield client.subclass_edges_query()))
 
-            # create response object with all subclasses
-            collected_response = f"The superclasses for '{uri}' are:<br>"
+    def _list_classes(self, client, kind, uri, offset=0, transitive=False):
+        """
+        Fetches one page of the subclasses or superclasses of a class uri and renders it. Transitive
+        listings are read off the in-memory hierarchy without a round trip to Fuseki. Direct listings are
+        still asked to Fuseki, as the hierarchy only holds edges between named classes and would leave out
+        blank node subclasses such as restrictions.
+
+        Args:
+            kind: either "subclass" or "superclass"
+            uri: the class uri
+            offset: number of classes listed on previous pages
+            transitive: list indirect sub/super-classes too
 
-            tabstr = "&nbsp;" * 4
-            for super in superclasses[:-1]:
-                collected_response += tabstr + f"- {super} <br> "
-            collected_response += (
-                "" if len(superclasses) < 1 else tabstr + f"- {superclasses[-1]} <br> "
+        Returns:
+            filtered_result: A dict containing a response english string, and a "next" cursor when there
+                are more classes
+            status: A boolean for whether query requires disambiguation
+        """
+        if transitive:
+            yield from self._load_hierarchy(client)
+            related = (
+                self._hierarchy.subclasses
+                if kind == "subclass"
+                else self._hierarchy.superclasses
             )
+            classes = related(uri, None)
+            classes = classes[offset : offset + PAGE_SIZE + 1]
+        else:
+            if kind == "subclass":
+                result = yield client.subclass_query(
+                    super=uri, limit=PAGE_SIZE + 1, offset=offset
+                )
+                variable = "sub"
+            else:
+                result = yield client.superclass_query(
+                    sub=uri, limit=PAGE_SIZE + 1, offset=offset
+                )
+                variable = "super"
+            # extract sub/super-classes for specified class
+            classes = [
+                dic["value"]
+                for entity in result
+                for key, dic in entity.items()
+                if key == variable
+            ]
+        filtered_result = {}
 
-            filtered_result["response"] = collected_response
+        # NO RESULTS
+        if len(classes) == 0:
+            filtered_result["response"] = (
+                f"Unable to find information for {kind}es of '{uri}'"
+                if offset == 0
+                else NO_MORE_RESULTS
+            )
             return (filtered_result, 1)
-        # (3) POORLY FORMATTED QUERY
+
+        classes, cursor = self._paginate(
+            classes, offset, kind=kind, uri=uri, transitive=transitive
+        )
+
+        # create response object with all classes
+        if offset > 0:
+            collected_response = f"More {kind}es for '{uri}':<br>"
+        elif transitive:
+            collected_response = f"All {kind}es for '{uri}' are:<br>"
         else:
-            return (self._send_subsuper_error(), 1)
+            collected_response = f"The {kind}es for '{uri}' are:<br>"
+
+        tabstr = "&nbsp;" * 4
+        for c in classes:
+            collected_response += tabstr + f"- {c} <br> "
+
+        filtered_result["response"] = collected_response
+        return (self._add_cursor(filtered_result, cursor), 1)
+
+    def _check_subclass(self, client, first, kind, second):
+        """
+        Answers whether one class is a direct or indirect subclass, or superclass, of another with a single
+        lookup in the hierarchy's closure.
+
+        Returns:
+            filtered_result: A dict containing a yes/no response english string
+            status: A boolean for whether query requires disambiguation
+        """
+        first, second = self._class_uri(first), self._class_uri(second)
+        kind = kind[0]
+        yield from self._load_hierarchy(client)
+        if kind == "subclass":
+            related = self._hierarchy.is_subclass(first, second)
+        else:
+            related = self._hierarchy.is_subclass(second, first)
+        answer = "Yes" if related else "No"
+        negation = "" if related else " not"
+        return (
+            {"response": f"{answer}, '{first}' is{negation} a {kind} of '{second}'."},
+            1,
+        )
 
 
 class AssemblyBaseStrategy(NLPStrategy):
@@ -672,6 +1076,10 @@ class AssemblyBaseStrategy(NLPStrategy):
                 processed.append(fs)
         return " ".join(processed)
 
+    def _load_masses(self, client):
+        if not self._masses.loaded:
+            self._masses.load((yield client.assembly_masses_query()))
+
     def _returnProcessedList(self, name: str, result_list: list):
         filtered_result = ""
 
@@ -687,12 +1095,12 @@ class AssemblyBaseStrategy(NLPStrategy):
             filtered_result += tabstr + f"- {func} <br> "
         return filtered_result
 
-    def execute(self, tokens, cache, client):
+    def _execute(self, tagged_tokens, cache, client):
         pass
 
 
 class MassFunctionStrategy(AssemblyBaseStrategy):
-    def execute(self, tagged_tokens, cache, client):
+    def _execute(self, tagged_tokens, cache, client):
         """
         Assembly query handles the quesition related to the "mass / function" of a particular assembly object.
         Users should provide an assembly object with "id" specified, associated mass (int) or function (list)
@@ -717,7 +1125,18 @@ class MassFunctionStrategy(AssemblyBaseStrategy):
 
         id_index = tagged_tokens.index(("id", "NN"))
         id = tagged_tokens[id_index + 1][0]
-        results = client.assembly_query(id=str(id))
+
+        # a question about the mass alone is answered from the mass index
+        if ("mass", "NN") in tagged_tokens and ("function", "NN") not in tagged_tokens:
+            yield from self._load_masses(client)
+            masses = self._masses.values_of(str(id))
+            if masses:
+                filtered_result["response"] = (
+                    f"For assembly object {id}: <br>\n The mass is {masses[0]} kg. <br>\n "
+                )
+                return (filtered_result, 1)
+
+        results = yield client.assembly_query(id=str(id))
 
         if len(results) == 0:
             filtered_result[
@@ -748,7 +1167,15 @@ class MassFunctionStrategy(AssemblyBaseStrategy):
 
 
 class FilterMassStrategy(AssemblyBaseStrategy):
-    def execute(self, tagged_tokens, cache, client):
+    def __init__(self, count=False, **indexes):
+        """
+        Args:
+            count: answer how many assemblies lie within the mass range instead of listing them
+        """
+        super().__init__(**indexes)
+        self._count = count
+
+    def _execute(self, tagged_tokens, cache, client):
         """
         Assembly query handles the quesition related to the mass range of a particular assembly object.
         Users should provide an range with keywords like "heavier"/"lighter" specified, associated assembly
@@ -764,6 +1191,11 @@ class FilterMassStrategy(AssemblyBaseStrategy):
 
         filtered_result = {}
 
+        words = [token[0].lower() for token in tagged_tokens]
+        if "heaviest" in words or "lightest" in words:
+            n = next((int(word) for word in words if word.isdigit()), 1)
+            return (yield from self._list_extremes(client, "heaviest" in words, n))
+
         heavier_index = self._checkExist(tagged_tokens, ("heavier", "JJR"))
 
         lighter_index = -1
@@ -782,73 +1214,306 @@ class FilterMassStrategy(AssemblyBaseStrategy):
             filtered_result["response"] = "Please enter a valid mass range"
             return (filtered_result, 1)
 
-        filter_decorator = FilterDecorator(upper, lower)
-        results = client.assembly_query(decorator=filter_decorator)
+        if self._count:
+            return (yield from self._count_assemblies(client, upper, lower))
+        return (yield from self._list_assemblies(client, upper, lower))
 
-        if len(results) == 0:
-            filtered_result[
-                "response"
-            ] = f"Unable to find information for subjects within this range"
+    def _page(self, state, client):
+        return (
+            yield from self._list_assemblies(
+                client, state["upper"], state["lower"], state["offset"]
+            )
+        )
+
+    def _list_assemblies(self, client, upper, lower, offset=0):
+        """
+        Fetches one page of the assemblies within a mass range and renders it.
+
+        Args:
+            upper: upper mass bound, -1 meaning unbounded
+            lower: lower mass bound, -1 meaning unbounded
+            offset: number of assemblies listed on previous pages
+
+        Returns:
+            filtered_result: A dict containing a response english string, and a "next" cursor when there
+                are more assemblies
+            status: A boolean for whether query requires disambiguation
+        """
+        filtered_result = {}
+        yield from self._load_masses(client)
+        if self._masses.loaded:
+            assembly_list = self._masses.range(*self._bounds(upper, lower))
+            assembly_list = assembly_list[offset : offset + PAGE_SIZE + 1]
+        else:
+            results = yield client.assembly_range_query(
+                FilterDecorator(upper, lower), limit=PAGE_SIZE + 1, offset=offset
+            )
+            assembly_list = [result["assembly"]["value"] for result in results]
+
+        if len(assembly_list) == 0:
+            filtered_result["response"] = (
+                f"Unable to find information for subjects within this range"
+                if offset == 0
+                else NO_MORE_RESULTS
+            )
             return (filtered_result, 1)
 
-        assembly_list = []
-        for result in results:
-            for k, v in result.items():
-                if k != "assembly":
-                    continue
-                if v["value"] in assembly_list:
-                    continue
-                assembly_list.append(v["value"])
+        assembly_list, cursor = self._paginate(
+            assembly_list, offset, upper=upper, lower=lower
+        )
 
         filtered_result["response"] = self._returnProcessedList(
             "subject", assembly_list
         )
-        return (filtered_result, 1)
+        return (self._add_cursor(filtered_result, cursor), 1)
+
+    def _bounds(self, upper, lower):
+        # the index takes (lower, upper) with None, not -1, as unbounded
+        return (None if lower == -1 else lower, None if upper == -1 else upper)
+
+    def _count_assemblies(self, client, upper, lower):
+        """
+        Counts the assemblies within a mass range.
+
+        Returns:
+            filtered_result: A dict containing a response english string
+            status: A boolean for whether query requires disambiguation
+        """
+        yield from self._load_masses(client)
+        if self._masses.loaded:
+            count = self._masses.count(*self._bounds(upper, lower))
+        else:
+            results = yield client.assembly_range_query(FilterDecorator(upper, lower))
+            count = len(results)
+
+        if count == 1:
+            response = "There is 1 subject within this range."
+        else:
+            response = f"There are {count} subjects within this range."
+        return ({"response": response}, 1)
+
+    def _list_extremes(self, client, heaviest, n):
+        """
+        Lists the n heaviest or lightest assemblies along with their mass.
+
+        Returns:
+            filtered_result: A dict containing a response english string
+            status: A boolean for whether query requires disambiguation
+        """
+        yield from self._load_masses(client)
+        found = self._masses.largest(n) if heaviest else self._masses.smallest(n)
+        if not found:
+            return ({"response": "Unable to find information about assembly masses"}, 1)
+
+        superlative = "heaviest" if heaviest else "lightest"
+        if len(found) == 1:
+            response = f"The {superlative} subject is: <br> "
+        else:
+            response = f"The {len(found)} {superlative} subjects are: <br> "
+
+        tabstr = "&nbsp;" * 4
+        for uri, mass in found:
+            response += tabstr + f"- {self._processURI(uri)} ({mass} kg) <br> "
+        return ({"response": response}, 1)
 
 
 class NaturalLanguageQueryExecutor:
-    def __init__(self, client):
+    # strategies that can continue a listing from a cursor, by class name
+    _PAGED_STRATEGIES = {
+        strategy.__name__: strategy
+        for strategy in (
+            DomainRangePropertyStrategy,
+            SubSuperStrategy,
+            FilterMassStrategy,
+        )
+    }
+
+    # the Strategy reported in metrics for each strategy class
+    _STRATEGY_KINDS = {
+        WhatStrategy: Strategy.WHAT,
+        DomainRangeStrategy: Strategy.DOMAIN_RANGE,
+        DomainRangePropertyStrategy: Strategy.DOMAIN_RANGE_PROPERTY,
+        MassFunctionStrategy: Strategy.ASSEMBLY,
+        FilterMassStrategy: Strategy.FILTER_ASSEMBLY,
+        SubSuperStrategy: Strategy.SUBSUPER,
+    }
+    _STRATEGY_CLASSES = {kind: strategy for strategy, kind in _STRATEGY_KINDS.items()}
+
+    def __init__(
+        self, client, parse_cache_size: int = 1024, parse_pool=None, sessions=None
+    ):
+        """
+        Args:
+            client: a FusekiClient, AsyncFusekiClient or LocalFusekiClient
+            parse_cache_size: number of NLTK parses kept, by normalized question, 0 disables the cache
+            parse_pool: a parsing.ParsePool tokenizing and tagging questions in worker processes, by
+                default they are parsed in the calling thread
+            sessions: a MemorySessionStore or SQLiteSessionStore holding the state of each
+                conversation, by default a MemorySessionStore
+        """
         self.client = client
-        self.predicate_cache = dict()
+        self.parse_pool = parse_pool
+        # parses never go stale, so entries only leave the cache when it is full or cleared
+        self.parse_cache = ResultCache(maxsize=parse_cache_size, ttl=float("inf"))
+        self.sessions = sessions if sessions is not None else MemorySessionStore()
         self._query_cache = dict()
-        self._strategy_state = Strategy.NONE
+        # shared by all strategies, loaded by `warmup` or lazily by the first question needing them
+        self.predicate_index = PredicateIndex()
+        self.label_index = LabelIndex()
+        self.class_hierarchy = ClassHierarchy()
+        self.mass_index = QuantityIndex("mass")
+        # the indexes are built from query results, so they go stale along with the client's cache
+        on_invalidate = getattr(client, "on_invalidate", None)
+        if on_invalidate is not None:
+            on_invalidate(self.drop_indexes)
+
+    def drop_indexes(self):
+        """
+        Empties the indexes and the class hierarchy, which the next questions needing them fetch again.
+        Called whenever the client's cache is invalidated or its dataset reloaded.
+        """
+        for index in (
+            self.predicate_index,
+            self.label_index,
+            self.class_hierarchy,
+            self.mass_index,
+        ):
+            # an empty result leaves an index unloaded
+            index.load(())
+
+    def warmup(self):
+        """
+        Builds the predicate, label and mass indexes and the class hierarchy ahead of the first question.
+        Call it again to pick up predicates, labels, classes and assemblies added to the dataset since.
+        """
+        self.predicate_index.refresh(self.client)
+        self.label_index.refresh(self.client)
+        self.class_hierarchy.refresh(self.client)
+        self.mass_index.refresh(self.client)
+
+    def _create(self, strategy, session=None, **options):
+        return strategy(
+            predicates=self.predicate_index,
+            labels=self.label_index,
+            hierarchy=self.class_hierarchy,
+            masses=self.mass_index,
+            session=session,
+            **options,
+        )
 
     def query(self, query: Query):
+        with STAGE_LATENCY.labels("dispatch").time():
+            self._prepare(query)
+        try:
+            return self.process_query(query)
+        finally:
+            self.sessions.put(query.session_id, query.session)
+
+    async def query_async(self, query: Query):
+        """
+        Same as `query`, for executors built around an AsyncFusekiClient. Fuseki round trips are awaited
+        instead of blocking, so many questions can be answered concurrently on one event loop.
+        """
+        with STAGE_LATENCY.labels("dispatch").time():
+            self._prepare(query)
+        try:
+            return await self.process_query_async(query)
+        finally:
+            self.sessions.put(query.session_id, query.session)
+
+    def _prepare(self, query: Query):
+        session = self.sessions.get(query.session_id)
+        strategy_state = Strategy[session["strategy"]]
+        query.set_session(session)
         query.set_client(self.client)
-        query.set_cache(self.predicate_cache)
+        query.set_cache(session["predicates"])
+
+        # "show more" continues the last paginated answer
+        if (
+            query.cursor is None
+            and strategy_state == Strategy.NONE
+            and _SHOW_MORE.fullmatch(query.user_input)
+        ):
+            if session["next_cursor"] is None:
+                query.set_tokens([])
+                query.set_strategy(NoMoreResultsStrategy())
+                return
+            query.set_cursor(session["next_cursor"])
+        if query.cursor is not None:
+            query.set_tokens([])
+            query.set_strategy(self._paged_strategy(query.cursor))
+            return
+
+        # "Is A a subclass of B?" is answered from the class hierarchy without parsing
+        check = strategy_state == Strategy.NONE and _IS_SUBCLASS.fullmatch(
+            query.user_input
+        )
+        if check:
+            query.set_tokens(
+                [
+                    (check["first"], "NN"),
+                    (check["kind"].lower() + "class", "NN"),
+                    (check["second"], "NN"),
+                ]
+            )
+            query.set_strategy(self._create(SubSuperStrategy, session, check=True))
+            return
 
         # only parse input if not disambiguating
-        if self._strategy_state == Strategy.NONE:
-            query.set_tokens(self._parse(query.user_input))
+        if strategy_state == Strategy.NONE:
+            # the documented question shapes are recognized without NLTK
+            with STAGE_LATENCY.labels("parse").time():
+                parsed = TEMPLATES.match(query.user_input)
+                if parsed is None:
+                    query.set_tokens(self._parse_cached(query.user_input))
+            if parsed is not None:
+                kind = Strategy[parsed.strategy]
+                query.set_tokens(list(parsed.tokens))
+                query.set_strategy(
+                    self._create(
+                        self._STRATEGY_CLASSES[kind], session, **parsed.options
+                    )
+                )
+                session["strategy"] = kind.name
+                return
         else:
             query.set_tokens([query.user_input.strip()])
 
         # set query strategy
         # 1) DOMAIN_RANGE_PROPERTY
-        if (self._strategy_state == Strategy.DOMAIN_RANGE_PROPERTY) or (
+        if (strategy_state == Strategy.DOMAIN_RANGE_PROPERTY) or (
             (("property", "NN") in query.tokens)
             or (("properties", "NNS") in query.tokens)
         ):
-            query.set_strategy(DomainRangePropertyStrategy())
-            self._strategy_state = Strategy.DOMAIN_RANGE_PROPERTY
+            query.set_strategy(self._create(DomainRangePropertyStrategy, session))
+            session["strategy"] = Strategy.DOMAIN_RANGE_PROPERTY.name
         # 2) DOMAIN_RANGE
-        elif (self._strategy_state == Strategy.DOMAIN_RANGE) or (
+        elif (strategy_state == Strategy.DOMAIN_RANGE) or (
             (("domain", "NN") in query.tokens) or (("range", "NN") in query.tokens)
         ):
-            query.set_strategy(DomainRangeStrategy())
-            self._strategy_state = Strategy.DOMAIN_RANGE
+            query.set_strategy(self._create(DomainRangeStrategy, session))
+            session["strategy"] = Strategy.DOMAIN_RANGE.name
         # 3) ASSEMBLY
-        elif (("mass", "NN") in query.tokens) or (("function", "NN") in query.tokens):
-            query.set_strategy(MassFunctionStrategy())
-            self._strategy_state = Strategy.ASSEMBLY
+        elif not _EXTREME_MASS.search(query.user_input) and (
+            (("mass", "NN") in query.tokens) or (("function", "NN") in query.tokens)
+        ):
+            query.set_strategy(self._create(MassFunctionStrategy, session))
+            session["strategy"] = Strategy.ASSEMBLY.name
         # 4) FILTER_ASSEMBLY
         elif (
-            (("heavier", "JJR") in query.tokens)
+            _EXTREME_MASS.search(query.user_input)
+            or (("heavier", "JJR") in query.tokens)
             or (("lighter", "RB") in query.tokens)
             or (("lighter", "JJR") in query.tokens)
         ):
-            query.set_strategy(FilterMassStrategy())
-            self._strategy_state = Strategy.FILTER_ASSEMBLY
+            query.set_strategy(
+                self._create(
+                    FilterMassStrategy,
+                    session,
+                    count=bool(_HOW_MANY.search(query.user_input)),
+                )
+            )
+            session["strategy"] = Strategy.FILTER_ASSEMBLY.name
         # 5) SUBSUPER
         elif (
             (("subclass", "NN") in query.tokens)
@@ -856,18 +1521,63 @@ class NaturalLanguageQueryExecutor:
             or (("superclass", "NN") in query.tokens)
             or (("superclasses", "VBZ") in query.tokens)
         ):
-            query.set_strategy(SubSuperStrategy())
-            self._strategy_state = Strategy.SUBSUPER
+            query.set_strategy(
+                self._create(
+                    SubSuperStrategy,
+                    session,
+                    transitive=bool(_ALL_CLASSES.search(query.user_input)),
+                )
+            )
+            session["strategy"] = Strategy.SUBSUPER.name
         # 6) WHAT
-        elif (self._strategy_state == Strategy.WHAT) or (
+        elif (strategy_state == Strategy.WHAT) or (
             query.tokens[0][0] == "What" and len(query.tokens) >= 3
         ):
-            query.set_strategy(WhatStrategy())
-            self._strategy_state = Strategy.WHAT
-
-        return self.process_query(query)
+            query.set_strategy(self._create(WhatStrategy, session))
+            session["strategy"] = Strategy.WHAT.name
 
     def process_query(self, query: Query):
+        query.strategy_name = self._strategy_name(query)
+        cached = self._cached_result(query)
+        if cached is not None:
+            query.status = ANSWERED
+            return cached
+
+        # Use status to enforce continued query for disambiguation
+        try:
+            with STRATEGY_LATENCY.labels(query.strategy_name).time():
+                result, status = query.execute()
+        except BackendUnavailable as e:
+            query.status = UNAVAILABLE
+            return self._unavailable(query, e)
+        query.status = ANSWERED if status else DISAMBIGUATING
+        return self._complete(result, status, query)
+
+    async def process_query_async(self, query: Query):
+        query.strategy_name = self._strategy_name(query)
+        cached = self._cached_result(query)
+        if cached is not None:
+            query.status = ANSWERED
+            return cached
+
+        try:
+            with STRATEGY_LATENCY.labels(query.strategy_name).time():
+                result, status = await query.execute_async()
+        except BackendUnavailable as e:
+            query.status = UNAVAILABLE
+            return self._unavailable(query, e)
+        query.status = ANSWERED if status else DISAMBIGUATING
+        return self._complete(result, status, query)
+
+    def _strategy_name(self, query: Query) -> str:
+        strategy = type(getattr(query, "_strategy", None))
+        return self._STRATEGY_KINDS.get(strategy, Strategy.NONE).name
+
+    def _paged_strategy(self, cursor: str):
+        # raises InvalidCursor for a token no strategy made, before anything was answered
+        return self._create(self._PAGED_STRATEGIES[decode_cursor(cursor)["strategy"]])
+
+    def _cached_result(self, query: Query):
         if len(query.tokens) > 2:
             # Identifying subject and predicate
             subject = query.tokens[1][
@@ -879,15 +1589,46 @@ class NaturalLanguageQueryExecutor:
             # Checking if previous query was made already
             if (subject, predicate) in self._query_cache:
                 return self._query_cache[(subject, predicate)]
+        return None
 
-        # Use status to enforce continued query for disambiguation
-        result, status = query.execute()
+    def _unavailable(self, query: Query, error):
+        # the question can be asked again as is, so a disambiguation in progress is kept, while a
+        # strategy chosen for this question only must not route the next one
+        logger.warning("Answering %r failed: %s", query.user_input, error)
+        query.session["strategy"] = query.prior_strategy
+        return {"response": BACKEND_UNAVAILABLE}
 
+    def _complete(self, result, status, query: Query = None):
         if status:
-            self._strategy_state = Strategy.NONE
+            # an answer given outside of `query` continues the default session
+            session = (
+                query.session
+                if query is not None
+                else self.sessions.get(DEFAULT_SESSION)
+            )
+            session["strategy"] = Strategy.NONE.name
+            session["next_cursor"] = result.get("next")
+            if query is None:
+                self.sessions.put(DEFAULT_SESSION, session)
 
         return result
 
+    def _parse_cached(self, text: str) -> list:
+        """
+        `_parse` behind the parse cache, so that a question asked again skips NLTK. The tagged tokens
+        are stored as tuples, which strategies cannot change for later questions.
+        """
+        key = normalize_question(text)
+        tokens = self.parse_cache.get(key)
+        PARSE_CACHE_LOOKUPS.labels("hit" if tokens is not None else "miss").inc()
+        if tokens is None:
+            tokens = tuple(tuple(token) for token in self._parse(key))
+            self.parse_cache.put(key, tokens)
+        return list(tokens)
+
+    def clear_parse_cache(self):
+        self.parse_cache.invalidate()
+
     def _parse(self, text: str) -> list:
         """
         Tokenizes and tags a string of words, while also filtering out stop words
@@ -901,61 +1642,6 @@ class NaturalLanguageQueryExecutor:
             A list of 2-tuples representing the filtered and tokenized sentence. Format: ("word", "parts-of-speech tag")
                 Ex: [('What', 'WP'), ('mission', 'NN'), ('description', 'NN'), ('?', '.')]
         """
-        # Replace all urls with "unique" string
-        regex = r"(?i)\b((?:https?://|www\d{0,3}[.]|[a-z0-9.\-]+[.][a-z]{2,4}/)(?:[^\s()<>]+|\(([^\s()<>]+|(\([^\s()<>]+\)))*\))+(?:\(([^\s()<>]+|(\([^\s()<>]+\)))*\)|[^\s`!()\[\]{};:'\".,<>?«»“”‘’]))"
-        urls = re.findall(regex, text)
-        text_spaced = text.strip().split(" ")
-        replacements = dict()
-        for i, t in enumerate(text_spaced):
-            if bool(re.match(regex, t)):
-                unique_string = f"SUPER_SPECIAL_UNIQUE_URL{i}"
-                replacements[unique_string] = text_spaced[i]
-                text_spaced[i] = unique_string
-
-        # Replace quoted string with "quotation" string
-        unique_string = None
-        quote_token = ""
-        in_quote = False
-        quote_counter = 0
-        for i, t in enumerate(text_spaced):
-            # single-word quote case
-            if t[0] == '"' and (t[-1] == '"' or t[-2] == '"'):
-                unique_string = f"QUOTATION{i}"
-                replacements[unique_string] = t
-                text_spaced[int(unique_string[-1])] = unique_string
-                quote_counter += 1
-            # multi-word quote case
-            elif t[0] == '"':
-                unique_string = f"QUOTATION{i}"
-                quote_token += t + " "
-                in_quote = True
-                quote_counter += 1
-            elif in_quote and (t[-1] == '"' or t[-2] == '"'):
-                quote_token += t
-                replacements[unique_string] = quote_token
-                text_spaced[int(unique_string[-1])] = unique_string
-                in_quote = False
-            elif in_quote:
-                quote_token += t + " "
-                quote_counter += 1
-
-        if quote_token:
-            text_spaced = text_spaced[:-quote_counter]
-        text = " ".join(text_spaced)
-
-        # Tokenize user query
-        tokens = nltk.word_tokenize(text)
-
-        # Replace placeholders with original links
-        for i, token in enumerate(tokens):
-            if token in replacements and token.startswith("QUOTATION"):
-                tokens[i] = f'{replacements[token].strip("?,.")}'
-            elif token in replacements:
-                tokens[i] = f"<{replacements[token]}>"
-
-        # Filter redundant words
-        stop_words = stopwords.words("english")
-        filtered_tokens = [t for t in tokens if t not in stop_words]
-        # Tag parse
-        tagged_tokens = nltk.pos_tag(filtered_tokens)
-        return tagged_tokens
+        if self.parse_pool is not None:
+            return self.parse_pool.parse(text)
+        return parsing.parse(text)
@@ -0,0 +1,162 @@
+"""
+Recognizes the question shapes documented in the README without NLTK. Each rule of the grammar pairs a
+question pattern with the strategy answering it and the tagged tokens that strategy reads, so that a
+matched question skips tokenizing and tagging entirely. Questions no rule matches are parsed by NLTK.
+
+Patterns are words matched case-insensitively, with `(a|b)` groups, `?` for optional groups and
+`{name:type}` slots, where the type is one of SLOTS or a `|`-separated list of words. Tokens are
+space-separated `text/TAG` items: `{name}/TAG` emits the value of a slot if it matched, one token per
+word for word lists, and `word/TAG@name` emits a word only if slot `name` matched.
+"""
+
+import re
+from collections import namedtuple
+
+# a recognized question: the Strategy member name answering it, its options and its tagged tokens
+Parse = namedtuple("Parse", "strategy options tokens")
+
+Rule = namedtuple("Rule", "strategy pattern tokens options")
+
+# words routed to other strategies, which a "what" question's subject or predicate cannot be
+_KEYWORDS = (
+    r"(?:domain|range|mass|function|propert(?:y|ies)|heav|light|(?:sub|super)class)"
+)
+
+SLOTS = {
+    # a quoted phrase, kept quoted as the strategies strip quotes themselves, or a single word or url
+    "term": r'"[^"]+"|[^\s"<>]+',
+    "name": rf'(?!{_KEYWORDS})(?:"[^"]+"|[^\s"<>]+)',
+    "number": r"\d+(?:\.\d+)?",
+}
+
+RULES = (
+    Rule(
+        "DOMAIN_RANGE_PROPERTY",
+        "what (are|is) the (properties|property) of {kind:domain|range} {label:term}",
+        "properties/NNS {kind}/NN {label}/NN",
+        {},
+    ),
+    Rule(
+        "DOMAIN_RANGE",
+        "what is the {kind:domain and range|range and domain|domain|range} of {property:term}",
+        "What/WP {kind}/NN {property}/NN",
+        {},
+    ),
+    Rule(
+        "ASSEMBLY",
+        "what (is|are) the {kind:mass and function|function and mass|mass|function}"
+        " of (the )?(assembly )?(object )?id {id:number}",
+        "{kind}/NN id/NN {id}/CD",
+        {},
+    ),
+    Rule(
+        "FILTER_ASSEMBLY",
+        "({count:how many}|which|what) (subjects|assemblies) (are|is) heavier than"
+        " {lower:number}( kg)?( and lighter than {upper:number}( kg)?)?",
+        "heavier/JJR {lower}/CD lighter/JJR@upper {upper}/CD",
+        {"count": "count"},
+    ),
+    Rule(
+        "FILTER_ASSEMBLY",
+        "({count:how many}|which|what) (subjects|assemblies) (are|is) lighter than"
+        " {upper:number}( kg)?( and heavier than {lower:number}( kg)?)?",
+        "lighter/JJR {upper}/CD heavier/JJR@lower {lower}/CD",
+        {"count": "count"},
+    ),
+    Rule(
+        "FILTER_ASSEMBLY",
+        "(what|which) (is|are) the( {n:number})? {kind:heaviest|lightest}"
+        " (subjects|subject|assemblies|assembly)",
+        "{n}/CD {kind}/JJS",
+        {},
+    ),
+    Rule(
+        "SUBSUPER",
+        "what (are|is)( {all:all})?( the)?"
+        " ({sub:subclasses|subclass}|{super:superclasses|superclass}) of {uri:term}",
+        "subclasses/VBZ@sub superclasses/VBZ@super {uri}/NN",
+        {"transitive": "all"},
+    ),
+    Rule(
+        "WHAT",
+        "what (is|does)( the)? {subject:name} {predicate:name}",
+        "What/WP {subject}/NN {predicate}/NN",
+        {},
+    ),
+)
+
+_SLOT = re.compile(r"\{(\w+):([^}]+)\}")
+_URL = re.compile(r"(?i)(?:[a-z][a-z0-9+.\-]*://|www\d{0,3}\.)\S+")
+
+
+def _compile(number: int, rule: Rule) -> str:
+    slots = []
+
+    def hold(match):
+        # slot bodies are regular expressions of their own, kept aside while the words are rewritten
+        name, kind = match.groups()
+        body = SLOTS.get(kind) or kind.replace(" ", r"\s+")
+        slots.append(f"(?P<r{number}_{name}>{body})")
+        return f"\0{len(slots) - 1}\0"
+
+    pattern = _SLOT.sub(hold, rule.pattern)
+    pattern = pattern.replace("(", "(?:").replace(" ", r"\s+")
+    pattern = re.sub("\0(\\d+)\0", lambda m: slots[int(m[1])], pattern)
+    return f"(?P<r{number}>{pattern})"
+
+
+def _token_value(kind: str, value: str) -> list:
+    if kind in SLOTS:
+        # urls are passed on in angle brackets, like the NLTK parser does
+        return [f"<{value}>" if _URL.fullmatch(value) else value]
+    return [w.lower() for w in re.split(r"\s+(?:and|or)\s+|\s+", value)]
+
+
+class Grammar:
+    """
+    The rules compiled into a single regular expression, so that matching a question is one pass over
+    it whatever the number of rules.
+    """
+
+    def __init__(self, rules=RULES):
+        self._rules = rules
+        self._slots = [dict(_SLOT.findall(rule.pattern)) for rule in rules]
+        self._regex = re.compile(
+            "|".join(_compile(n, rule) for n, rule in enumerate(rules)), re.IGNORECASE
+        )
+
+    def match(self, text: str):
+        """
+        Returns:
+            The Parse of a question of a documented shape, or None for anything else
+        """
+        match = self._regex.fullmatch(text.strip().rstrip("?.! \t"))
+        if match is None:
+            return None
+        number = int(match.lastgroup[1:])
+        rule, slots = self._rules[number], self._slots[number]
+        values = {
+            name: match.group(f"r{number}_{name}")
+            for name in slots
+            if match.group(f"r{number}_{name}") is not None
+        }
+
+        tokens = []
+        for item in rule.tokens.split():
+            text, tag = item.split("/")
+            tag, _, condition = tag.partition("@")
+            if condition and condition not in values:
+                continue
+            if text.startswith("{"):
+                name = text[1:-1]
+                if name in values:
+                    tokens.extend(
+                        (word, tag) for word in _token_value(slots[name], values[name])
+                    )
+            else:
+                tokens.append((text, tag))
+        options = {option: slot in values for option, slot in rule.options.items()}
+        return Parse(rule.strategy, options, tuple(tokens))
+
+
+TEMPLATES = Grammar()
@@ -0,0 +1,135 @@
+class ClassHierarchy:
+    """
+    The rdfs:subClassOf graph of the dataset held in memory. Classes are numbered in uri order and the
+    direct edges are kept as adjacency lists of those numbers in both directions. The transitive closure is
+    materialized once as one bitset (a Python int) of descendants and one of ancestors per class, so
+    transitive listings are a scan of set bits and "is A a subclass of B" is a single bit test. Rebuilding
+    swaps the tables in one assignment, so readers on other threads never see a half-built hierarchy.
+    """
+
+    def __init__(self):
+        self._tables = ({}, [], [], [], [], [])
+        self.loaded = False
+
+    def load(self, rows):
+        """
+        Rebuilds the hierarchy from `subclass_edges_query` rows. An empty result leaves the hierarchy
+        unloaded so that it is fetched again on next use.
+        """
+        edges = {(row["sub"]["value"], row["super"]["value"]) for row in rows}
+        uris = sorted({uri for edge in edges for uri in edge})
+        ids = {uri: i for i, uri in enumerate(uris)}
+        children = [[] for _ in uris]
+        parents = [[] for _ in uris]
+        # edges are sorted so every adjacency list comes out in uri order
+        for sub, super in sorted(edges):
+            if sub != super:
+                children[ids[super]].append(ids[sub])
+                parents[ids[sub]].append(ids[super])
+        for adjacency in children:
+            adjacency.sort()
+        descendants = self._closure(children)
+        ancestors = self._closure(parents)
+        self._tables = (ids, uris, children, parents, descendants, ancestors)
+        self.loaded = bool(uris)
+
+    @staticmethod
+    def _closure(adjacency) -> list:
+        # visit every class after the classes it points to (reverse topological order) so that one pass
+        # settles an acyclic graph; classes on a cycle are settled by repeating the pass until nothing changes
+        pending = [len(targets) for targets in adjacency]
+        sources = [[] for _ in adjacency]
+        for node, targets in enumerate(adjacency):
+            for target in targets:
+                sources[target].append(node)
+        order = [node for node, count in enumerate(pending) if count == 0]
+        for node in order:
+            for source in sources[node]:
+                pending[source] -= 1
+                if pending[source] == 0:
+                    order.append(source)
+        seen = set(order)
+        order.extend(node for node in range(len(adjacency)) if node not in seen)
+
+        reach = [0] * len(adjacency)
+        changed = True
+        while changed:
+            changed = False
+            for node in order:
+                bits = reach[node]
+                for target in adjacency[node]:
+                    bits |= reach[target] | (1 << target)
+                if bits != reach[node]:
+                    reach[node] = bits
+                    changed = True
+        return reach
+
+    def refresh(self, client):
+        """
+        Fetches the subclass edges of the dataset again through a blocking client.
+        """
+        self.load(client.subclass_edges_query(use_cache=False))
+
+    def __contains__(self, uri: str) -> bool:
+        return uri in self._tables[0]
+
+    def subclasses(self, uri: str, depth: int = 1) -> list:
+        """
+        Lists the subclasses of a class in uri order.
+
+        Args:
+            uri: the class uri
+            depth: how many subClassOf steps to follow, 1 for direct subclasses, None for all of them
+        """
+        return self._related(uri, depth, children=True)
+
+    def superclasses(self, uri: str, depth: int = 1) -> list:
+        """
+        Lists the superclasses of a class in uri order.
+
+        Args:
+            uri: the class uri
+            depth: how many subClassOf steps to follow, 1 for direct superclasses, None for all of them
+        """
+        return self._related(uri, depth, children=False)
+
+    def is_subclass(self, sub: str, super: str) -> bool:
+        """
+        Tells whether `sub` is a direct or indirect subclass of `super`.
+        """
+        ids, _, _, _, descendants, _ = self._tables
+        if sub not in ids or super not in ids:
+            return False
+        return bool(descendants[ids[super]] >> ids[sub] & 1)
+
+    def _related(self, uri, depth, children):
+        ids, uris, down, up, descendants, ancestors = self._tables
+        node = ids.get(uri)
+        if node is None:
+            return []
+        if depth is None:
+            bits = (descendants if children else ancestors)[node] & ~(1 << node)
+            return [uris[i] for i in _set_bits(bits)]
+
+        adjacency = down if children else up
+        found = 0
+        frontier = [node]
+        for _ in range(depth):
+            level = 0
+            for current in frontier:
+                for target in adjacency[current]:
+                    level |= 1 << target
+            level &= ~found & ~(1 << node)
+            if not level:
+                break
+            found |= level
+            frontier = list(_set_bits(level))
+        return [uris[i] for i in _set_bits(found)]
+
+
+def _set_bits(bits: int):
+    # ascending positions of the set bits, which are class ids in uri order
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
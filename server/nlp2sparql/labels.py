@@ -0,0 +1,138 @@
+import re
+from bisect import bisect_left
+from collections import Counter, namedtuple
+
+LabelMatch = namedtuple("LabelMatch", "label iri kind vocabulary score")
+
+
+def normalize_label(label: str) -> str:
+    """
+    Case-folds a label and collapses its whitespace, ie. " Quantity  value" -> "quantity value".
+    """
+    return " ".join(label.casefold().split())
+
+
+def vocabulary(uri: str) -> str:
+    """
+    The namespace of a uri, ie. "http://imce.jpl.nasa.gov/foundation/analysis#" for analysis:Explains.
+    """
+    match = re.match(r".*[#/]", uri)
+    return match.group(0) if match else uri
+
+
+def _ngrams(text: str, n: int = 3) -> set:
+    # pad so that short labels and word boundaries still produce n-grams
+    text = f" {text} "
+    return {text[i : i + n] for i in range(max(len(text) - n + 1, 1))}
+
+
+class LabelIndex:
+    """
+    Maps the rdfs:label of every class and property in the dataset to the uris carrying it, so that the
+    labels users type can be resolved without asking Fuseki to scan label triples. Labels are looked up
+    exactly, by prefix over a sorted list of normalized labels, or fuzzily by character trigram overlap
+    through an inverted trigram index. Rebuilding swaps the tables in one assignment, so readers on other
+    threads never see a half-built index.
+    """
+
+    # minimum Dice coefficient between trigram sets for a fuzzy candidate
+    MIN_SIMILARITY = 0.4
+
+    def __init__(self):
+        self._tables = ({}, {}, [], {}, {})
+        self.loaded = False
+
+    def load(self, rows):
+        """
+        Rebuilds the index from `labels_query` rows. An empty result leaves the index unloaded so that it
+        is fetched again on next use.
+        """
+        exact, normalized, grams, sizes = {}, {}, {}, {}
+        for row in rows:
+            label = row["label"]["value"]
+            uri = row["subject"]["value"]
+            kind = row["kind"]["value"]
+            match = LabelMatch(label, uri, kind, vocabulary(uri), 1.0)
+            exact.setdefault(label, {})[(uri, kind)] = match
+            key = normalize_label(label)
+            if key not in normalized:
+                key_grams = _ngrams(key)
+                sizes[key] = len(key_grams)
+                for gram in key_grams:
+                    grams.setdefault(gram, set()).add(key)
+            normalized.setdefault(key, {})[(uri, kind)] = match
+        self._tables = (exact, normalized, sorted(normalized), grams, sizes)
+        self.loaded = bool(exact)
+
+    def refresh(self, client):
+        """
+        Fetches the labels of the dataset again through a blocking client.
+        """
+        self.load(client.labels_query(use_cache=False))
+
+    def resolve(self, label: str, kind: str = None) -> list:
+        """
+        Returns the uris whose label is exactly `label`, the way a `rdfs:label "..."` pattern matches.
+
+        Args:
+            label: the label as typed
+            kind: "class" or "property" to only resolve one kind of resource
+        """
+        exact = self._tables[0]
+        return list(
+            dict.fromkeys(
+                m.iri
+                for m in exact.get(label, {}).values()
+                if kind is None or m.kind == kind
+            )
+        )
+
+    def lookup(self, text: str, kind: str = None, limit: int = 5) -> list:
+        """
+        Ranks the labels closest to `text`: case-insensitive exact matches first, then labels starting with
+        it, then labels sharing enough character trigrams with it.
+
+        Args:
+            text: the label as typed
+            kind: "class" or "property" to only consider one kind of resource
+            limit: maximum number of candidates
+
+        Returns:
+            A list of LabelMatch tuples, best first
+        """
+        _, normalized, ordered, grams, sizes = self._tables
+        key = normalize_label(text)
+        if not key:
+            return []
+        scored = {}
+
+        def consider(candidate, score):
+            for match in normalized[candidate].values():
+                if kind is not None and match.kind != kind:
+                    continue
+                ident = (match.iri, match.kind)
+                if ident not in scored or scored[ident].score < score:
+                    scored[ident] = match._replace(score=score)
+
+        if key in normalized:
+            consider(key, 1.0)
+
+        start = bisect_left(ordered, key)
+        for i in range(start, len(ordered)):
+            candidate = ordered[i]
+            if not candidate.startswith(key):
+                break
+            if candidate != key:
+                consider(candidate, 0.5 + 0.4 * len(key) / len(candidate))
+
+        query_grams = _ngrams(key)
+        overlap = Counter(
+            candidate for gram in query_grams for candidate in grams.get(gram, ())
+        )
+        for candidate, shared in overlap.items():
+            score = 2 * shared / (len(query_grams) + sizes[candidate])
+            if score >= self.MIN_SIMILARITY:
+                consider(candidate, 0.9 * score)
+
+        ranked = sorted(scored.values(), key=lambda m: (-m.score, m.label, m.iri))
+        return ranked[:limit]
@@ -0,0 +1,52 @@
+"""
+Splits a question into the pieces NLTK must not tokenize on its own: IRIs, bare or in angle brackets,
+and quoted phrases of one or more words. Numbers are told apart too. The question is split into chunks
+in a single left to right pass, and each chunk is classified by anchored expressions in which every
+repeated group starts with a separator, a dot or a comma, that the repetition before it cannot match.
+None of them can match the same text in more than one way, so the time taken stays linear in the
+length of the input whatever it contains.
+"""
+
+import re
+from collections import namedtuple
+
+WORD, NUMBER, IRI, QUOTE = "WORD", "NUMBER", "IRI", "QUOTE"
+
+Lexeme = namedtuple("Lexeme", "kind text")
+
+# a quoted phrase runs to the next quote or, unterminated, to the end of the text
+_CHUNK = re.compile(r'"[^"]*"?|<[^\s<>"]*>|\S+')
+_URL = re.compile(
+    r"(?i)(?:[a-z][a-z0-9+.\-]*://|www\d{0,3}\.|[a-z0-9\-]+(?:\.[a-z0-9\-]+)*\.[a-z]{2,4}/)"
+)
+_NUMBER = re.compile(r"[+-]?\d+(?:[.,]\d+)*")
+# sentence punctuation after an IRI or a number is not part of it
+_TRAILING = "?!.,;:'\")]}"
+
+
+def lex(text: str) -> list:
+    """
+    Returns:
+        The Lexemes of the text in order. IRIs are given without angle brackets and quoted phrases with
+        their quotes, while words keep any attached punctuation for the tokenizer to split.
+    """
+    lexemes = []
+    for match in _CHUNK.finditer(text):
+        chunk = match.group()
+        if chunk[0] == '"' and len(chunk) > 1:
+            lexemes.append(Lexeme(QUOTE, chunk))
+        elif chunk[0] == "<" and len(chunk) > 2 and chunk[-1] == ">":
+            lexemes.append(Lexeme(IRI, chunk[1:-1]))
+        else:
+            body = chunk.rstrip(_TRAILING)
+            trailing = chunk[len(body) :]
+            if body and _URL.match(body):
+                lexemes.append(Lexeme(IRI, body))
+            elif body and _NUMBER.fullmatch(body):
+                lexemes.append(Lexeme(NUMBER, body))
+            else:
+                body, trailing = chunk, ""
+                lexemes.append(Lexeme(WORD, body))
+            if trailing:
+                lexemes.append(Lexeme(WORD, trailing))
+    return lexemes
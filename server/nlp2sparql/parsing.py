@@ -0,0 +1,179 @@
+"""
+Tokenizing and tagging questions, in this process or in a pool of worker processes. NLTK's tokenizer
+and tagger are pure Python and hold the GIL, so parsing in threads uses a single core however many
+requests are in flight; a ParsePool spreads it over processes, each loading the tagger once.
+"""
+
+import os
+import queue
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from . import lexer, resources
+
+
+def parse(text: str) -> list:
+    """
+    Tokenizes and tags a question, without its stop words.
+
+    Returns:
+        A list of ("word", "parts-of-speech tag") 2-tuples, urls in angle brackets and quoted phrases
+        as one token each
+    """
+    # Replace urls and quoted phrases with placeholders the tokenizer keeps whole
+    replacements = dict()
+    words = []
+    for i, lexeme in enumerate(lexer.lex(text)):
+        if lexeme.kind == lexer.IRI:
+            unique_string = f"SUPER_SPECIAL_UNIQUE_URL{i}"
+            replacements[unique_string] = f"<{lexeme.text}>"
+        elif lexeme.kind == lexer.QUOTE:
+            unique_string = f"QUOTATION{i}"
+            replacements[unique_string] = lexeme.text
+        else:
+            words.append(lexeme.text)
+            continue
+        words.append(unique_string)
+    text = " ".join(words)
+
+    # Tokenize user query
+    tokens = resources.word_tokenize(text)
+
+    # Replace placeholders with original links
+    tokens = [replacements.get(token, token) for token in tokens]
+
+    # Filter redundant words
+    stop_words = resources.stop_words()
+    filtered_tokens = [t for t in tokens if t not in stop_words]
+    # Tag parse
+    tagged_tokens = resources.pos_tag(filtered_tokens)
+    return tagged_tokens
+
+
+def _initialize():
+    # each worker loads the tokenizer, tagger and stop words once, before its first batch
+    try:
+        resources.load()
+    except LookupError:
+        # reported by every parse instead, like in the server process
+        pass
+
+
+def _parse_batch(texts: list) -> list:
+    results = []
+    for text in texts:
+        try:
+            results.append(parse(text))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+class ParsePool:
+    """
+    Parses questions in worker processes. Questions waiting together are sent to a worker in one batch,
+    so that a busy server pays the cost of passing work between processes once per batch rather than
+    once per question.
+    """
+
+    def __init__(self, workers: int = None, batch_size: int = 16):
+        """
+        Args:
+            workers: number of worker processes, by default one per core
+            batch_size: most questions sent to a worker at once
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # workers are spawned rather than forked, as forking a threaded server can copy held locks
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=get_context("spawn"),
+            initializer=_initialize,
+        )
+        self._queue = queue.SimpleQueue()
+        self._closed = False
+        # one batch in flight per worker, so that questions queue here while the workers are busy
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, name="parse-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def parse(self, text: str) -> list:
+        """
+        Returns:
+            The tagged tokens of `parse`, computed by a worker. Exceptions raised by the worker, such
+            as the LookupError of missing NLTK data, are raised here.
+        """
+        return self.submit(text).result()
+
+    def submit(self, text: str) -> Future:
+        if self._closed:
+            raise RuntimeError("the parse pool is closed")
+        future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def _dispatch(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._slots.acquire()
+            batch = [item]
+            # take whatever else queued while waiting for a free worker, up to a batch
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            try:
+                done = self._executor.submit(_parse_batch, [text for text, _ in batch])
+            except RuntimeError as e:
+                # BrokenProcessPool, once a worker died
+                self._slots.release()
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            done.add_done_callback(lambda done, batch=batch: self._resolve(done, batch))
+        # questions submitted while closing
+        while True:
+            try:
+                _, future = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            future.set_exception(RuntimeError("the parse pool is closed"))
+
+    def _resolve(self, done: Future, batch: list):
+        self._slots.release()
+        try:
+            results = done.result()
+        except Exception as e:
+            # a worker died, failing its whole batch
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def warmup(self):
+        # starts the workers, each loading NLTK, rather than leaving it to the first questions
+        wait([self._executor.submit(_parse_batch, []) for _ in range(self.workers)])
+
+    def close(self):
+        self._closed = True
+        self._queue.put(None)
+        self._dispatcher.join()
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
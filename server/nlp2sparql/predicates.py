@@ -0,0 +1,149 @@
+import re
+from collections import Counter, namedtuple
+
+import numpy as np
+
+from . import resources
+
+PredicateMatch = namedtuple("PredicateMatch", "uri name score")
+
+
+def local_name(uri: str) -> str:
+    """
+    The last segment of a predicate uri, ie. "description" for "http://purl.org/dc/elements/1.1/description".
+    """
+    # Split string with delimiters ('/' and '#')
+    return re.split(r"/|#", uri)[-1]
+
+
+def _words(name: str) -> str:
+    # "hasDoubleNumber" -> "has double number", so that names compare like the words users type
+    words = re.findall(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+", name)
+    return " ".join(words).lower() if words else name.lower()
+
+
+def _ngrams(text: str, sizes=(2, 3)) -> Counter:
+    # pad so that short words and word boundaries still produce n-grams
+    text = f" {text} "
+    return Counter(
+        text[i : i + n] for n in sizes for i in range(max(len(text) - n + 1, 1))
+    )
+
+
+class PredicateIndex:
+    """
+    Maps the local name of every predicate in the dataset, and the Porter stem of that name, to the full
+    predicate uris. The index is built once from a `SELECT DISTINCT ?predicate` and resolving the words of a
+    question to predicates is then a dictionary lookup. Words matching no name or stem, ie. "desc", are
+    scored against every predicate at once through a TF-IDF matrix of the character bigrams and trigrams of
+    their names. Rebuilding swaps the tables in one assignment, so readers on other threads never see a
+    half-built index.
+    """
+
+    # minimum cosine similarity between TF-IDF vectors for a similar predicate
+    MIN_SIMILARITY = 0.4
+
+    def __init__(self):
+        self._tables = ({}, {})
+        # built on first use of `similar`, and dropped whenever a predicate is added
+        self._vectors = None
+        self.loaded = False
+
+    def load(self, rows):
+        """
+        Rebuilds the index from `predicates_query` rows. An empty result leaves the index unloaded so that
+        it is fetched again on next use.
+        """
+        stem = resources.stemmer().stem
+        by_name, by_stem = {}, {}
+        for row in rows:
+            uri = row["predicate"]["value"]
+            name = local_name(uri)
+            by_name.setdefault(name, {})[uri] = None
+            by_stem.setdefault(stem(name), {})[uri] = None
+        self._tables = (by_name, by_stem)
+        self._vectors = None
+        self.loaded = bool(by_name)
+
+    def refresh(self, client):
+        """
+        Fetches the predicates of the dataset again through a blocking client.
+        """
+        self.load(client.predicates_query(use_cache=False))
+
+    def add(self, uri: str):
+        """
+        Records a predicate found outside of the index, ie. by a fallback scan.
+        """
+        by_name, by_stem = self._tables
+        name = local_name(uri)
+        stem = resources.stemmer().stem(name)
+        # copies, like `load`, as readers on other threads may be iterating the current tables
+        by_name = {**by_name, name: {**by_name.get(name, {}), uri: None}}
+        by_stem = {**by_stem, stem: {**by_stem.get(stem, {}), uri: None}}
+        self._tables = (by_name, by_stem)
+        self._vectors = None
+
+    def lookup(self, word: str) -> list:
+        """
+        Returns the uris of the predicates named `word`, followed by those whose name has the same stem.
+        """
+        by_name, by_stem = self._tables
+        matches = dict(by_name.get(word, {}))
+        matches.update(by_stem.get(resources.stemmer().stem(word), {}))
+        return list(matches)
+
+    def _vectorize(self):
+        tables = self._tables
+        by_name, _ = tables
+        uris = [uri for uris in by_name.values() for uri in uris]
+        counts = [_ngrams(_words(local_name(uri))) for uri in uris]
+        columns = {}
+        for grams in counts:
+            for gram in grams:
+                columns.setdefault(gram, len(columns))
+
+        matrix = np.zeros((len(uris), len(columns)), dtype=np.float32)
+        for row, grams in enumerate(counts):
+            for gram, count in grams.items():
+                matrix[row, columns[gram]] = count
+        # smoothed inverse document frequency, as n-grams shared by many names say little about a match
+        frequency = np.count_nonzero(matrix, axis=0)
+        idf = (np.log((1 + len(uris)) / (1 + frequency)) + 1).astype(np.float32)
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.where(norms == 0, 1, norms)
+        self._vectors = (tables, uris, columns, idf, matrix)
+        return self._vectors
+
+    def similar(self, word: str, k: int = 5) -> list:
+        """
+        Returns:
+            Up to `k` PredicateMatches of the predicates whose names are most similar to `word`, best
+            first, with their cosine similarity as score and leaving out those under MIN_SIMILARITY
+        """
+        vectors = self._vectors
+        # vectors built from tables replaced since, ie. by a concurrent `add`, are stale
+        if vectors is None or vectors[0] is not self._tables:
+            vectors = self._vectorize()
+        _, uris, columns, idf, matrix = vectors
+        query = np.zeros(len(columns), dtype=np.float32)
+        for gram, count in _ngrams(_words(word)).items():
+            if gram in columns:
+                query[columns[gram]] = count
+        query *= idf
+        norm = np.linalg.norm(query)
+        if not uris or norm == 0:
+            return []
+
+        scores = matrix @ (query / norm)
+        if len(uris) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(uris))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [
+            PredicateMatch(uris[i], local_name(uris[i]), float(scores[i]))
+            for i in top
+            if scores[i] >= self.MIN_SIMILARITY
+        ]
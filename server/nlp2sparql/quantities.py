@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class QuantityIndex:
+    """
+    One numeric quantity of every assembly held as a NumPy array sorted by value, alongside the position
+    of the owning assembly in uri order. Range questions are two binary searches followed by a slice, and
+    the heaviest or lightest assemblies are read off either end of the array, instead of Fuseki filtering
+    every assembly on each question. Rebuilding swaps the tables in one assignment, so readers on other
+    threads never see a half-built index.
+    """
+
+    def __init__(self, quantity: str = "mass"):
+        """
+        Args:
+            quantity: the result variable holding the value, ie. "mass" for `assembly_masses_query` rows
+        """
+        self.quantity = quantity
+        self._tables = (np.empty(0), np.empty(0, dtype=np.intp), [], {})
+        self.loaded = False
+
+    def load(self, rows):
+        """
+        Rebuilds the index from `assembly_masses_query` rows. Rows whose value is not a number are skipped.
+        An empty result leaves the index unloaded so that it is fetched again on next use.
+        """
+        by_id = {}
+        values, owners = [], []
+        for row in rows:
+            try:
+                value = float(row[self.quantity]["value"])
+            except (KeyError, ValueError):
+                continue
+            by_id.setdefault(row["id"]["value"], []).append(value)
+            values.append(value)
+            owners.append(row["assembly"]["value"])
+        # number the assemblies in uri order, so that listings do not depend on the order of the rows
+        assemblies = sorted(set(owners))
+        positions = {uri: i for i, uri in enumerate(assemblies)}
+        owners = np.asarray([positions[uri] for uri in owners], dtype=np.intp)
+
+        values = np.asarray(values, dtype=np.float64)
+        # by value, then by assembly between equal values
+        order = np.lexsort((owners, values))
+        owners = owners[order]
+        self._tables = (values[order], owners, assemblies, by_id)
+        self.loaded = bool(assemblies)
+
+    def refresh(self, client):
+        """
+        Fetches the assembly masses of the dataset again through a blocking client.
+        """
+        self.load(client.assembly_masses_query(use_cache=False))
+
+    def _slice(self, lower, upper):
+        values, owners, _, _ = self._tables
+        # bounds are strict, like the `?mass > lower && ?mass < upper` filter
+        start = 0 if lower is None else np.searchsorted(values, lower, side="right")
+        stop = len(values) if upper is None else np.searchsorted(values, upper)
+        return owners[start:stop]
+
+    def range(self, lower: float = None, upper: float = None) -> list:
+        """
+        Lists the assemblies with a value strictly between `lower` and `upper`, in uri order like the
+        `ORDER BY ?assembly` of `assembly_range_query`, so that pages read from either agree.
+
+        Args:
+            lower: lower bound, None meaning unbounded
+            upper: upper bound, None meaning unbounded
+        """
+        assemblies = self._tables[2]
+        return [assemblies[i] for i in np.unique(self._slice(lower, upper))]
+
+    def count(self, lower: float = None, upper: float = None) -> int:
+        """
+        Counts the assemblies with a value strictly between `lower` and `upper`.
+        """
+        return len(np.unique(self._slice(lower, upper)))
+
+    def largest(self, n: int = 1) -> list:
+        """
+        Lists the `n` assemblies with the largest values as (uri, value) pairs, largest first.
+        """
+        values, owners, _, _ = self._tables
+        return self._distinct(values[::-1], owners[::-1], n)
+
+    def smallest(self, n: int = 1) -> list:
+        """
+        Lists the `n` assemblies with the smallest values as (uri, value) pairs, smallest first.
+        """
+        values, owners, _, _ = self._tables
+        return self._distinct(values, owners, n)
+
+    def _distinct(self, values, owners, n):
+        # an assembly characterized by several values only counts once, at its most extreme value
+        assemblies = self._tables[2]
+        found = {}
+        for value, owner in zip(values, owners):
+            if len(found) == n:
+                break
+            found.setdefault(int(owner), float(value))
+        return [(assemblies[owner], value) for owner, value in found.items()]
+
+    def values_of(self, id: str) -> list:
+        """
+        Lists the values of the assembly with identifier `id`, empty when it is unknown.
+        """
+        return list(self._tables[3].get(id, ()))
@@ -0,0 +1,145 @@
+"""
+The NLTK tokenizer, stopword list and part-of-speech tagger used to parse questions. NLTK itself and its
+data are only loaded on first use or by `load`, and data is never downloaded implicitly: install it once
+with `python -m nlp2sparql.resources download`, which writes to DATA_DIR unless told otherwise.
+"""
+
+import argparse
+import os
+import sys
+import threading
+
+# searched before NLTK's own locations, set CHATBOT_NLTK_DATA to move it
+DATA_DIR = os.environ.get(
+    "CHATBOT_NLTK_DATA",
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nltk_data"
+    ),
+)
+
+# NLTK packages needed to parse, under the names of both recent and older NLTK releases
+PACKAGES = (
+    "punkt_tab",
+    "punkt",
+    "stopwords",
+    "averaged_perceptron_tagger_eng",
+    "averaged_perceptron_tagger",
+)
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def _nltk():
+    import nltk
+
+    if DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, DATA_DIR)
+    return nltk
+
+
+def _get(name: str, create):
+    # loads a resource once per process, even with several threads asking for it at once
+    resource = _loaded.get(name)
+    if resource is None:
+        with _lock:
+            resource = _loaded.get(name)
+            if resource is None:
+                resource = _loaded[name] = create(_nltk())
+    return resource
+
+
+def stemmer():
+    """The shared Porter stemmer, which needs no data."""
+    return _get("stemmer", lambda nltk: nltk.stem.PorterStemmer())
+
+
+def stop_words() -> frozenset:
+    """English stopwords."""
+    return _get(
+        "stopwords",
+        lambda nltk: frozenset(nltk.corpus.stopwords.words("english")),
+    )
+
+
+def _tagger(nltk):
+    from nltk.tag.perceptron import PerceptronTagger
+
+    return PerceptronTagger()
+
+
+def word_tokenize(text: str) -> list:
+    """
+    Same as nltk.word_tokenize.
+
+    Raises:
+        LookupError: if the punkt data is not installed
+    """
+    return _get("tokenize", lambda nltk: nltk.word_tokenize)(text)
+
+
+def pos_tag(tokens: list) -> list:
+    """
+    Same as nltk.pos_tag, with the tagger model loaded once instead of on every call.
+
+    Raises:
+        LookupError: if the tagger data is not installed
+    """
+    return _get("tagger", _tagger).tag(tokens)
+
+
+def load():
+    """
+    Loads NLTK and every resource ahead of the first question, instead of on it.
+
+    Raises:
+        LookupError: naming the data to install when some is missing
+    """
+    stemmer()
+    stop_words()
+    word_tokenize("Warm up.")
+    pos_tag(["Warm", "up"])
+
+
+def download(directory: str = DATA_DIR) -> bool:
+    """
+    Downloads every package into `directory`, the only place this module touches the network. Packages
+    unknown to the installed NLTK release are skipped.
+
+    Returns:
+        True if everything needed to parse is now installed
+    """
+    nltk = _nltk()
+    if directory not in nltk.data.path:
+        nltk.data.path.insert(0, directory)
+    for package in PACKAGES:
+        nltk.download(package, download_dir=directory)
+    try:
+        load()
+    except LookupError:
+        return False
+    return True
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m nlp2sparql.resources",
+        description="Installs or checks the NLTK data used to parse questions.",
+    )
+    parser.add_argument("command", choices=("download", "check"))
+    parser.add_argument("--dir", default=DATA_DIR, help="data directory to download to")
+    args = parser.parse_args(argv)
+
+    if args.command == "download":
+        return 0 if download(args.dir) else 1
+    try:
+        load()
+    except LookupError as e:
+        print(e)
+        return 1
+    print("NLTK data is installed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
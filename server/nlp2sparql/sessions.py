@@ -0,0 +1,150 @@
+"""
+Conversation state kept per session: the strategy a disambiguation prompt waits on, the options it
+offered, the cursor of the last paginated answer and the predicates resolved so far. Each user then
+disambiguates and pages through their own answers only. Sessions expire `ttl` seconds after their last
+question and stores hold at most about `maxsize` of them. States are stored as JSON, so that the SQLite
+store can share sessions between server processes.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from fuseki.cache import ResultCache
+
+# the session of questions asked without a session id, as by clients made before sessions
+DEFAULT_SESSION = ""
+
+
+def new_session() -> dict:
+    """
+    The state of a conversation that has not started yet.
+    """
+    return {
+        # the Strategy member name awaiting an answer to a disambiguation prompt
+        "strategy": "NONE",
+        "next_cursor": None,
+        # data source -> property uri, and the property label, offered by a domain/range prompt
+        "options": {},
+        "prop_label": {},
+        # local name -> uri of the predicates answered with
+        "predicates": {},
+    }
+
+
+class MemorySessionStore:
+    """
+    Sessions in this process, in a bounded LRU cache. Sessions that expired are dropped when next read
+    or pushed out by newer ones.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 1800.0, clock=time.monotonic):
+        self._cache = ResultCache(maxsize=maxsize, ttl=ttl, clock=clock)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def get(self, session_id: str) -> dict:
+        """
+        Returns:
+            A copy of the state of the session, or a new one if it is unknown or expired
+        """
+        state = self._cache.get(session_id)
+        return json.loads(state) if state is not None else new_session()
+
+    def put(self, session_id: str, state: dict):
+        self._cache.put(session_id, json.dumps(state))
+
+    def delete(self, session_id: str):
+        self._cache.invalidate(session_id)
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Sessions in a SQLite file, shared by every process opening it. Expired sessions, then the least
+    recently used beyond `maxsize`, are deleted every `EVICT_EVERY` writes.
+    """
+
+    EVICT_EVERY = 64
+
+    def __init__(
+        self, path: str, maxsize: int = 10000, ttl: float = 1800.0, clock=time.time
+    ):
+        """
+        Args:
+            path: the database file, created if missing
+            clock: wall clock time, which unlike a monotonic clock compares across processes
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._writes = 0
+        self._lock = threading.Lock()
+        # one connection, used under the lock, by the threads of the server
+        self._connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        with self._lock, self._connection:
+            # readers in other processes do not block writers
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions"
+                " (id TEXT PRIMARY KEY, state TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)"
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires > ?", (self._clock(),)
+            ).fetchone()[0]
+
+    def get(self, session_id: str) -> dict:
+        """
+        Returns:
+            A copy of the state of the session, or a new one if it is unknown or expired
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT state FROM sessions WHERE id = ? AND expires > ?",
+                (session_id, self._clock()),
+            ).fetchone()
+        return json.loads(row[0]) if row is not None else new_session()
+
+    def put(self, session_id: str, state: dict):
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sessions (id, state, expires) VALUES (?, ?, ?)",
+                (session_id, json.dumps(state), self._clock() + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.EVICT_EVERY == 0:
+                self._evict()
+
+    def delete(self, session_id: str):
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def evict(self):
+        with self._lock, self._connection:
+            self._evict()
+
+    def _evict(self):
+        self._connection.execute(
+            "DELETE FROM sessions WHERE expires <= ?", (self._clock(),)
+        )
+        # sessions expire in the order they were last written, so the first to expire are the least
+        # recently used
+        self._connection.execute(
+            "DELETE FROM sessions WHERE id IN"
+            " (SELECT id FROM sessions ORDER BY expires DESC LIMIT -1 OFFSET ?)",
+            (self.maxsize,),
+        )
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
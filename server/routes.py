@@ -1,14 +1,49 @@
-from nlp2sparql import NaturalLanguageQueryExecutor, Query
-from fuseki import FusekiClient
+import os
+import time
+from contextlib import contextmanager
+
+from nlp2sparql import (
+    ANSWERED,
+    DEFAULT_SESSION,
+    InvalidCursor,
+    MemorySessionStore,
+    NaturalLanguageQueryExecutor,
+    Query,
+    SQLiteSessionStore,
+    resources,
+)
+from nlp2sparql.parsing import ParsePool
+from fuseki import BackendUnavailable, FusekiClient, LocalFusekiClient
 from frontend import FrontEnd
-
-from flask import Flask, request
+from metrics import (
+    CONTENT_TYPE_LATEST,
+    STAGE_LATENCY,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+from flask import Flask, Response, request
 from flask_cors import CORS, cross_origin
 
 app = Flask(__name__)
 cors = CORS(app)
 app.config["CORS_HEADERS"] = "Content-Type"
 
+REQUEST_LATENCY = Histogram(
+    "chatbot_request_seconds", "Time spent answering a request, by route.", ["route"]
+)
+IN_FLIGHT = Gauge(
+    "chatbot_requests_in_flight", "Requests being answered, by route.", ["route"]
+)
+
+
+@contextmanager
+def tracked(route):
+    with IN_FLIGHT.labels(route).track_inprogress():
+        with REQUEST_LATENCY.labels(route).time():
+            yield
+
 
 @app.route("/")
 @cross_origin()
@@ -17,30 +52,100 @@ def homepage():
     return frontend.render_page()
 
 
-client = FusekiClient("http://host.docker.internal:3030/firesat/sparql")
-nlqe = NaturalLanguageQueryExecutor(client)
+def create_client(connection_string):
+    # FUSEKI_BACKEND=local answers queries from an in-memory copy of the dataset
+    if os.environ.get("FUSEKI_BACKEND", "remote") == "local":
+        return LocalFusekiClient(
+            connection_string, ntriples_path=os.environ.get("FUSEKI_NTRIPLES")
+        )
+    return FusekiClient(connection_string)
+
+
+def create_parse_pool():
+    # NLP_WORKERS=n parses questions in n worker processes, NLP_WORKERS=auto in one per core
+    workers = os.environ.get("NLP_WORKERS", "0")
+    if workers == "0":
+        return None
+    return ParsePool(None if workers == "auto" else int(workers))
+
+
+def create_session_store():
+    # SESSION_DB=path keeps conversations in a SQLite file, shared by every server process using it
+    path = os.environ.get("SESSION_DB")
+    if path:
+        return SQLiteSessionStore(path)
+    return MemorySessionStore()
+
+
+client = create_client("http://host.docker.internal:3030/firesat/sparql")
+nlqe = NaturalLanguageQueryExecutor(client, sessions=create_session_store())
 
 user_queries = []
 processed_queries = []
 
 
-@app.route("/query", methods=["POST"])
+@app.route("/ask", methods=["POST"])
 @cross_origin()
-def user_query():
-    querystr = request.get_json()["data"]
-    user_query = Query(querystr)
-    user_queries.append(user_query)
+def ask():
+    with tracked("/ask"):
+        return ask_query(nlqe)
+
+
+def ask_query(executor):
+    # the answer in the reply to the question, so that concurrent users never get each other's
+    start = time.perf_counter()
+    resp, user_query = answer(executor, request.get_json())
+    return {
+        **resp,
+        "status": user_query.status,
+        "strategy": user_query.strategy_name,
+        "elapsed_ms": (time.perf_counter() - start) * 1000,
+    }
+
+
+def session_id():
+    # the conversation of the client, by its X-Session-ID header or session_id cookie, while clients
+    # sending neither all share the default session
+    session = request.headers.get("X-Session-ID") or request.cookies.get("session_id")
+    return session[:128] if session else DEFAULT_SESSION
 
-    transformed_query = parse_user_query(querystr)
+
+def answer(executor, body):
+    querystr = body["data"]
+    # a "cursor" from the "next" key of an earlier response fetches the following page
+    user_query = Query(querystr, cursor=body.get("cursor"), session_id=session_id())
+
+    with STAGE_LATENCY.labels("parse_user_query").time():
+        transformed_query = parse_user_query(querystr)
     resp = get_hardcode_response(transformed_query)
     resp = {"response": resp}
 
     if resp["response"] == "":
         # empty hardcode response, query nlqe
-        processed_query = nlqe.query(user_query)
-        processed_queries.append(processed_query)
-    else:
-        processed_queries.append(resp)
+        return executor.query(user_query), user_query
+    user_query.status = ANSWERED
+    return resp, user_query
+
+
+@app.errorhandler(InvalidCursor)
+def invalid_cursor(error):
+    # a "cursor" the server never handed out, or one altered by the client
+    return {"error": str(error)}, 400
+
+
+# /query and /response, kept for clients made before /ask, answer in two requests: the question is
+# posted and its answer read back as the latest one answered, whoever asked it
+@app.route("/query", methods=["POST"])
+@cross_origin()
+def user_query():
+    with tracked("/query"):
+        return answer_query(nlqe, user_queries, processed_queries)
+
+
+def answer_query(executor, queries, responses):
+    resp, user_query = answer(executor, request.get_json())
+    queries.append(user_query)
+    responses.append(resp)
     return "", 204
 
 
@@ -51,31 +156,25 @@ def user_response():
 
 
 ####Test Endpoints####
-test_client = FusekiClient("http://localhost:3030/firesat/sparql")
+test_client = create_client("http://localhost:3030/firesat/sparql")
 test_nlqe = NaturalLanguageQueryExecutor(test_client)
 
 test_user_queries = []
 test_processed_queries = []
 
 
-@app.route("/testQuery", methods=["POST"])
+@app.route("/testAsk", methods=["POST"])
 @cross_origin()
-def test_user_query():
-    querystr = request.get_json()["data"]
-    user_query = Query(querystr)
-    test_user_queries.append(user_query)
+def test_ask():
+    with tracked("/testAsk"):
+        return ask_query(test_nlqe)
 
-    transformed_query = parse_user_query(querystr)
-    resp = get_hardcode_response(transformed_query)
-    resp = {"response": resp}
 
-    if resp["response"] == "":
-        # empty hardcode response, query nlqe
-        processed_query = test_nlqe.query(user_query)
-        test_processed_queries.append(processed_query)
-    else:
-        test_processed_queries.append(resp)
-    return "", 204
+@app.route("/testQuery", methods=["POST"])
+@cross_origin()
+def test_user_query():
+    with tracked("/testQuery"):
+        return answer_query(test_nlqe, test_user_queries, test_processed_queries)
 
 
 @app.route("/testResponse")
@@ -87,6 +186,12 @@ def test_user_response():
 ####End ofTest Endpoints####
 
 
+@app.route("/metrics")
+def metrics():
+    # Prometheus text exposition of the latency, Fuseki and cache metrics
+    return Response(generate_latest(), content_type=CONTENT_TYPE_LATEST)
+
+
 def parse_user_query(user_query):
     # simplify user input
     user_query = user_query.strip().lower()
@@ -109,4 +214,21 @@ def get_hardcode_response(query):
 
 
 if __name__ == "__main__":
+    # made here as worker processes import this module again
+    parse_pool = create_parse_pool()
+    if parse_pool is not None:
+        nlqe.parse_pool = test_nlqe.parse_pool = parse_pool
+        parse_pool.warmup()
+    try:
+        resources.load()
+    except LookupError as e:
+        # questions fail to parse until the data is installed
+        print(
+            f"NLTK data is missing, run `python -m nlp2sparql.resources download`: {e}"
+        )
+    try:
+        nlqe.warmup()
+    except BackendUnavailable as e:
+        # the indexes are then built by the first questions needing them
+        print(f"Skipping warmup: {e}")
     app.run(host="0.0.0.0", port=8080)
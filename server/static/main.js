@@ -79,41 +79,73 @@ $('#send_button').on('click', function (e) {
 });
 
 
-async function queryDB(question) {
+// one conversation per browser tab, so that disambiguation and "show more" follow this user's questions only
+const SESSION_ID = sessionStorage.getItem('session_id') || crypto.randomUUID();
+sessionStorage.setItem('session_id', SESSION_ID);
+
+async function queryDB(question, cursor) {
 	const data = {
 		data: question
 	};
+	if (cursor) {
+		// continue a paginated answer from the cursor of its previous page
+		data.cursor = cursor;
+	}
 
-  	// QUERY: pass in user text to backend endpoint as query
-	fetch("http://localhost:8080/query", {
+  	// ASK: the answer comes back in the reply to the question
+	fetch("http://localhost:8080/ask", {
 		method: 'POST',
 		headers: {
 			'Content-Type': 'application/json',
+			'X-Session-ID': SESSION_ID,
 		},
 		body: JSON.stringify(data),
 	})
-	.then(next => {
-		// RESPONSE: obtain english response
-		fetch("http://localhost:8080/response")
-		.then(response => response.text())
-		.then(txt => {
-			// simply dumps query response but will clean output @ backend endpoint
-			renderMessageToScreen({
-				text: JSON.parse(txt)['response'],
-				time: getCurrentTimestamp(),
-				message_side: 'left',
-			});
-			return txt;
-		})
-		.catch(function (error) {
-			console.log("Response Error: " + error);
+	.then(response => response.json())
+	.then(json => {
+		renderMessageToScreen({
+			text: json['response'],
+			time: getCurrentTimestamp(),
+			message_side: 'left',
 		});
+		if (json['suggestions']) {
+			renderSuggestions(json['suggestions']);
+		}
+		if (json['next']) {
+			renderShowMore(json['next']);
+		}
+		return json;
 	})
 	.catch(function (error) {
 		console.log("Query Error: " + error);
 	});
 }
 
+/**
+ * Lists the labels closest to one that matched nothing, with the vocabulary each comes from.
+ */
+function renderSuggestions(suggestions) {
+	let items = suggestions.map(s => `"${s.label}" (${s.vocabulary})`);
+	renderMessageToScreen({
+		text: 'Did you mean: ' + items.join(', ') + '?',
+		time: getCurrentTimestamp(),
+		message_side: 'left',
+	});
+}
+
+/**
+ * Renders a "show more" button that fetches the next page of a long answer.
+ */
+function renderShowMore(cursor) {
+	let button = $('<button class="show_more">Show more</button>');
+	button.on('click', function () {
+		button.remove();
+		showUserMessage('show more');
+		queryDB('show more', cursor);
+	});
+	$('.messages').append(button);
+}
+
 /**
  * Set initial bot message to the screen for the user.
  */
@@ -0,0 +1,154 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer
+from unittest import IsolatedAsyncioTestCase
+
+from fuseki import BackendUnavailable, CircuitOpen, LocalFusekiClient, QueryTimeout
+from fuseki.aio import AsyncFusekiClient
+from fuseki.resilience import CircuitBreaker
+from nlp2sparql import BACKEND_UNAVAILABLE, NaturalLanguageQueryExecutor, Query
+from tests.local_test import NTRIPLES
+from tests.resilience_test import NO_WAIT, FlakySparqlHandler
+
+
+class AsyncLocalClient:
+    """
+    Answers the query methods of an AsyncFusekiClient from a LocalFusekiClient, raising
+    BackendUnavailable while `down` is set.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.down = False
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if not name.endswith("_query"):
+            return method
+
+        async def call(*args, **kwargs):
+            if self.down:
+                raise BackendUnavailable("Fuseki is down")
+            return method(*args, **kwargs)
+
+        return call
+
+
+class TryTestingAsyncClient(IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakySparqlHandler)
+        self.server.requests, self.server.failures, self.server.delay = 0, 0, 0
+        self.server.garbled = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.endpoint = f"http://{host}:{port}/firesat/sparql"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self, **kwargs):
+        kwargs.setdefault("retry", NO_WAIT)
+        return AsyncFusekiClient(self.endpoint, cache_size=0, **kwargs)
+
+    async def test_select(self):
+        async with self.client() as client:
+            result = await client.query()
+        self.assertEqual(result, [{"s": {"type": "literal", "value": "ok"}}])
+
+    async def test_stream(self):
+        async with self.client() as client:
+            rows = [r async for r in await client.query(stream=True)]
+        self.assertEqual(len(rows), 1)
+
+    async def test_server_errors_are_retried(self):
+        self.server.failures = 2
+        async with self.client() as client:
+            self.assertEqual(len(await client.query()), 1)
+        self.assertEqual(self.server.requests, 3)
+
+    async def test_unavailable_after_retries(self):
+        self.server.failures = 3
+        async with self.client() as client:
+            with self.assertRaises(BackendUnavailable):
+                await client.query()
+        self.assertEqual(self.server.requests, 3)
+
+    async def test_deadline_becomes_timeout(self):
+        self.server.delay = 0.5
+        async with self.client(timeout=0.2) as client:
+            with self.assertRaises(QueryTimeout):
+                await client.query()
+
+    async def test_open_circuit_fails_fast(self):
+        self.server.failures = 10
+        breaker = CircuitBreaker(failure_threshold=3)
+        async with self.client(breaker=breaker) as client:
+            with self.assertRaises(BackendUnavailable):
+                await client.query()
+            with self.assertRaises(CircuitOpen):
+                await client.query()
+        self.assertEqual(self.server.requests, 3)
+
+    async def test_pool_bounds_concurrent_requests(self):
+        self.server.delay = 0.2
+        async with self.client(pool_size=1) as client:
+            start = time.perf_counter()
+            results = await asyncio.gather(client.query(), client.query())
+            elapsed = time.perf_counter() - start
+        self.assertEqual([len(r) for r in results], [1, 1])
+        # the second request waited for the only connection
+        self.assertGreaterEqual(elapsed, 0.4)
+
+    async def test_executor_reports_unavailable(self):
+        self.server.failures = 10
+        async with self.client() as client:
+            executor = NaturalLanguageQueryExecutor(client)
+            question = 'Is "http://a#B" a subclass of "http://a#C"?'
+            result = await executor.query_async(Query(question))
+        self.assertEqual(result, {"response": BACKEND_UNAVAILABLE})
+
+    async def test_executor_reports_timeout(self):
+        self.server.delay = 0.5
+        async with self.client(timeout=0.2) as client:
+            executor = NaturalLanguageQueryExecutor(client)
+            question = 'Is "http://a#B" a subclass of "http://a#C"?'
+            result = await executor.query_async(Query(question))
+        self.assertEqual(result, {"response": BACKEND_UNAVAILABLE})
+
+
+class TryTestingExecuteAsync(IsolatedAsyncioTestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def setUp(self):
+        self.client = AsyncLocalClient(LocalFusekiClient(ntriples_path=self.path))
+        self.executor = NaturalLanguageQueryExecutor(self.client)
+
+    async def test_answers_like_query(self):
+        question = "What is the mass of assembly object id 500000?"
+        result = await self.executor.query_async(Query(question))
+        executor = NaturalLanguageQueryExecutor(self.client._client)
+        self.assertEqual(result, executor.query(Query(question)))
+
+    async def test_next_question_is_answered_after_outage(self):
+        self.client.down = True
+        query = Query("What is the mass of assembly object id 500000?", session_id="a")
+        with self.assertLogs("nlp2sparql", "WARNING"):
+            result = await self.executor.query_async(query)
+        self.assertEqual(result, {"response": BACKEND_UNAVAILABLE})
+
+        self.client.down = False
+        query = Query("What is the base description?", session_id="a")
+        result = await self.executor.query_async(query)
+        self.assertEqual(result["response"], 'The "Base" vocabulary')
@@ -0,0 +1,71 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import NaturalLanguageQueryExecutor
+from server import routes
+from tests.local_test import NTRIPLES
+
+
+class TryTestingAsk(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def setUp(self):
+        self.nlqe = routes.nlqe
+        routes.nlqe = NaturalLanguageQueryExecutor(self.client)
+        self.app = routes.app.test_client()
+
+    def tearDown(self):
+        routes.nlqe = self.nlqe
+
+    def test_answer_in_reply(self):
+        reply = self.app.post(
+            "/ask", json={"data": "What is the base description?"}
+        ).get_json()
+        self.assertEqual(reply["response"], 'The "Base" vocabulary')
+        self.assertEqual(reply["status"], "answered")
+        self.assertEqual(reply["strategy"], "WHAT")
+        self.assertGreaterEqual(reply["elapsed_ms"], 0)
+
+    def test_hardcoded_answer(self):
+        reply = self.app.post("/ask", json={"data": "Hello!"}).get_json()
+        self.assertEqual(reply["response"], "Hello, welcome!")
+        self.assertEqual((reply["status"], reply["strategy"]), ("answered", None))
+
+    def test_query_and_response_still_answer(self):
+        response = self.app.post(
+            "/query", json={"data": "What is the base description?"}
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(
+            self.app.get("/response").get_json(),
+            {"response": 'The "Base" vocabulary'},
+        )
+
+    def test_sessions_by_header(self):
+        # session "a" waits on an answer to a prompt, which session "b" must not give
+        sessions = routes.nlqe.sessions
+        sessions.put("a", dict(sessions.get("a"), strategy="WHAT"))
+        reply = self.app.post(
+            "/ask",
+            json={"data": "What is the mass of assembly object id 500000?"},
+            headers={"X-Session-ID": "b"},
+        ).get_json()
+        self.assertEqual(reply["strategy"], "ASSEMBLY")
+        self.assertEqual(sessions.get("a")["strategy"], "WHAT")
+
+    def test_invalid_cursor_is_bad_request(self):
+        for route in ("/ask", "/query"):
+            response = self.app.post(route, json={"data": "", "cursor": "not a cursor"})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Invalid cursor", response.get_json()["error"])
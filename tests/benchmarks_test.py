@@ -0,0 +1,74 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from benchmarks import (
+    LEXER_INPUTS,
+    WORKLOADS,
+    _answer,
+    cold_start,
+    compare,
+    record,
+    run,
+)
+from benchmarks.dataset import firesat_ntriples
+from benchmarks.replay import ReplayClient
+from fuseki import LocalFusekiClient
+from nlp2sparql import NaturalLanguageQueryExecutor
+
+
+class TryTestingBenchmarks(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.recording = tempfile.mkstemp(suffix=".json")
+        os.close(handle)
+        record(cls.recording)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.recording)
+
+    def test_replay_answers_like_recording(self):
+        handle, path = tempfile.mkstemp(suffix=".nt")
+        os.close(handle)
+        try:
+            with open(path, "w", encoding="utf-8") as dump:
+                dump.write(firesat_ntriples())
+            local = NaturalLanguageQueryExecutor(LocalFusekiClient(ntriples_path=path))
+            replay = NaturalLanguageQueryExecutor(ReplayClient.load(self.recording))
+            local.warmup()
+            replay.warmup()
+            for workload in WORKLOADS:
+                self.assertEqual(
+                    _answer(replay, workload), _answer(local, workload), workload.name
+                )
+        finally:
+            os.remove(path)
+
+    def test_unrecorded_call_fails(self):
+        client = ReplayClient.load(self.recording)
+        with self.assertRaises(KeyError):
+            client.subclass_query(super="<http://example.org/firesat#Nothing>")
+
+    def test_run_reports_every_workload(self):
+        results = run(self.recording, iterations=5, warmup=1)["results"]
+        for workload in WORKLOADS:
+            summary = results[workload.name]
+            self.assertEqual(summary["iterations"], 5)
+            self.assertLessEqual(summary["p50_ms"], summary["p99_ms"])
+            self.assertGreater(summary["qps"], 0)
+        self.assertIn("parse", results)
+        for name in LEXER_INPUTS:
+            self.assertEqual(results[name]["iterations"], 5)
+
+    def test_compare_flags_slower_p95(self):
+        baseline = {"results": {"what": {"p95_ms": 1.0}, "parse": {"skipped": "x"}}}
+        current = {"results": {"what": {"p95_ms": 1.1}, "parse": {"p95_ms": 5.0}}}
+        self.assertEqual(compare(current, baseline), [])
+        current["results"]["what"]["p95_ms"] = 1.5
+        self.assertEqual(len(compare(current, baseline)), 1)
+
+    def test_cold_start(self):
+        results = cold_start(runs=1)["results"]
+        self.assertEqual(results["import_nlp2sparql"]["iterations"], 1)
+        self.assertIn("nltk_load", results)
@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+from fuseki.cache import ResultCache, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TryTestingResultCache(TestCase):
+    def test_normalize_query_keeps_literals(self):
+        self.assertEqual(
+            normalize_query(
+                'SELECT ?s\n    WHERE {  ?s rdfs:label "has  assignment" }'
+            ),
+            'SELECT ?s WHERE { ?s rdfs:label "has  assignment" }',
+        )
+
+    def test_lru_eviction(self):
+        cache = ResultCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = ResultCache(maxsize=4, ttl=10, clock=clock)
+        cache.put("a", 1)
+        clock.now = 9
+        self.assertEqual(cache.get("a"), 1)
+        clock.now = 10
+        self.assertIsNone(cache.get("a"))
+        stats = cache.stats()
+        self.assertEqual(
+            (stats["hits"], stats["misses"], stats["expirations"]), (1, 1, 1)
+        )
+
+    def test_invalidate(self):
+        cache = ResultCache()
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.invalidate("a")
+        self.assertIsNone(cache.get("a"))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_disabled(self):
+        cache = ResultCache(maxsize=0)
+        cache.put("a", 1)
+        self.assertIsNone(cache.get("a"))
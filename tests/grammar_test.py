@@ -0,0 +1,116 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import NaturalLanguageQueryExecutor, Query
+from nlp2sparql.grammar import TEMPLATES
+from tests.local_test import NTRIPLES
+
+
+class TryTestingGrammar(TestCase):
+    def check(self, question, strategy, tokens, **options):
+        parsed = TEMPLATES.match(question)
+        self.assertIsNotNone(parsed, question)
+        self.assertEqual(parsed.strategy, strategy)
+        self.assertEqual(list(parsed.tokens), tokens)
+        self.assertEqual(parsed.options, options)
+
+    def test_domain_range(self):
+        self.check(
+            'What is the domain of "system has derived unitary quantity"?',
+            "DOMAIN_RANGE",
+            [
+                ("What", "WP"),
+                ("domain", "NN"),
+                ('"system has derived unitary quantity"', "NN"),
+            ],
+        )
+        self.check(
+            "what is the domain and range of isCoherent",
+            "DOMAIN_RANGE",
+            [("What", "WP"), ("domain", "NN"), ("range", "NN"), ("isCoherent", "NN")],
+        )
+
+    def test_domain_range_property(self):
+        self.check(
+            "What is the property of range Junction?",
+            "DOMAIN_RANGE_PROPERTY",
+            [("properties", "NNS"), ("range", "NN"), ("Junction", "NN")],
+        )
+
+    def test_subsuper(self):
+        self.check(
+            'What are the superclasses of "http://bipm.org/jcgm/vim4#Quantity"?',
+            "SUBSUPER",
+            [("superclasses", "VBZ"), ('"http://bipm.org/jcgm/vim4#Quantity"', "NN")],
+            transitive=False,
+        )
+        self.check(
+            "What are all the subclasses of http://a#B?",
+            "SUBSUPER",
+            [("subclasses", "VBZ"), ("<http://a#B>", "NN")],
+            transitive=True,
+        )
+
+    def test_mass(self):
+        self.check(
+            "What is the mass and function of assembly object id 500000?",
+            "ASSEMBLY",
+            [("mass", "NN"), ("function", "NN"), ("id", "NN"), ("500000", "CD")],
+        )
+        self.check(
+            "How many subjects are lighter than 2 kg and heavier than 0.8 kg?",
+            "FILTER_ASSEMBLY",
+            [("lighter", "JJR"), ("2", "CD"), ("heavier", "JJR"), ("0.8", "CD")],
+            count=True,
+        )
+        self.check(
+            "What are the 3 heaviest subjects?",
+            "FILTER_ASSEMBLY",
+            [("3", "CD"), ("heaviest", "JJS")],
+        )
+
+    def test_what(self):
+        self.check(
+            "What is http://imce.jpl.nasa.gov/foundation/base description?",
+            "WHAT",
+            [
+                ("What", "WP"),
+                ("<http://imce.jpl.nasa.gov/foundation/base>", "NN"),
+                ("description", "NN"),
+            ],
+        )
+
+    def test_other_shapes_are_left_to_nltk(self):
+        for question in (
+            "What is the mass of assembly object 51600?",
+            "What is the mass function?",
+            "all of the above",
+            "Tell me about the base vocabulary",
+        ):
+            self.assertIsNone(TEMPLATES.match(question), question)
+
+
+class TryTestingGrammarExecutor(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def test_answers_without_nltk(self):
+        executor = NaturalLanguageQueryExecutor(
+            LocalFusekiClient(ntriples_path=self.path)
+        )
+        tests = {
+            "What is the base description?": 'The "Base" vocabulary',
+            "What is the domain of hasDoubleNumber?": "For property 'hasDoubleNumber', the domain is 'UnitaryQuantityValue'.",
+            "What is the mass of assembly object id 500000?": "For assembly object 500000: <br>\n The mass is 1.2 kg. <br>\n ",
+        }
+        for question, answer in tests.items():
+            self.assertEqual(executor.query(Query(question))["response"], answer)
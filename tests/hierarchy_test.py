@@ -0,0 +1,153 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import (
+    PAGE_SIZE,
+    ClassHierarchy,
+    NaturalLanguageQueryExecutor,
+    Query,
+    SubSuperStrategy,
+    decode_cursor,
+)
+
+EX = "http://example.org/classes#"
+SUBCLASS_OF = "<http://www.w3.org/2000/01/rdf-schema#subClassOf>"
+
+
+def edge(sub, super):
+    return {
+        "sub": {"type": "uri", "value": EX + sub},
+        "super": {"type": "uri", "value": EX + super},
+    }
+
+
+class TryTestingClassHierarchy(TestCase):
+    def setUp(self):
+        # Thing <- Element <- Component <- Assembly, and Element <- Interface
+        self.hierarchy = ClassHierarchy()
+        self.hierarchy.load(
+            [
+                edge("Element", "Thing"),
+                edge("Component", "Element"),
+                edge("Interface", "Element"),
+                edge("Assembly", "Component"),
+            ]
+        )
+
+    def names(self, uris):
+        return [uri[len(EX) :] for uri in uris]
+
+    def test_direct(self):
+        self.assertEqual(
+            self.names(self.hierarchy.subclasses(EX + "Element")),
+            ["Component", "Interface"],
+        )
+        self.assertEqual(
+            self.names(self.hierarchy.superclasses(EX + "Assembly")), ["Component"]
+        )
+
+    def test_transitive(self):
+        self.assertEqual(
+            self.names(self.hierarchy.subclasses(EX + "Thing", None)),
+            ["Assembly", "Component", "Element", "Interface"],
+        )
+        self.assertEqual(
+            self.names(self.hierarchy.superclasses(EX + "Assembly", 2)),
+            ["Component", "Element"],
+        )
+        self.assertEqual(self.hierarchy.subclasses(EX + "Missing", None), [])
+
+    def test_is_subclass(self):
+        self.assertTrue(self.hierarchy.is_subclass(EX + "Assembly", EX + "Thing"))
+        self.assertFalse(self.hierarchy.is_subclass(EX + "Thing", EX + "Assembly"))
+        self.assertFalse(self.hierarchy.is_subclass(EX + "Interface", EX + "Component"))
+
+    def test_cycles(self):
+        self.hierarchy.load([edge("A", "B"), edge("B", "C"), edge("C", "A")])
+        self.assertEqual(
+            self.names(self.hierarchy.subclasses(EX + "A", None)), ["B", "C"]
+        )
+        self.assertTrue(self.hierarchy.is_subclass(EX + "A", EX + "A"))
+
+
+class TryTestingSubSuperHierarchy(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(f"<{EX}Element> {SUBCLASS_OF} <{EX}Thing> .\n")
+            for i in range(PAGE_SIZE + 5):
+                dump.write(f"<{EX}Part{i:03}> {SUBCLASS_OF} <{EX}Element> .\n")
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def test_transitive_listing_pages(self):
+        strategy = SubSuperStrategy(transitive=True)
+        tokens = [("subclasses", "VBZ"), (EX + "Thing", "NN")]
+        result, _ = strategy.execute(tokens, {}, self.client)
+        self.assertTrue(
+            result["response"].startswith(f"All subclasses for '{EX}Thing'")
+        )
+        self.assertIn(f"- {EX}Element <br>", result["response"])
+        self.assertEqual(decode_cursor(result["next"])["transitive"], True)
+
+        result, _ = SubSuperStrategy().execute([], {}, self.client, result["next"])
+        self.assertEqual(result["response"].count("<br> "), 6)
+        self.assertNotIn("next", result)
+
+    def test_direct_listing(self):
+        tokens = [("superclasses", "VBZ"), (EX + "Part000", "NN")]
+        result, _ = SubSuperStrategy().execute(tokens, {}, self.client)
+        self.assertEqual(
+            result["response"],
+            f"The superclasses for '{EX}Part000' are:<br>"
+            f"&nbsp;&nbsp;&nbsp;&nbsp;- {EX}Element <br> ",
+        )
+
+    def test_direct_listing_keeps_blank_nodes(self):
+        handle, path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(f"<{EX}Part> {SUBCLASS_OF} <{EX}Element> .\n")
+            dump.write(f"_:restriction {SUBCLASS_OF} <{EX}Element> .\n")
+        self.addCleanup(os.remove, path)
+        client = LocalFusekiClient(ntriples_path=path)
+        tokens = [("subclasses", "VBZ"), (EX + "Element", "NN")]
+        # the same answer whether the hierarchy was loaded or not
+        hierarchy = ClassHierarchy()
+        for _ in range(2):
+            result, _ = SubSuperStrategy(hierarchy=hierarchy).execute(
+                tokens, {}, client
+            )
+            self.assertEqual(result["response"].count("<br> "), 2)
+            hierarchy.refresh(client)
+
+    def test_bare_uris(self):
+        executor = NaturalLanguageQueryExecutor(self.client)
+        result = executor.query(Query(f"What are all the subclasses of {EX}Thing?"))
+        self.assertTrue(
+            result["response"].startswith(f"All subclasses for '{EX}Thing'")
+        )
+        result = executor.query(Query(f"What are the superclasses of {EX}Part000?"))
+        self.assertEqual(
+            result["response"],
+            f"The superclasses for '{EX}Part000' are:<br>"
+            f"&nbsp;&nbsp;&nbsp;&nbsp;- {EX}Element <br> ",
+        )
+
+    def test_check(self):
+        strategy = SubSuperStrategy(check=True)
+        tokens = [(EX + "Part001", "NN"), ("subclass", "NN"), (EX + "Thing", "NN")]
+        result, _ = strategy.execute(tokens, {}, self.client)
+        self.assertEqual(
+            result["response"], f"Yes, '{EX}Part001' is a subclass of '{EX}Thing'."
+        )
+        tokens = [(EX + "Part001", "NN"), ("superclass", "NN"), (EX + "Thing", "NN")]
+        result, _ = strategy.execute(tokens, {}, self.client)
+        self.assertEqual(
+            result["response"], f"No, '{EX}Part001' is not a superclass of '{EX}Thing'."
+        )
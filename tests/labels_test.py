@@ -0,0 +1,78 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import DomainRangePropertyStrategy, LabelIndex
+from tests.local_test import NTRIPLES, VIM4
+
+
+def label_row(uri, label, kind):
+    return {
+        "subject": {"type": "uri", "value": uri},
+        "label": {"type": "literal", "value": label},
+        "kind": {"type": "literal", "value": kind},
+    }
+
+
+class TryTestingLabelIndex(TestCase):
+    def setUp(self):
+        self.index = LabelIndex()
+        self.index.load(
+            [
+                label_row(f"{VIM4}QuantityValue", "Quantity Value", "class"),
+                label_row(f"{VIM4}QuantityKind", "Quantity Kind", "class"),
+                label_row(f"{VIM4}hasQuantityValue", "has quantity value", "property"),
+                label_row(f"{VIM4}Quantity", "Quantity", "class"),
+            ]
+        )
+
+    def test_resolve_is_exact(self):
+        self.assertEqual(
+            self.index.resolve("Quantity Value", "class"), [f"{VIM4}QuantityValue"]
+        )
+        self.assertEqual(self.index.resolve("quantity value", "class"), [])
+        self.assertEqual(self.index.resolve("Quantity Value", "property"), [])
+
+    def test_lookup_ranks_exact_then_prefix(self):
+        labels = [m.label for m in self.index.lookup("quantity", kind="class")]
+        self.assertEqual(labels[0], "Quantity")
+        self.assertEqual(set(labels[1:]), {"Quantity Kind", "Quantity Value"})
+
+    def test_fuzzy_lookup_tolerates_typos(self):
+        best = self.index.lookup("Quantiy Valeu")[0]
+        self.assertEqual(best.iri, f"{VIM4}QuantityValue")
+        self.assertEqual(best.vocabulary, VIM4)
+        self.assertEqual(self.index.lookup("spacecraft"), [])
+
+
+class TryTestingLabelResolution(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def ask(self, label):
+        tokens = [("properties", "NNS"), ("domain", "NN"), (label, "NN")]
+        result, _ = DomainRangePropertyStrategy().execute(tokens, {}, self.client)
+        return result
+
+    def test_resolved_label(self):
+        self.assertEqual(
+            self.ask("UnitaryQuantityValue")["response"],
+            "For domain 'UnitaryQuantityValue', the properties are: hasDoubleNumber.",
+        )
+
+    def test_typo_gets_suggestions(self):
+        result = self.ask("UnitaryQuantityValu")
+        self.assertEqual(
+            result["response"],
+            "Unable to find information about domain UnitaryQuantityValu",
+        )
+        self.assertEqual(result["suggestions"][0]["iri"], f"{VIM4}UnitaryQuantityValue")
@@ -0,0 +1,92 @@
+import time
+from unittest import TestCase
+
+from nlp2sparql import NaturalLanguageQueryExecutor, resources
+from nlp2sparql.lexer import IRI, NUMBER, QUOTE, WORD, Lexeme, lex
+
+
+class TryTestingLexer(TestCase):
+    def test_iris(self):
+        self.assertEqual(
+            lex("What is http://imce.jpl.nasa.gov/foundation/base description?"),
+            [
+                Lexeme(WORD, "What"),
+                Lexeme(WORD, "is"),
+                Lexeme(IRI, "http://imce.jpl.nasa.gov/foundation/base"),
+                Lexeme(WORD, "description?"),
+            ],
+        )
+        self.assertEqual(
+            lex("superclasses of <http://a#B>?")[-2:],
+            [Lexeme(IRI, "http://a#B"), Lexeme(WORD, "?")],
+        )
+        self.assertEqual(
+            lex("www.example.com/a, example.org/b."),
+            [
+                Lexeme(IRI, "www.example.com/a"),
+                Lexeme(WORD, ","),
+                Lexeme(IRI, "example.org/b"),
+                Lexeme(WORD, "."),
+            ],
+        )
+
+    def test_quotes(self):
+        self.assertEqual(
+            lex('What is the domain of "has assignment"?')[-2:],
+            [Lexeme(QUOTE, '"has assignment"'), Lexeme(WORD, "?")],
+        )
+        self.assertEqual(
+            lex('"a" of "http://bipm.org/jcgm/vim4#Quantity" and "b c'),
+            [
+                Lexeme(QUOTE, '"a"'),
+                Lexeme(WORD, "of"),
+                Lexeme(QUOTE, '"http://bipm.org/jcgm/vim4#Quantity"'),
+                Lexeme(WORD, "and"),
+                Lexeme(QUOTE, '"b c'),
+            ],
+        )
+
+    def test_numbers(self):
+        self.assertEqual(
+            lex("lighter than 0.8 kg, or 1,000?"),
+            [
+                Lexeme(WORD, "lighter"),
+                Lexeme(WORD, "than"),
+                Lexeme(NUMBER, "0.8"),
+                Lexeme(WORD, "kg,"),
+                Lexeme(WORD, "or"),
+                Lexeme(NUMBER, "1,000"),
+                Lexeme(WORD, "?"),
+            ],
+        )
+
+    def test_linear_on_adversarial_input(self):
+        for text in (
+            "What is http://x/(" + "a" * 100000 + "!",
+            "What is " + "a." * 100000 + "!",
+            '"' + "unterminated " * 10000,
+            "<" * 100000,
+        ):
+            start = time.perf_counter()
+            lex(text)
+            self.assertLess(time.perf_counter() - start, 1)
+
+
+class TryTestingParse(TestCase):
+    def setUp(self):
+        try:
+            resources.load()
+        except LookupError:
+            self.skipTest("NLTK data is missing")
+        self.executor = NaturalLanguageQueryExecutor(None)
+
+    def test_placeholders_are_restored(self):
+        words = [
+            word
+            for word, tag in self.executor._parse(
+                'Is "a b" or http://a#B in 1 2 3 4 5 6 7 8 9 10 "c d"?'
+            )
+        ]
+        self.assertIn('"a b"', words)
+        self.assertIn("<http://a#B>", words)
+        self.assertEqual(words[-2:], ['"c d"', "?"])
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+from unittest import TestCase
+
+from benchmarks.load import (
+    ROOT,
+    Turn,
+    corpus_from_readme,
+    corpus_from_tests,
+    serve,
+    soak,
+)
+from benchmarks.simulated import SimulatedFuseki
+from fuseki import LocalFusekiClient
+from server import routes
+from tests.local_test import NTRIPLES
+
+
+class TryTestingCorpus(TestCase):
+    def test_conversations_keep_disambiguation_turns(self):
+        conversations = corpus_from_tests(
+            [os.path.join(ROOT, "tests", "domainrange_test.py")]
+        )
+        questions = [[turn.question for turn in c] for c in conversations]
+        self.assertIn("all of the above", questions[-1])
+        self.assertEqual(len(conversations), 6)
+
+    def test_readme_examples(self):
+        questions = [
+            c[0].question for c in corpus_from_readme(os.path.join(ROOT, "README.md"))
+        ]
+        self.assertIn("What is the mission description?", questions)
+
+
+class TryTestingLoad(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        client = SimulatedFuseki(LocalFusekiClient(ntriples_path=cls.path), latency=0)
+        cls.server, cls.url = serve(routes, client)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        os.remove(cls.path)
+
+    def test_soak_reports(self):
+        corpus = [
+            [Turn("Hello", "Hello, welcome!")],
+            [Turn("What dataset do you interact with?", None)],
+        ]
+        report = soak(
+            self.url, corpus, concurrency=3, duration=0.5, sample_interval=0.1
+        )
+        summary = report["summary"]
+        self.assertGreater(summary["requests"], 0)
+        self.assertEqual(summary["errors"], 0)
+        self.assertLessEqual(summary["p50_ms"], summary["p99_ms"])
+        self.assertEqual(report["disagreements"], [])
+        self.assertGreater(len(report["timeline"]), 2)
+        if os.path.exists("/proc/self/status"):
+            self.assertIsNotNone(report["timeline"][-1]["rss_mb"])
+
+    def test_simulated_latency(self):
+        client = SimulatedFuseki(
+            LocalFusekiClient(ntriples_path=self.path), latency=0.05
+        )
+        start = time.perf_counter()
+        client.labels_query()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.05)
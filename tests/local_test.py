@@ -0,0 +1,130 @@
+import os
+import socket
+import tempfile
+from unittest import TestCase
+
+from fuseki import BackendUnavailable, LocalFusekiClient
+from nlp2sparql import BACKEND_UNAVAILABLE, NaturalLanguageQueryExecutor, Query
+
+FSE = "http://opencaesar.io/examples/firesat/disciplines/fse/fse#"
+VIM4 = "http://bipm.org/jcgm/vim4#"
+EX = "http://example.org/firesat#"
+
+NTRIPLES = f"""
+# a tiny FireSat-shaped graph
+<{VIM4}hasDoubleNumber> <http://www.w3.org/2000/01/rdf-schema#label> "hasDoubleNumber" .
+<{VIM4}hasDoubleNumber> <http://www.w3.org/2000/01/rdf-schema#domain> <{VIM4}UnitaryQuantityValue> .
+<{VIM4}hasDoubleNumber> <http://www.w3.org/2000/01/rdf-schema#range> <http://www.w3.org/2001/XMLSchema#double> .
+<{VIM4}UnitaryQuantityValue> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <http://www.w3.org/2002/07/owl#Class> .
+<{VIM4}UnitaryQuantityValue> <http://www.w3.org/2000/01/rdf-schema#label> "UnitaryQuantityValue" .
+<{VIM4}UnitaryQuantityValue> <http://www.w3.org/2000/01/rdf-schema#subClassOf> <{VIM4}QuantityValue> .
+<{VIM4}UnitaryQuantityValue> <http://www.w3.org/2000/01/rdf-schema#subClassOf> _:restriction .
+<{EX}Magnetometer> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> <{FSE}Assembly> .
+<{EX}Magnetometer> <http://imce.jpl.nasa.gov/foundation/base#hasIdentifier> "500000"^^<http://www.w3.org/2001/XMLSchema#string> .
+<{EX}Magnetometer> <http://imce.jpl.nasa.gov/foundation/analysis#isCharacterizedBy> _:mass1 .
+_:mass1 <{VIM4}hasDoubleNumber> "1.2"^^<http://www.w3.org/2001/XMLSchema#double> .
+<{EX}Magnetometer> <http://imce.jpl.nasa.gov/foundation/mission#performs> <{EX}SenseField> .
+<{EX}Magnetometer> <http://imce.jpl.nasa.gov/foundation/mission#performs> <{EX}Detect> .
+<http://imce.jpl.nasa.gov/foundation/base> <http://purl.org/dc/elements/1.1/description> "The \\"Base\\" vocabulary"@en .
+"""
+
+
+class Bounds:
+    def __init__(self, upper=-1, lower=-1):
+        self.upper = upper
+        self.lower = lower
+
+
+class TryTestingLocalClient(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def test_query_prefixed_subject(self):
+        result = self.client.query(subject="foundation:base")
+        self.assertEqual(len(result), 1)
+        self.assertNotIn("subject", result[0])
+        self.assertEqual(
+            result[0]["object"],
+            {"type": "literal", "value": 'The "Base" vocabulary', "xml:lang": "en"},
+        )
+
+    def test_assembly_query_by_id(self):
+        result = self.client.assembly_query(id="500000")
+        self.assertEqual(
+            sorted(r["function"]["value"] for r in result),
+            [f"{EX}Detect", f"{EX}SenseField"],
+        )
+        self.assertEqual(result[0]["mass"]["value"], "1.2")
+
+    def test_assembly_query_mass_filter(self):
+        self.assertEqual(
+            len(self.client.assembly_query(decorator=Bounds(lower=1.0))), 2
+        )
+        self.assertEqual(self.client.assembly_query(decorator=Bounds(upper=1.0)), [])
+
+    def test_domain_range_query(self):
+        result = self.client.domain_range_query(property_label="hasDoubleNumber")
+        self.assertEqual(len(result), 1)
+        self.assertEqual(result[0]["domain_label"]["value"], "UnitaryQuantityValue")
+        self.assertNotIn("range_label", result[0])
+
+    def test_domain_range_batch_query(self):
+        result = self.client.domain_range_batch_query(
+            [f"<{VIM4}hasDoubleNumber>", f"<{VIM4}missing>"],
+            property_label="hasDoubleNumber",
+        )
+        self.assertEqual(list(result), [f"{VIM4}hasDoubleNumber"])
+
+    def test_domain_property_query(self):
+        result = self.client.domain_property_query(domain_label="UnitaryQuantityValue")
+        self.assertEqual(result[0]["property_label"]["value"], "hasDoubleNumber")
+        self.assertEqual(self.client.range_property_query(range_label="nothing"), [])
+
+    def test_sub_and_superclass_query(self):
+        self.assertEqual(
+            self.client.subclass_query(super=f"{VIM4}QuantityValue"),
+            [{"sub": {"type": "uri", "value": f"{VIM4}UnitaryQuantityValue"}}],
+        )
+        # blank node superclasses (restrictions) are filtered like isIRI(?super)
+        self.assertEqual(
+            self.client.superclass_query(sub=f"{VIM4}UnitaryQuantityValue"),
+            [{"super": {"type": "uri", "value": f"{VIM4}QuantityValue"}}],
+        )
+
+    def test_streamed_query_matches_list(self):
+        stream = self.client.assembly_query(decorator=Bounds(lower=1.0), stream=True)
+        self.assertFalse(isinstance(stream, list))
+        self.assertEqual(
+            list(stream), self.client.assembly_query(decorator=Bounds(lower=1.0))
+        )
+
+
+class TryTestingUnreachableLocalClient(TestCase):
+    def setUp(self):
+        # a port nothing listens on
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            host, port = probe.getsockname()
+        self.client = LocalFusekiClient(f"http://{host}:{port}/firesat/sparql")
+
+    def test_dump_failure_is_unavailable(self):
+        with self.assertRaises(BackendUnavailable):
+            self.client.query()
+        # nothing was loaded, so the next call tries again
+        with self.assertRaises(BackendUnavailable):
+            self.client.labels_query()
+
+    def test_executor_reports_unavailable(self):
+        executor = NaturalLanguageQueryExecutor(self.client)
+        with self.assertRaises(BackendUnavailable):
+            executor.warmup()
+        result = executor.query(Query("What is the base description?"))
+        self.assertEqual(result, {"response": BACKEND_UNAVAILABLE})
@@ -0,0 +1,76 @@
+import threading
+from http.server import ThreadingHTTPServer
+from unittest import TestCase
+
+from fuseki import FusekiClient
+from fuseki.instruments import CACHE_LOOKUPS, REQUESTS
+from metrics import REGISTRY, Counter, Gauge, Histogram, Registry
+from tests.transport_test import EchoSparqlHandler
+
+
+class TryTestingMetrics(TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_and_gauge_text(self):
+        calls = Counter("calls_total", "Calls.", ["kind"], registry=self.registry)
+        calls.labels("a").inc()
+        calls.labels(kind='say "hi"').inc(2)
+        busy = Gauge("busy", "Busy workers.", registry=self.registry)
+        with busy.track_inprogress():
+            busy.inc()
+        self.assertEqual(
+            self.registry.render(),
+            "# HELP calls_total Calls.\n"
+            "# TYPE calls_total counter\n"
+            'calls_total{kind="a"} 1.0\n'
+            'calls_total{kind="say \\"hi\\""} 2.0\n'
+            "# HELP busy Busy workers.\n"
+            "# TYPE busy gauge\n"
+            "busy 1.0\n",
+        )
+
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram(
+            "latency_seconds", "Latency.", registry=self.registry, buckets=(0.1, 1)
+        )
+        for value in (0.05, 0.5, 5):
+            latency.observe(value)
+        lines = self.registry.render().splitlines()[2:]
+        self.assertEqual(
+            lines,
+            [
+                'latency_seconds_bucket{le="0.1"} 1.0',
+                'latency_seconds_bucket{le="1.0"} 2.0',
+                'latency_seconds_bucket{le="+Inf"} 3.0',
+                "latency_seconds_count 3.0",
+                "latency_seconds_sum 5.55",
+            ],
+        )
+
+    def test_duplicate_names_are_rejected(self):
+        Counter("calls_total", "Calls.", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("calls_total", "Calls.", registry=self.registry)
+
+
+class TryTestingFusekiMetrics(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), EchoSparqlHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.client = FusekiClient(f"http://{host}:{port}/firesat/sparql")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_calls_and_cache_lookups_are_counted(self):
+        requests = REQUESTS.labels("labels").get()
+        hits = CACHE_LOOKUPS.labels("labels", "hit").get()
+        self.client.labels_query()
+        self.client.labels_query()
+        self.assertEqual(REQUESTS.labels("labels").get(), requests + 1)
+        self.assertEqual(CACHE_LOOKUPS.labels("labels", "hit").get(), hits + 1)
+        self.assertIn('fuseki_cache_hit_ratio{template="labels"}', REGISTRY.render())
@@ -0,0 +1,82 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import (
+    PAGE_SIZE,
+    InvalidCursor,
+    NaturalLanguageQueryExecutor,
+    Query,
+    SubSuperStrategy,
+    decode_cursor,
+    encode_cursor,
+)
+
+EX = "http://example.org/hierarchy#"
+SUBCLASS_OF = "http://www.w3.org/2000/01/rdf-schema#subClassOf"
+COUNT = PAGE_SIZE * 2 + 7
+
+
+class TryTestingPagination(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            for i in range(COUNT):
+                dump.write(f"<{EX}Class{i:03}> <{SUBCLASS_OF}> <{EX}Top> .\n")
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def setUp(self):
+        self.nlqe = NaturalLanguageQueryExecutor(self.client)
+        tokens = [("What", "WP"), ("subclasses", "VBZ"), (f"{EX}Top", "NN")]
+        result, status = SubSuperStrategy().execute(tokens, {}, self.client)
+        self.first = self.nlqe._complete(result, status)
+
+    def test_first_page_is_bounded(self):
+        self.assertEqual(self.first["response"].count("- "), PAGE_SIZE)
+        self.assertIn("show more", self.first["response"])
+        self.assertEqual(decode_cursor(self.first["next"])["offset"], PAGE_SIZE)
+
+    def test_show_more_walks_every_page(self):
+        second = self.nlqe.query(Query("show more"))
+        self.assertTrue(second["response"].startswith("More subclasses"))
+        self.assertIn(f"Class{PAGE_SIZE:03}", second["response"])
+        third = self.nlqe.query(Query("Show more!"))
+        self.assertEqual(third["response"].count("- "), COUNT - 2 * PAGE_SIZE)
+        self.assertNotIn("next", third)
+        self.assertEqual(
+            self.nlqe.query(Query("show more"))["response"],
+            "There are no more results to show.",
+        )
+
+    def test_explicit_cursor(self):
+        second = self.nlqe.query(Query("", cursor=self.first["next"]))
+        self.assertEqual(second["response"].count("- "), PAGE_SIZE)
+        with self.assertRaises(InvalidCursor):
+            self.nlqe.query(Query("", cursor="not a cursor"))
+
+    def test_tampered_cursors(self):
+        state = decode_cursor(self.first["next"])
+        del state["strategy"]
+        tampered = [
+            encode_cursor("SubSuperStrategy", **dict(state, offset="x")),
+            encode_cursor("SubSuperStrategy", **dict(state, offset=True)),
+            encode_cursor("SubSuperStrategy", **dict(state, offset=-PAGE_SIZE)),
+            encode_cursor("SubSuperStrategy", **dict(state, uri=None)),
+            encode_cursor("SubSuperStrategy", offset=PAGE_SIZE),
+            encode_cursor("SubSuperStrategy", **dict(state, extra=1)),
+            encode_cursor("NoMoreResultsStrategy", **state),
+            encode_cursor(["SubSuperStrategy"], **state),
+            "WzFd",  # a JSON list
+        ]
+        for cursor in tampered:
+            with self.subTest(cursor=cursor), self.assertRaises(InvalidCursor):
+                self.nlqe.query(Query("", cursor=cursor))
+        # the session still pages on
+        second = self.nlqe.query(Query("show more"))
+        self.assertTrue(second["response"].startswith("More subclasses"))
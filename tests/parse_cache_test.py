@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+from nlp2sparql import NaturalLanguageQueryExecutor, normalize_question
+
+
+class TryTestingParseCache(TestCase):
+    def setUp(self):
+        self.executor = NaturalLanguageQueryExecutor(None, parse_cache_size=2)
+        self.parsed = []
+
+        def parse(text):
+            self.parsed.append(text)
+            return [(word, "NN") for word in text.split()]
+
+        self.executor._parse = parse
+
+    def test_repeated_questions_are_parsed_once(self):
+        first = self.executor._parse_cached("Tell me about  Base ")
+        second = self.executor._parse_cached(" Tell me about Base")
+        self.assertEqual(first, second)
+        self.assertEqual(self.parsed, ["Tell me about Base"])
+        stats = self.executor.parse_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_cached_tokens_cannot_be_changed(self):
+        tokens = self.executor._parse_cached("Tell me")
+        tokens.append(("more", "NN"))
+        self.assertEqual(
+            self.executor._parse_cached("Tell me"), [("Tell", "NN"), ("me", "NN")]
+        )
+        self.assertIsInstance(self.executor.parse_cache.get("Tell me")[0], tuple)
+
+    def test_size_bound_and_clear(self):
+        for question in ("a", "b", "c", "a"):
+            self.executor._parse_cached(question)
+        self.assertEqual(self.parsed, ["a", "b", "c", "a"])
+        self.executor.clear_parse_cache()
+        self.assertEqual(len(self.executor.parse_cache), 0)
+
+    def test_case_is_kept(self):
+        self.assertEqual(normalize_question("  What is\tBase? "), "What is Base?")
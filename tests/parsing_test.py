@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+from nlp2sparql import NaturalLanguageQueryExecutor, resources
+from nlp2sparql.parsing import ParsePool, parse
+
+QUESTIONS = [
+    "What is the mission description?",
+    'What is the domain of "has assignment"?',
+    "What are the subclasses of http://a#B?",
+]
+
+
+class TryTestingParsePool(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = ParsePool(workers=2, batch_size=4)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.close()
+
+    def expected(self, text):
+        try:
+            return parse(text)
+        except LookupError as e:
+            return e
+
+    def test_matches_parsing_in_process(self):
+        futures = [self.pool.submit(text) for text in QUESTIONS * 10]
+        for text, future in zip(QUESTIONS * 10, futures):
+            expected = self.expected(text)
+            if isinstance(expected, LookupError):
+                self.assertIsInstance(future.exception(timeout=60), LookupError)
+            else:
+                self.assertEqual(future.result(timeout=60), expected)
+
+    def test_executor_parses_in_pool(self):
+        executor = NaturalLanguageQueryExecutor(None, parse_pool=self.pool)
+        try:
+            resources.load()
+        except LookupError:
+            with self.assertRaises(LookupError):
+                executor._parse_cached(QUESTIONS[0])
+        else:
+            self.assertEqual(executor._parse_cached(QUESTIONS[0]), parse(QUESTIONS[0]))
+
+    def test_closed_pool_fails(self):
+        pool = ParsePool(workers=1)
+        pool.close()
+        with self.assertRaises(RuntimeError):
+            pool.parse(QUESTIONS[0])
@@ -0,0 +1,164 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import FusekiClient, LocalFusekiClient
+from nlp2sparql import (
+    FilterMassStrategy,
+    MassFunctionStrategy,
+    NaturalLanguageQueryExecutor,
+    QuantityIndex,
+)
+from tests.local_test import EX, NTRIPLES
+
+
+def mass_row(name, id, mass):
+    return {
+        "assembly": {"type": "uri", "value": EX + name},
+        "id": {"type": "literal", "value": id},
+        "mass": {"type": "literal", "value": mass},
+    }
+
+
+class TryTestingQuantityIndex(TestCase):
+    def setUp(self):
+        self.index = QuantityIndex("mass")
+        self.index.load(
+            [
+                mass_row("Tank", "1", "25.0"),
+                mass_row("Antenna", "2", "0.05"),
+                mass_row("Magnetometer", "3", "1.2"),
+                mass_row("Thruster", "4", "2"),
+                mass_row("Tank", "1", "30.0"),
+                mass_row("Broken", "5", "n/a"),
+            ]
+        )
+
+    def names(self, uris):
+        return [uri[len(EX) :] for uri in uris]
+
+    def test_range_bounds_are_strict(self):
+        self.assertEqual(self.names(self.index.range(1.2, 25.0)), ["Thruster"])
+        self.assertEqual(
+            self.names(self.index.range(lower=1.0)),
+            ["Magnetometer", "Tank", "Thruster"],
+        )
+        self.assertEqual(self.names(self.index.range(upper=0.05)), [])
+
+    def test_range_does_not_depend_on_row_order(self):
+        shuffled = QuantityIndex("mass")
+        shuffled.load(
+            [
+                mass_row("Thruster", "4", "2"),
+                mass_row("Tank", "1", "30.0"),
+                mass_row("Magnetometer", "3", "1.2"),
+                mass_row("Antenna", "2", "0.05"),
+                mass_row("Tank", "1", "25.0"),
+            ]
+        )
+        self.assertEqual(shuffled.range(), self.index.range())
+        self.assertEqual(
+            self.names(shuffled.range()),
+            ["Antenna", "Magnetometer", "Tank", "Thruster"],
+        )
+
+    def test_count_is_per_assembly(self):
+        self.assertEqual(self.index.count(lower=20), 1)
+        self.assertEqual(self.index.count(), 4)
+
+    def test_extremes(self):
+        self.assertEqual(
+            self.index.largest(2), [(EX + "Tank", 30.0), (EX + "Thruster", 2.0)]
+        )
+        self.assertEqual(self.index.smallest(1), [(EX + "Antenna", 0.05)])
+
+    def test_values_of(self):
+        self.assertEqual(self.index.values_of("1"), [25.0, 30.0])
+        self.assertEqual(self.index.values_of("6"), [])
+
+
+class TryTestingMassStrategies(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def test_range(self):
+        tokens = [("heavier", "JJR"), ("1", "CD"), ("lighter", "JJR"), ("2", "CD")]
+        result, _ = FilterMassStrategy().execute(tokens, {}, self.client)
+        self.assertEqual(
+            result["response"],
+            "The subject is: <br> &nbsp;&nbsp;&nbsp;&nbsp;- Magnetometer <br> ",
+        )
+
+    def test_count(self):
+        tokens = [("heavier", "JJR"), ("2", "CD")]
+        result, _ = FilterMassStrategy(count=True).execute(tokens, {}, self.client)
+        self.assertEqual(result["response"], "There are 0 subjects within this range.")
+
+    def test_heaviest(self):
+        tokens = [("heaviest", "JJS"), ("subject", "NN")]
+        result, _ = FilterMassStrategy().execute(tokens, {}, self.client)
+        self.assertEqual(
+            result["response"],
+            "The heaviest subject is: <br> &nbsp;&nbsp;&nbsp;&nbsp;- Magnetometer (1.2 kg) <br> ",
+        )
+
+    def test_mass_of_id(self):
+        tokens = [("mass", "NN"), ("id", "NN"), ("500000", "CD")]
+        result, _ = MassFunctionStrategy().execute(tokens, {}, self.client)
+        self.assertEqual(
+            result["response"],
+            "For assembly object 500000: <br>\n The mass is 1.2 kg. <br>\n ",
+        )
+
+    def test_id_without_mass_is_not_a_mass_answer(self):
+        tokens = [("assembly", "NN"), ("id", "NN"), ("500000", "CD")]
+        result, _ = MassFunctionStrategy().execute(tokens, {}, self.client)
+        self.assertEqual(result["response"], "For assembly object 500000: <br>\n ")
+
+    def test_reload_drops_indexes(self):
+        handle, path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        self.addCleanup(os.remove, path)
+        client = LocalFusekiClient(ntriples_path=path)
+        executor = NaturalLanguageQueryExecutor(client)
+        executor.warmup()
+        self.assertTrue(executor.mass_index.loaded)
+
+        with open(path, "a") as dump:
+            dump.write(
+                f"<{EX}Tank> <http://www.w3.org/1999/02/22-rdf-syntax-ns#type> "
+                "<http://opencaesar.io/examples/firesat/disciplines/fse/fse#Assembly> .\n"
+                f"<{EX}Tank> <http://imce.jpl.nasa.gov/foundation/base#hasIdentifier> "
+                '"500001" .\n'
+                f"<{EX}Tank> <http://imce.jpl.nasa.gov/foundation/analysis#isCharacterizedBy> "
+                "_:mass2 .\n"
+                '_:mass2 <http://bipm.org/jcgm/vim4#hasDoubleNumber> "1.5" .\n'
+                f"<{EX}Tank> <http://imce.jpl.nasa.gov/foundation/mission#performs> "
+                f"<{EX}Store> .\n"
+            )
+        client.reload()
+        self.assertFalse(executor.mass_index.loaded)
+        self.assertFalse(executor.class_hierarchy.loaded)
+
+        tokens = [("heavier", "JJR"), ("1", "CD"), ("lighter", "JJR"), ("2", "CD")]
+        strategy = executor._create(FilterMassStrategy)
+        result, _ = strategy.execute(tokens, {}, client)
+        self.assertIn("- Tank", result["response"])
+
+    def test_invalidate_cache_drops_indexes(self):
+        client = FusekiClient("http://127.0.0.1:9/firesat/sparql")
+        executor = NaturalLanguageQueryExecutor(client)
+        executor.mass_index.load([mass_row("Tank", "1", "25.0")])
+        client.invalidate_cache("assembly_masses")
+        self.assertTrue(executor.mass_index.loaded)
+        client.invalidate_cache()
+        self.assertFalse(executor.mass_index.loaded)
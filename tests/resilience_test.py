@@ -0,0 +1,227 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from fuseki import (
+    BackendUnavailable,
+    CircuitOpen,
+    FusekiClient,
+    LocalFusekiClient,
+    QueryTimeout,
+)
+from fuseki.resilience import CircuitBreaker, RetryPolicy
+from nlp2sparql import BACKEND_UNAVAILABLE, NaturalLanguageQueryExecutor, Query
+from tests.cache_test import FakeClock
+from tests.local_test import NTRIPLES
+
+NO_WAIT = RetryPolicy(retries=2, base_delay=0)
+
+
+class FlakySparqlHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests += 1
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        if self.server.failures > 0:
+            self.server.failures -= 1
+            status, body = 503, b""
+        elif self.server.garbled > 0:
+            self.server.garbled -= 1
+            status, body = 200, b"not json"
+        else:
+            row = {"s": {"type": "literal", "value": "ok"}}
+            status, body = 200, json.dumps({"results": {"bindings": [row]}}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/sparql-results+json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except BrokenPipeError:
+            # the client gave up waiting
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TryTestingCircuitBreaker(TestCase):
+    def test_opens_and_recovers(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        breaker.allow()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.allow()
+
+        # one trial call once the reset timeout passed
+        clock.now = 10
+        breaker.allow()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(CircuitOpen):
+            breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_failed_trial_opens_again(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        breaker.allow()
+        breaker.record_failure()
+        clock.now = 15
+        with self.assertRaises(CircuitOpen):
+            breaker.allow()
+
+    def test_abandoned_trial_lets_next_call_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now = 10
+        breaker.allow()
+        breaker.abandon()
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        breaker.allow()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_retry_delays_are_bounded(self):
+        policy = RetryPolicy(retries=4, base_delay=1, max_delay=3, random=lambda: 1)
+        self.assertEqual(list(policy.delays()), [1, 2, 3, 3])
+
+
+class TryTestingResilientClient(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FlakySparqlHandler)
+        self.server.requests, self.server.failures, self.server.delay = 0, 0, 0
+        self.server.garbled = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.endpoint = f"http://{host}:{port}/firesat/sparql"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def client(self, **kwargs):
+        kwargs.setdefault("retry", NO_WAIT)
+        return FusekiClient(self.endpoint, cache_size=0, **kwargs)
+
+    def test_server_errors_are_retried(self):
+        self.server.failures = 2
+        self.assertEqual(len(self.client().query()), 1)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_unavailable_after_retries(self):
+        self.server.failures = 3
+        with self.assertRaises(BackendUnavailable):
+            self.client().query()
+        self.assertEqual(self.server.requests, 3)
+
+    def test_deadline_becomes_timeout(self):
+        self.server.delay = 0.5
+        with self.assertRaises(QueryTimeout):
+            self.client(timeout=0.2).query()
+
+    def test_open_circuit_fails_fast(self):
+        self.server.failures = 10
+        client = self.client(breaker=CircuitBreaker(failure_threshold=3))
+        with self.assertRaises(BackendUnavailable):
+            client.query()
+        with self.assertRaises(CircuitOpen):
+            client.query()
+        self.assertEqual(self.server.requests, 3)
+
+    def test_pool_timeout_is_not_a_failure(self):
+        client = self.client(
+            timeout=0.1, pool_size=1, breaker=CircuitBreaker(failure_threshold=1)
+        )
+        connection, _ = client._transport._pool.acquire()
+        try:
+            with self.assertRaises(QueryTimeout):
+                client.query()
+        finally:
+            client._transport._pool.release(connection)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(self.server.requests, 0)
+
+    def test_unexpected_error_ends_trial(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        client = self.client(breaker=breaker)
+        breaker.record_failure()
+        clock.now = 10
+        self.server.garbled = 1
+        with self.assertRaises(ValueError):
+            client.query()
+        # the next call is the trial, rather than rejected forever
+        self.assertEqual(len(client.query()), 1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_streamed_call_is_retried(self):
+        self.server.failures = 1
+        self.assertEqual(len(list(self.client().query(stream=True))), 1)
+
+    def test_executor_reports_unavailable(self):
+        self.server.failures = 10
+        executor = NaturalLanguageQueryExecutor(self.client())
+        question = 'Is "http://a#B" a subclass of "http://a#C"?'
+        result = executor.query(Query(question))
+        self.assertEqual(result, {"response": BACKEND_UNAVAILABLE})
+
+
+class OutageClient:
+    """
+    Wraps a client and raises BackendUnavailable from every query method while `down` is set.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.down = True
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if not name.endswith("_query"):
+            return method
+
+        def call(*args, **kwargs):
+            if self.down:
+                raise BackendUnavailable("Fuseki is down")
+            return method(*args, **kwargs)
+
+        return call
+
+
+class TryTestingExecutorOutage(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def test_next_question_is_answered(self):
+        client = OutageClient(LocalFusekiClient(ntriples_path=self.path))
+        executor = NaturalLanguageQueryExecutor(client)
+        query = Query("What is the mass of assembly object id 500000?", session_id="a")
+        with self.assertLogs("nlp2sparql", "WARNING"):
+            self.assertEqual(executor.query(query), {"response": BACKEND_UNAVAILABLE})
+        self.assertEqual(query.status, "unavailable")
+        self.assertEqual(executor.sessions.get("a")["strategy"], "NONE")
+
+        client.down = False
+        query = Query("What is the base description?", session_id="a")
+        self.assertEqual(executor.query(query)["response"], 'The "Base" vocabulary')
@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from unittest import TestCase
+
+from nlp2sparql import resources
+
+SERVER = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server"
+)
+
+
+class TryTestingResources(TestCase):
+    def test_import_leaves_nltk_unloaded(self):
+        script = (
+            "import sys, nlp2sparql\n"
+            "nlp2sparql.NaturalLanguageQueryExecutor(None)\n"
+            "print('nltk' in sys.modules)\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script],
+            cwd=SERVER,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        self.assertEqual(output.strip(), "False")
+
+    def test_stemmer_is_shared(self):
+        self.assertIs(resources.stemmer(), resources.stemmer())
+        self.assertEqual(resources.stemmer().stem("descriptions"), "descript")
+
+    def test_data_dir_is_searched_first(self):
+        resources.stemmer()
+        import nltk
+
+        self.assertEqual(nltk.data.path[0], resources.DATA_DIR)
@@ -0,0 +1,127 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from benchmarks.dataset import firesat_ntriples
+from fuseki import LocalFusekiClient
+from nlp2sparql import (
+    MemorySessionStore,
+    NaturalLanguageQueryExecutor,
+    Query,
+    SQLiteSessionStore,
+)
+from nlp2sparql.sessions import new_session
+from tests.cache_test import FakeClock
+
+DISAMBIGUATE = "What is the domain and range of hasProperty0?"
+MASS = "What is the mass of assembly object id 500010?"
+
+
+class TryTestingSessionStores(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def stores(self, **options):
+        return (
+            MemorySessionStore(clock=self.clock, **options),
+            SQLiteSessionStore(self.path, clock=self.clock, **options),
+        )
+
+    def test_states_are_copied(self):
+        for store in self.stores():
+            self.assertEqual(store.get("a"), new_session())
+            state = store.get("a")
+            state["options"]["base"] = "<http://a#b>"
+            store.put("a", state)
+            state["options"].clear()
+            self.assertEqual(store.get("a")["options"], {"base": "<http://a#b>"})
+            self.assertEqual(store.get("b"), new_session())
+            store.close()
+
+    def test_idle_sessions_expire(self):
+        for store in self.stores(ttl=10):
+            state = new_session()
+            state["strategy"] = "DOMAIN_RANGE"
+            store.put("a", state)
+            self.clock.now += 9
+            store.put("a", store.get("a"))
+            self.clock.now += 9
+            self.assertEqual(store.get("a")["strategy"], "DOMAIN_RANGE")
+            self.clock.now += 10
+            self.assertEqual(store.get("a"), new_session())
+            store.close()
+
+    def test_size_bound(self):
+        memory, sqlite = self.stores(maxsize=2)
+        for store in (memory, sqlite):
+            for i, session in enumerate("abc"):
+                self.clock.now = i
+                store.put(session, new_session())
+        sqlite.evict()
+        self.assertEqual((len(memory), len(sqlite)), (2, 2))
+        self.assertEqual(sqlite.get("a"), new_session())
+        sqlite.close()
+
+    def test_sqlite_sessions_are_shared(self):
+        first = SQLiteSessionStore(self.path)
+        second = SQLiteSessionStore(self.path)
+        state = new_session()
+        state["next_cursor"] = "cursor"
+        first.put("a", state)
+        self.assertEqual(second.get("a")["next_cursor"], "cursor")
+        first.close()
+        second.close()
+
+
+class TryTestingSessionExecutor(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(firesat_ntriples())
+        cls.client = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def ask(self, executor, question, session):
+        query = Query(question, session_id=session)
+        return executor.query(query), query.status
+
+    def test_disambiguation_stays_in_its_session(self):
+        executor = NaturalLanguageQueryExecutor(self.client)
+        _, status = self.ask(executor, DISAMBIGUATE, "a")
+        self.assertEqual(status, "disambiguating")
+
+        result, status = self.ask(executor, MASS, "b")
+        self.assertEqual(status, "answered")
+        self.assertIn("The mass is", result["response"])
+
+        result, status = self.ask(executor, "all of the above", "a")
+        self.assertEqual(status, "answered")
+        self.assertEqual(result["response"].count("For property 'hasProperty0'"), 2)
+
+    def test_sessions_carry_across_executors(self):
+        handle, path = tempfile.mkstemp(suffix=".sqlite3")
+        os.close(handle)
+        first = NaturalLanguageQueryExecutor(
+            self.client, sessions=SQLiteSessionStore(path)
+        )
+        second = NaturalLanguageQueryExecutor(
+            self.client, sessions=SQLiteSessionStore(path)
+        )
+        try:
+            self.ask(first, DISAMBIGUATE, "a")
+            result, status = self.ask(second, "all of the above", "a")
+            self.assertEqual(status, "answered")
+            self.assertIn("hasProperty0", result["response"])
+        finally:
+            first.sessions.close()
+            second.sessions.close()
+            os.remove(path)
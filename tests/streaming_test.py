@@ -0,0 +1,42 @@
+import gzip
+import json
+from unittest import TestCase
+
+from fuseki.streaming import BindingStream, iter_bindings
+
+BINDINGS = [
+    {"s": {"type": "uri", "value": f"http://example.org/{i}"}} for i in range(20)
+] + [{"o": {"type": "literal", "value": 'a "quoted" ] } value', "xml:lang": "en"}}]
+DOCUMENT = json.dumps(
+    {"head": {"vars": ["s", "o"]}, "results": {"bindings": BINDINGS}}, indent=2
+).encode()
+
+
+def chunked(data, size):
+    return (data[i : i + size] for i in range(0, len(data), size))
+
+
+class TryTestingStreaming(TestCase):
+    def test_whole_document(self):
+        self.assertEqual(list(iter_bindings([DOCUMENT])), BINDINGS)
+
+    def test_byte_by_byte(self):
+        self.assertEqual(list(iter_bindings(chunked(DOCUMENT, 1))), BINDINGS)
+
+    def test_gzip_and_multibyte_characters(self):
+        bindings = [{"o": {"type": "literal", "value": "μ-grav ✓"}}]
+        document = json.dumps({"results": {"bindings": bindings}}).encode()
+        chunks = chunked(gzip.compress(document), 3)
+        self.assertEqual(list(iter_bindings(chunks, gzipped=True)), bindings)
+
+    def test_rows_arrive_before_the_document_ends(self):
+        stream = BindingStream()
+        half = DOCUMENT.index(b"example.org/10")
+        first = list(stream.feed(DOCUMENT[:half]))
+        self.assertEqual(first, BINDINGS[:10])
+        self.assertFalse(stream.done)
+        self.assertEqual(list(stream.feed(DOCUMENT[half:])), BINDINGS[10:])
+        self.assertTrue(stream.done)
+
+    def test_empty_result(self):
+        self.assertEqual(list(iter_bindings([b'{"results": {"bindings": []}}'])), [])
@@ -0,0 +1,78 @@
+import math
+from unittest import TestCase
+
+from fuseki.templates import TEMPLATES, Iri, Literal, Number, Term, SparqlTemplate
+
+
+class TryTestingTemplates(TestCase):
+    def test_literal_is_escaped(self):
+        self.assertEqual(Literal().render('say "hi"\n'), '"say \\"hi\\"\\n"')
+
+    def test_iri_rejects_injection(self):
+        self.assertEqual(
+            Iri().render("<http://bipm.org/jcgm/vim4#A>"),
+            "<http://bipm.org/jcgm/vim4#A>",
+        )
+        with self.assertRaises(ValueError):
+            Iri().render("http://x> . ?s ?p ?o . <http://y")
+
+    def test_term_accepts_variables_and_prefixed_names(self):
+        self.assertEqual(Term().render("?subject"), "?subject")
+        self.assertEqual(Term().render("foundation:base"), "foundation:base")
+        self.assertEqual(Term().render("http://x#y"), "<http://x#y>")
+
+    def test_number_bounds(self):
+        self.assertEqual(Number().render(0.8), "0.8")
+        self.assertEqual(Number().render(10), "10")
+        self.assertIn('"-INF"', Number().render(-math.inf))
+        with self.assertRaises(ValueError):
+            Number().render(math.nan)
+
+    def test_untyped_placeholder(self):
+        with self.assertRaises(ValueError):
+            SparqlTemplate("broken", "SELECT * WHERE { ${s} ?p ?o }")
+
+    def test_bind_builds_compact_query(self):
+        query = TEMPLATES["subclass"].bind(
+            super="http://bipm.org/jcgm/vim4#GeneralProperty"
+        )
+        self.assertEqual(
+            query.key,
+            ("subclass",)
+            + ("<http://bipm.org/jcgm/vim4#GeneralProperty>",) * 3
+            + ("",),
+        )
+        self.assertIn(
+            "?sub rdfs:subClassOf <http://bipm.org/jcgm/vim4#GeneralProperty> .",
+            query.sparql,
+        )
+        self.assertNotIn("\n", query.sparql)
+
+    def test_assembly_comments_are_stripped(self):
+        query = TEMPLATES["assembly"].bind(
+            assembly="?assembly", id="500000", mass="?mass", function="?function"
+        )
+        self.assertNotIn("# match", query.sparql)
+        self.assertIn('base:hasIdentifier "500000" ;', query.sparql)
+
+    def test_page_defaults_to_everything(self):
+        template = TEMPLATES["superclass"]
+        self.assertNotIn("LIMIT", template.bind(sub="http://x#y").sparql)
+        self.assertTrue(
+            template.bind(sub="http://x#y", page=(51, 100)).sparql.endswith(
+                "LIMIT 51 OFFSET 100"
+            )
+        )
+        with self.assertRaises(ValueError):
+            template.bind(sub="http://x#y", page=(-1, 0))
+
+    def test_paged_templates_have_a_total_order(self):
+        # pages are only stable if no two rows compare equal under ORDER BY
+        orders = {
+            "assembly_range_distinct": "ORDER BY ?assembly",
+            "domain_property": "ORDER BY ?domain ?property ?property_label",
+            "range_property": "ORDER BY ?range ?property ?property_label",
+        }
+        for name, order in orders.items():
+            with self.subTest(template=name):
+                self.assertIn(order, "".join(TEMPLATES[name].segments))
@@ -0,0 +1,79 @@
+import gzip
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+from urllib.parse import parse_qs
+
+from fuseki.transport import HTTPTransport, TransportError
+
+
+class EchoSparqlHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        sparql = parse_qs(self.rfile.read(length).decode())["query"][0]
+        if sparql == "BROKEN":
+            self.send_response(400)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps(
+            {"results": {"bindings": [{"q": {"type": "literal", "value": sparql}}]}}
+        ).encode()
+        compress = "gzip" in self.headers.get("Accept-Encoding", "")
+        if compress:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/sparql-results+json")
+        if compress:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TryTestingTransport(TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), EchoSparqlHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        host, port = self.server.server_address
+        self.transport = HTTPTransport(
+            f"http://{host}:{port}/firesat/sparql", pool_size=2
+        )
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_select_decodes_gzip_json(self):
+        ret = self.transport.select("SELECT * WHERE { ?s ?p ?o }")
+        self.assertEqual(
+            ret["results"]["bindings"][0]["q"]["value"], "SELECT * WHERE { ?s ?p ?o }"
+        )
+
+    def test_concurrent_queries_do_not_mix(self):
+        queries = [f"SELECT {i}" for i in range(50)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            answers = list(pool.map(self.transport.select, queries))
+        for query, ret in zip(queries, answers):
+            self.assertEqual(ret["results"]["bindings"][0]["q"]["value"], query)
+        # never more sockets than the pool allows
+        self.assertLessEqual(self.transport._pool._idle.qsize(), 2)
+
+    def test_error_status_raises(self):
+        with self.assertRaises(TransportError):
+            self.transport.select("BROKEN")
+        # the pool is still usable afterwards
+        self.assertTrue(self.transport.select("SELECT 1")["results"]["bindings"])
+
+    def test_stream_yields_bindings_and_reuses_connection(self):
+        rows = list(self.transport.stream("SELECT 2", chunk_size=7))
+        self.assertEqual(rows, [{"q": {"type": "literal", "value": "SELECT 2"}}])
+        self.assertEqual(self.transport._pool._idle.qsize(), 1)
@@ -0,0 +1,108 @@
+import os
+import tempfile
+from unittest import TestCase
+
+from fuseki import LocalFusekiClient
+from nlp2sparql import PredicateIndex, WhatStrategy
+from tests.local_test import NTRIPLES
+
+
+class RecordingClient:
+    """
+    Wraps a client and records the name of every query method called on it.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        def call(*args, **kwargs):
+            self.calls.append(name)
+            return method(*args, **kwargs)
+
+        return call
+
+
+class TryTestingWhatStrategy(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        handle, cls.path = tempfile.mkstemp(suffix=".nt")
+        with os.fdopen(handle, "w") as dump:
+            dump.write(NTRIPLES)
+        cls.local = LocalFusekiClient(ntriples_path=cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.path)
+
+    def ask(self, client, cache, subject, predicate, index=None):
+        tokens = [("What", "WP"), (subject, "NN"), (predicate, "NN")]
+        result, _ = WhatStrategy(index).execute(tokens, cache, client)
+        return result["response"]
+
+    def test_predicate_is_bound_instead_of_scanned(self):
+        client, cache = RecordingClient(self.local), {}
+        self.assertEqual(
+            self.ask(client, cache, "base", "description"), 'The "Base" vocabulary'
+        )
+        self.assertEqual(client.calls, ["predicates_query", "subject_predicates_query"])
+        self.assertEqual(
+            cache, {"description": "http://purl.org/dc/elements/1.1/description"}
+        )
+
+    def test_loaded_index_skips_the_predicate_list(self):
+        index = PredicateIndex()
+        index.refresh(self.local)
+        client = RecordingClient(self.local)
+        # "descriptions" stems to the indexed "description"
+        self.assertEqual(
+            self.ask(client, {}, "base", "descriptions", index), 'The "Base" vocabulary'
+        )
+        self.assertEqual(client.calls, ["subject_predicates_query"])
+
+    def test_index_lookup(self):
+        index = PredicateIndex()
+        index.load(self.local.predicates_query())
+        self.assertEqual(
+            index.lookup("performing"),
+            ["http://imce.jpl.nasa.gov/foundation/mission#performs"],
+        )
+        self.assertEqual(index.lookup("unknown"), [])
+        tables = index._tables
+        index.add("http://example.org/vocab#unknown")
+        self.assertEqual(index.lookup("unknown"), ["http://example.org/vocab#unknown"])
+        # readers holding the previous tables never see them change
+        self.assertNotIn("unknown", tables[0])
+
+    def test_stemmed_match_on_uri_subject(self):
+        client = RecordingClient(self.local)
+        response = self.ask(
+            client, {}, "<http://example.org/firesat#Magnetometer>", "performing"
+        )
+        self.assertTrue(response.startswith("http://example.org/firesat#"))
+        self.assertNotIn("query", client.calls)
+
+    def test_similar_predicates(self):
+        index = PredicateIndex()
+        index.load(self.local.predicates_query())
+        matches = index.similar("desc")
+        self.assertEqual(
+            [match.uri for match in matches],
+            ["http://purl.org/dc/elements/1.1/description"],
+        )
+        self.assertEqual(
+            index.similar("characterized", k=1)[0].name, "isCharacterizedBy"
+        )
+        self.assertEqual(index.similar("xyz"), [])
+        index.add("http://example.org/vocab#describedBy")
+        scores = [match.score for match in index.similar("describe", k=2)]
+        self.assertEqual(len(scores), 2)
+        self.assertGreaterEqual(scores[0], scores[1])
+
+    def test_similar_match_before_scan(self):
+        client = RecordingClient(self.local)
+        self.assertEqual(self.ask(client, {}, "base", "desc"), 'The "Base" vocabulary')
+        self.assertEqual(client.calls, ["predicates_query", "subject_predicates_query"])